@@ -0,0 +1,364 @@
+"""저장된 분석 결과(stock_analysis.db)를 JSON으로 제공하는 읽기 전용 HTTP API.
+
+Streamlit을 불러오지 않고 표준 라이브러리 http.server로 동작하며, DB는 읽기 전용으로 엽니다.
+보관된 날짜(archive/YYYY/YYYYMMDD.jsonl.gz)도 hot DB의 행과 같은 형식으로 돌려줍니다.
+
+엔드포인트:
+    GET /api/dates                                   저장된 날짜 목록 (종목수, 보관 여부)
+    GET /api/results?date=YYYYMMDD                   날짜별 결과
+    GET /api/results?start=YYYYMMDD&end=YYYYMMDD     기간 결과 (날짜 내림차순, 등락률 내림차순)
+    GET /api/stocks/<티커>/history[?start=&end=]     종목별 출현 이력 (날짜 내림차순)
+
+목록 응답은 limit(기본 100, 최대 1000) / offset으로 나누고 다음 페이지가 있으면 next_offset을 돌려줍니다.
+columns=티커,종목명,등락률처럼 필요한 컬럼만 고를 수 있습니다.
+
+요청마다 연결 풀에서 연결 하나를 빌려 데이터 버전과 행을 같은 읽기 트랜잭션에서 읽습니다.
+모든 응답에는 데이터 버전(db_meta의 data_version)과 요청 경로로 만든 ETag가 붙습니다.
+If-None-Match가 일치하면 DB를 읽지 않고 304를 돌려주고, 같은 데이터 버전의 같은 요청은 메모리 LRU 캐시에서 응답합니다.
+
+사용 예:
+    python api_server.py --port 8502
+    curl 'http://localhost:8502/api/results?date=20240502&limit=20&columns=티커,종목명,등락률'
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+DATE_PATTERN = re.compile(r'^\d{8}$')
+HISTORY_PATH_PATTERN = re.compile(r'^/api/stocks/([0-9A-Za-z]{6})/history$')
+
+
+class ApiError(Exception):
+    """클라이언트에 {"error": 메시지}와 함께 돌려줄 HTTP 오류"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class LRUCache:
+    """스레드 안전한 최대 항목 수 기준 LRU 캐시"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def archive_sort_key(row):
+    """hot DB의 ORDER BY 등락률 DESC, 티커 와 같은 순서 (등락률이 없으면 뒤로)"""
+    rate = row.get('등락률')
+    return (rate is None, -(rate or 0.0), row.get('티커') or '')
+
+
+class ResultStore:
+    """stock_analysis.db(읽기 전용)와 보관 파일에서 결과를 읽습니다.
+    ThreadingHTTPServer는 요청마다 새 스레드를 만들므로 연결은 스레드가 아니라 풀에 두고,
+    read_transaction() 안에서 빌린 연결을 connection()으로 씁니다."""
+
+    def __init__(self, db_path, archive_cache_entries=256, pool_size=8):
+        self.db_path = os.path.abspath(db_path)
+        self.base_dir = os.path.dirname(self.db_path)
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._local = threading.local()
+        self._archive_cache = LRUCache(archive_cache_entries)
+
+    def _connect(self):
+        # 스레드 사이에서 재사용하고, 트랜잭션은 BEGIN/COMMIT으로 직접 엽니다.
+        return sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False, isolation_level=None
+        )
+
+    @contextmanager
+    def read_transaction(self):
+        """풀에서 연결을 빌려 읽기 트랜잭션 하나를 엽니다. 안에서 읽은 데이터 버전과 행은 같은 스냅샷입니다.
+        풀이 비어 있으면 새로 열고, 반납할 때 풀이 가득 차 있으면 닫습니다."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        self._local.conn = conn
+        try:
+            conn.execute("BEGIN")
+            yield conn
+        finally:
+            self._local.conn = None
+            try:
+                if conn.in_transaction:
+                    conn.execute("COMMIT")
+                self._pool.put_nowait(conn)
+            except (sqlite3.Error, queue.Full):
+                conn.close()
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            raise RuntimeError("read_transaction() 안에서만 DB를 읽을 수 있습니다.")
+        return conn
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def data_version(self):
+        try:
+            row = self.connection().execute("SELECT 값 FROM db_meta WHERE 키 = 'data_version'").fetchone()
+        except sqlite3.OperationalError:
+            return 0
+        return int(row[0]) if row else 0
+
+    def columns(self):
+        return [row[1] for row in self.connection().execute("PRAGMA table_info(stock_analysis)")]
+
+    def _query(self, sql, params=()):
+        cursor = self.connection().execute(sql, params)
+        names = [description[0] for description in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def _archived(self, start_date, end_date):
+        try:
+            return self.connection().execute(
+                "SELECT 날짜, 종목수, 경로 FROM archived_dates WHERE 날짜 BETWEEN ? AND ?", (start_date, end_date)
+            ).fetchall()
+        except sqlite3.OperationalError:
+            return []  # 보관 기능을 쓰기 전의 DB
+
+    def date_counts(self, start_date='00000000', end_date='99999999'):
+        """[(날짜, 종목수, 보관 파일 경로 또는 None)]을 날짜 내림차순으로 반환합니다."""
+        dates = {date: (count, path) for date, count, path in self._archived(start_date, end_date)}
+        for date, count in self.connection().execute(
+            "SELECT 날짜, COUNT(*) FROM stock_analysis WHERE 날짜 BETWEEN ? AND ? GROUP BY 날짜", (start_date, end_date)
+        ):
+            dates[date] = (count, None)
+        return [(date, count, path) for date, (count, path) in sorted(dates.items(), reverse=True)]
+
+    def archive_rows(self, path):
+        """보관 파일 하나의 행(dict)을 등락률 순으로 읽습니다. 파일 수정 시각까지 키로 캐시합니다."""
+        full_path = path if os.path.isabs(path) else os.path.join(self.base_dir, path)
+        key = (full_path, os.path.getmtime(full_path))
+        rows = self._archive_cache.get(key)
+        if rows is None:
+            with gzip.open(full_path, 'rt', encoding='utf-8') as f:
+                rows = sorted((json.loads(line) for line in f if line.strip()), key=archive_sort_key)
+            self._archive_cache.put(key, rows)
+        return rows
+
+    def results(self, start_date, end_date, columns, limit, offset):
+        """기간 결과 중 offset부터 limit개와 전체 행 수. 페이지가 걸치는 날짜만 읽습니다."""
+        dates = self.date_counts(start_date, end_date)
+        total = sum(count for _, count, _ in dates)
+        items = []
+        skip = offset
+        for date, count, path in dates:
+            if len(items) >= limit:
+                break
+            if skip >= count:
+                skip -= count
+                continue
+            take = min(count - skip, limit - len(items))
+            if path:
+                rows = [{col: row.get(col) for col in columns} for row in self.archive_rows(path)[skip:skip + take]]
+            else:
+                rows = self._query(
+                    f"SELECT {', '.join(columns)} FROM stock_analysis WHERE 날짜 = ? "
+                    "ORDER BY 등락률 DESC, 티커 LIMIT ? OFFSET ?",
+                    (date, take, skip)
+                )
+            items.extend(rows)
+            skip = 0
+        return total, items
+
+    def history(self, ticker, start_date, end_date, columns):
+        """한 종목의 기간 내 출현 이력 (날짜 내림차순). hot DB는 (티커, 날짜) 인덱스로 읽습니다."""
+        rows = self._query(
+            "SELECT * FROM stock_analysis WHERE 티커 = ? AND 날짜 BETWEEN ? AND ?", (ticker, start_date, end_date)
+        )
+        for _, _, path in self._archived(start_date, end_date):
+            rows.extend(row for row in self.archive_rows(path) if row.get('티커') == ticker)
+        rows.sort(key=lambda row: row['날짜'], reverse=True)
+        return [{col: row.get(col) for col in columns} for row in rows]
+
+
+def single_param(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+
+def date_param(query, name, default=None):
+    value = single_param(query, name, default)
+    if value is not None and not DATE_PATTERN.match(value):
+        raise ApiError(400, f"{name}는 YYYYMMDD 형식이어야 합니다: {value}")
+    return value
+
+
+def page_params(query):
+    try:
+        limit = int(single_param(query, 'limit', DEFAULT_LIMIT))
+        offset = int(single_param(query, 'offset', 0))
+    except ValueError:
+        raise ApiError(400, "limit와 offset은 정수여야 합니다.")
+    if not 1 <= limit <= MAX_LIMIT or offset < 0:
+        raise ApiError(400, f"limit는 1~{MAX_LIMIT}, offset은 0 이상이어야 합니다.")
+    return limit, offset
+
+
+def column_params(query, available):
+    requested = single_param(query, 'columns')
+    if not requested:
+        return available
+    columns = [col.strip() for col in requested.split(',') if col.strip()]
+    unknown = [col for col in columns if col not in available]
+    if unknown:
+        raise ApiError(400, f"알 수 없는 컬럼: {', '.join(unknown)}")
+    return columns
+
+
+def page_payload(items, total, limit, offset):
+    next_offset = offset + limit if offset + limit < total else None
+    return {'items': items, 'total': total, 'limit': limit, 'offset': offset, 'next_offset': next_offset}
+
+
+def route(store, path, query):
+    """요청 경로를 처리해 JSON으로 직렬화할 응답 본문을 반환합니다."""
+    if path == '/api/dates':
+        return {'dates': [
+            {'날짜': date, '종목수': count, '보관': path is not None}
+            for date, count, path in store.date_counts()
+        ]}
+
+    if path == '/api/results':
+        date = date_param(query, 'date')
+        start_date = date_param(query, 'start', date)
+        end_date = date_param(query, 'end', date)
+        if not (start_date and end_date):
+            raise ApiError(400, "date 또는 start와 end를 지정하세요.")
+        if start_date > end_date:
+            raise ApiError(400, "start는 end보다 늦을 수 없습니다.")
+        limit, offset = page_params(query)
+        columns = column_params(query, store.columns())
+        total, items = store.results(start_date, end_date, columns, limit, offset)
+        return page_payload(items, total, limit, offset)
+
+    match = HISTORY_PATH_PATTERN.match(path)
+    if match:
+        start_date = date_param(query, 'start', '00000000')
+        end_date = date_param(query, 'end', '99999999')
+        limit, offset = page_params(query)
+        columns = column_params(query, store.columns())
+        rows = store.history(match.group(1), start_date, end_date, columns)
+        return page_payload(rows[offset:offset + limit], len(rows), limit, offset)
+
+    raise ApiError(404, f"알 수 없는 경로: {path}")
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store, cache_entries=512):
+        super().__init__(address, ApiHandler)
+        self.store = store
+        self.response_cache = LRUCache(cache_entries)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "StockTrackerAPI/1.0"
+
+    def _send(self, status, body=b'', etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if status != 304:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send(status, json.dumps({'error': message}, ensure_ascii=False).encode('utf-8'))
+
+    def do_GET(self):
+        store = self.server.store
+        try:
+            # 데이터 버전과 행을 한 트랜잭션에서 읽어, 사이에 저장된 데이터가 이전 버전 키로 캐시되지 않게 합니다.
+            with store.read_transaction():
+                status, body, etag = self._build_response(store)
+        except ApiError as e:
+            self._send_error(e.status, str(e))
+        except (sqlite3.Error, OSError) as e:
+            self._send_error(500, f"데이터 조회 중 오류 발생: {e}")
+        else:
+            self._send(status, body, etag=etag)
+
+    def _build_response(self, store):
+        """(상태 코드, 본문, ETag)를 반환합니다. read_transaction() 안에서 호출합니다."""
+        version = store.data_version()
+        # 응답은 데이터 버전과 요청 경로만으로 정해지므로 본문을 만들지 않고도 ETag를 알 수 있습니다.
+        etag = f'"{version}-{hashlib.sha1(self.path.encode("utf-8")).hexdigest()[:16]}"'
+        if_none_match = self.headers.get("If-None-Match", "")
+        if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+            return 304, b'', etag
+        cache_key = (version, self.path)
+        body = self.server.response_cache.get(cache_key)
+        if body is None:
+            url = urlparse(self.path)
+            payload = route(store, url.path, parse_qs(url.query))
+            payload['data_version'] = version
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+            self.server.response_cache.put(cache_key, body)
+        return 200, body, etag
+
+
+def main():
+    parser = argparse.ArgumentParser(description="저장된 분석 결과 읽기 전용 JSON API")
+    parser.add_argument("--host", default=os.environ.get("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("API_PORT", 8502)))
+    parser.add_argument("--db", default=os.environ.get("API_DB_PATH", "stock_analysis.db"))
+    parser.add_argument("--cache-entries", type=int, default=512, help="응답 캐시 최대 항목 수")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"DB 파일이 없습니다: {args.db}")
+    server = ApiServer((args.host, args.port), ResultStore(args.db), cache_entries=args.cache_entries)
+    print(f"http://{args.host}:{args.port}/api/dates 에서 대기 중 (DB: {os.path.abspath(args.db)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import streamlit as st
 import sqlite3
 import pandas as pd
+import numpy as np
 from pykrx import stock
 from datetime import datetime, timedelta
 import re
@@ -10,7 +11,18 @@ from urllib.parse import quote
 import os
 from dotenv import load_dotenv
 import io
+import gzip
+import hashlib
+import pickle
+import shutil
 import time
+import math
+import operator
+import queue
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
 import plotly.express as px
 import plotly.graph_objects as go
 import gspread
@@ -28,6 +40,139 @@ NAVER_CLIENT_ID = get_config("NAVER_CLIENT_ID")
 NAVER_CLIENT_SECRET = get_config("NAVER_CLIENT_SECRET")
 GOOGLE_SHEET_PASSWORD = get_config("GOOGLE_SHEET_PASSWORD", "default_password")
 SPREADSHEET_ID = get_config("GOOGLE_SPREADSHEET_ID")
+NAVER_NEWS_API_URL = get_config("NAVER_NEWS_API_URL", "https://openapi.naver.com/v1/search/news.json")
+KRX_COMPANY_LIST_URL = get_config("KRX_COMPANY_LIST_URL", "https://kind.krx.co.kr/corpgeneral/corpList.do?method=download&searchType=13")
+RESULT_CACHE_MAX_MB = float(get_config("RESULT_CACHE_MAX_MB", 512))
+FIGURE_CACHE_MAX_ENTRIES = int(get_config("FIGURE_CACHE_MAX_ENTRIES", 64))
+ARCHIVE_DIR = get_config("ARCHIVE_DIR", "archive")
+ARCHIVE_AFTER_DAYS = int(get_config("ARCHIVE_AFTER_DAYS", 90))
+CHECKPOINT_DIR = get_config("CHECKPOINT_DIR", "checkpoints")
+CHECKPOINT_TTL_HOURS = float(get_config("CHECKPOINT_TTL_HOURS", 24))
+CHECKPOINT_INTRADAY_TTL_MIN = float(get_config("CHECKPOINT_INTRADAY_TTL_MIN", 10))
+TIMING_LOG_PATH = get_config("TIMING_LOG_PATH", os.path.join("logs", "pipeline_timing.jsonl"))
+ARTICLE_DUPLICATE_THRESHOLD = float(get_config("ARTICLE_DUPLICATE_THRESHOLD", 0.6))
+NEWS_PAGE_INDEX_TTL_MIN = float(get_config("NEWS_PAGE_INDEX_TTL_MIN", 30))
+NAVER_DAILY_QUOTA = int(get_config("NAVER_DAILY_QUOTA", 25000))
+HISTORY_WINDOW_DAYS = int(get_config("HISTORY_WINDOW_DAYS", 20))
+# AI 테마/한줄요약: OpenAI 호환 chat/completions 엔드포인트 (기본값은 Perplexity)
+AI_API_URL = get_config("AI_API_URL", "https://api.perplexity.ai/chat/completions")
+AI_API_KEY = get_config("AI_API_KEY", get_config("PERPLEXITY_API_KEY"))
+AI_MODEL = get_config("AI_MODEL", "sonar")
+AI_BATCH_SIZE = int(get_config("AI_BATCH_SIZE", 8))
+AI_MAX_WORKERS = int(get_config("AI_MAX_WORKERS", 4))
+AI_REQUESTS_PER_MINUTE = float(get_config("AI_REQUESTS_PER_MINUTE", 50))
+LIVE_BUFFER_SIZE = int(get_config("LIVE_BUFFER_SIZE", 30))
+WATCHLIST_SURGE_RATE = float(get_config("WATCHLIST_SURGE_RATE", 10.0))
+ALERT_LOG_PATH = get_config("ALERT_LOG_PATH", os.path.join("logs", "alerts.jsonl"))
+ALERT_WEBHOOK_URL = get_config("ALERT_WEBHOOK_URL")
+LIVE_MAX_POLLS = int(get_config("LIVE_MAX_POLLS", 0))  # 0이면 끌 때까지 계속 갱신
+
+# --- 단계별 실행 시간 측정 ---
+_timing_local = threading.local()
+
+class PipelineTimer:
+    """한 번의 스크립트 실행 동안 단계별 소요 시간과 호출 수, 재시도, 전송 바이트, 중복 기사 수를 기록합니다."""
+
+    METRIC_KEYS = ('calls', 'retries', 'bytes', 'backoff', 'duplicates')
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.spans = []
+        self._open_spans = []
+
+    @contextmanager
+    def span(self, name, **attrs):
+        record = {'name': name, 'depth': len(self._open_spans), 'duration': 0.0}
+        record.update({key: 0 for key in self.METRIC_KEYS})
+        record.update(attrs)
+        self.spans.append(record)
+        self._open_spans.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['duration'] = time.perf_counter() - start
+            self._open_spans.pop()
+
+    def add(self, **metrics):
+        """열려 있는 모든 구간(상위 구간 포함)에 지표를 누적합니다."""
+        for record in self._open_spans:
+            for key, value in metrics.items():
+                record[key] = record.get(key, 0) + value
+
+    def to_record(self, params, status):
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'status': status,
+            'params': params,
+            'total_sec': round(time.perf_counter() - self._start, 4),
+            'spans': [
+                {**span, 'duration': round(span['duration'], 4)}
+                for span in self.spans
+            ]
+        }
+
+def start_pipeline_timer():
+    """현재 스크립트 실행(스레드)에 새 타이머를 설정합니다."""
+    timer = PipelineTimer()
+    _timing_local.timer = timer
+    return timer
+
+def get_pipeline_timer():
+    return getattr(_timing_local, 'timer', None)
+
+@contextmanager
+def timed_span(name, **attrs):
+    """현재 타이머에 구간을 기록합니다. 타이머가 없으면 아무것도 하지 않습니다."""
+    timer = get_pipeline_timer()
+    if timer is None:
+        yield {}
+        return
+    with timer.span(name, **attrs) as record:
+        yield record
+
+def record_metrics(**metrics):
+    """현재 열린 구간에 호출 수, 재시도, 바이트 등의 지표를 더합니다."""
+    timer = get_pipeline_timer()
+    if timer is not None:
+        timer.add(**metrics)
+
+def write_timing_log(record, path=TIMING_LOG_PATH):
+    """실행 기록을 JSON 한 줄로 추가합니다."""
+    try:
+        log_dir = os.path.dirname(path)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    except OSError as e:
+        st.warning(f"실행 시간 기록 저장 실패: {e}")
+
+def display_timing_breakdown(record):
+    """단계별 소요 시간을 접을 수 있는 표로 표시합니다."""
+    if not record:
+        return
+    with st.expander(f"⏱ 단계별 소요 시간 (총 {record['total_sec']:.2f}초)"):
+        timing_df = pd.DataFrame([
+            {
+                '단계': '\u3000' * span['depth'] + span['name'],
+                '소요(초)': span['duration'],
+                '호출': span['calls'],
+                '재시도': span['retries'],
+                '대기(초)': span['backoff'],
+                '바이트': span['bytes'],
+                '중복 기사': span.get('duplicates', 0),
+            }
+            for span in record['spans']
+        ])
+        st.dataframe(
+            timing_df.style.format({'소요(초)': '{:,.3f}', '대기(초)': '{:,.2f}', '바이트': '{:,.0f}'}),
+            use_container_width=True, hide_index=True
+        )
+        st.caption(f"실행 시각: {record['started_at']} · 상태: {record['status']}")
+
+start_pipeline_timer()
 
 st.set_page_config(
     page_title="급등주 탐지기 Pro",
@@ -106,6 +251,31 @@ st.markdown("""
     .stTabs [data-baseweb="tab-panel"] {
         padding: 0.5rem 0;
     }
+    /* 상단 화면 선택 라디오를 탭처럼 표시 */
+    div[data-testid="element-container"]:has(#view-nav) {
+        display: none;
+    }
+    div[data-testid="element-container"]:has(#view-nav) + div [role="radiogroup"] {
+        gap: 0;
+        padding-left: 0.5rem;
+        border-bottom: 1px solid rgba(49, 51, 63, 0.2);
+    }
+    div[data-testid="element-container"]:has(#view-nav) + div [role="radiogroup"] label {
+        padding: 0.7rem 1rem;
+        margin: 0;
+        border-bottom: 2px solid transparent;
+    }
+    div[data-testid="element-container"]:has(#view-nav) + div [role="radiogroup"] label > div:first-child {
+        display: none;
+    }
+    div[data-testid="element-container"]:has(#view-nav) + div [role="radiogroup"] label p {
+        font-size: 1.25rem !important;
+        font-weight: bold !important;
+    }
+    div[data-testid="element-container"]:has(#view-nav) + div [role="radiogroup"] label:has(input:checked) {
+        border-bottom-color: #ff4b4b;
+        color: #ff4b4b;
+    }
     .stDataFrame > div {
         padding-left: 0;
         padding-right: 0;
@@ -164,8 +334,8 @@ def update_google_sheet(data_df, date_str):
         # 기존 데이터 읽기
         existing_data = worksheet.get_all_values()
 
-        # 새로운 데이터 준비
-        new_data = data_df.values.tolist()
+        # 새로운 데이터 준비 (과거 시세가 없는 종목의 NaN은 JSON으로 보낼 수 없으므로 빈 칸으로)
+        new_data = data_df.astype(object).where(data_df.notna(), '').values.tolist()
 
         if len(existing_data) <= 1:  # 헤더만 있거나 데이터가 없는 경우
             # 헤더와 새로운 데이터 추가
@@ -187,6 +357,7 @@ def load_company_info_from_krx_url(krx_url, column_names_map):
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         response = requests.get(krx_url, headers=headers, timeout=30)
+        record_metrics(calls=1, bytes=len(response.content))
         response.raise_for_status()
         
         df_company_info = None
@@ -251,9 +422,119 @@ def load_company_info_from_krx_url(krx_url, column_names_map):
         st.error(f"KRX 정보 처리 중 예상치 못한 오류 발생: {e_general}")
         return None
 
+# --- 네이버 API 일일 호출량 관리 ---
+NAVER_CALLS_PER_STOCK = 1.5  # 종목당 기사 검색 평균 호출 수 추정치 (추가 페이지, 재시도 포함)
+
+class NaverQuotaTracker:
+    """네이버 API 호출 수를 날짜별로 DB(api_quota)에 누적합니다.
+    호출마다 DB에 쓰지 않도록 메모리에 모았다가 flush_every건마다, 그리고 분석이 끝날 때 반영합니다.
+    사용량도 메모리에서 계산하고, DB는 날짜별로 처음 한 번과 refresh()를 부를 때(분석 실행마다)만 읽습니다."""
+
+    def __init__(self, daily_quota, db_path='stock_analysis.db', flush_every=20):
+        self.daily_quota = daily_quota
+        self.db_path = db_path
+        self.flush_every = flush_every
+        self._pending = {}
+        self._stored = {}  # 날짜별 DB 반영 호출 수 (마지막으로 읽은 값 + 이후 이 프로세스가 반영한 호출)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def today():
+        return datetime.now().strftime('%Y%m%d')
+
+    def add(self, count=1):
+        with self._lock:
+            day = self.today()
+            self._pending[day] = self._pending.get(day, 0) + count
+            should_flush = sum(self._pending.values()) >= self.flush_every
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            get_db_writer().submit(
+                lambda cursor, rows: cursor.executemany(
+                    "INSERT INTO api_quota (날짜, 호출수) VALUES (?, ?) "
+                    "ON CONFLICT(날짜) DO UPDATE SET 호출수 = 호출수 + excluded.호출수",
+                    rows
+                ),
+                list(pending.items())
+            ).result()
+        except sqlite3.Error:
+            # 반영하지 못한 호출 수는 다음 flush에서 다시 시도합니다.
+            with self._lock:
+                for day, count in pending.items():
+                    self._pending[day] = self._pending.get(day, 0) + count
+            return
+        with self._lock:
+            for day, count in pending.items():
+                # 아직 읽지 않은 날짜는 처음 used()에서 DB 값을 그대로 읽습니다.
+                if day in self._stored:
+                    self._stored[day] += count
+
+    def refresh(self, day=None):
+        """DB에 반영된 호출 수를 다시 읽습니다. 다른 프로세스의 호출까지 반영하려면 분석 실행마다 한 번 부릅니다."""
+        day = day or self.today()
+        try:
+            conn = sqlite3.connect(self.db_path)
+            row = conn.execute("SELECT 호출수 FROM api_quota WHERE 날짜 = ?", (day,)).fetchone()
+            conn.close()
+        except sqlite3.Error:
+            row = None
+        with self._lock:
+            self._stored[day] = row[0] if row else 0
+
+    def used(self, day=None):
+        """오늘(또는 day) 사용한 호출 수 (아직 반영하지 않은 호출 포함)"""
+        day = day or self.today()
+        with self._lock:
+            loaded = day in self._stored
+        if not loaded:
+            self.refresh(day)
+        with self._lock:
+            return self._stored.get(day, 0) + self._pending.get(day, 0)
+
+    def remaining(self):
+        return max(0, self.daily_quota - self.used())
+
+@st.cache_resource
+def get_naver_quota():
+    return NaverQuotaTracker(NAVER_DAILY_QUOTA)
+
+def naver_news_get(api_url, headers):
+    """네이버 뉴스 API GET 요청. 모든 호출을 타이밍 지표와 일일 호출량에 기록합니다."""
+    response = requests.get(api_url, headers=headers, timeout=10)
+    record_metrics(calls=1, bytes=len(response.content))
+    get_naver_quota().add()
+    return response
+
+def estimate_naver_calls(news_display_count, stock_count):
+    """분석 1회의 예상 네이버 호출 수 (특징주 검색 페이지 + 종목별 기사 검색)"""
+    return math.ceil(news_display_count / 100) + math.ceil(stock_count * NAVER_CALLS_PER_STOCK)
+
+def plan_naver_budget(remaining, news_display_count, stock_count):
+    """남은 호출량 안에서 특징주 검색수와 기사를 검색할 종목 수를 정합니다.
+    부족하면 특징주 검색 페이지를 먼저 1쪽까지 줄이고, 그래도 부족하면 하위 종목의 기사 검색을 생략합니다."""
+    pages = math.ceil(news_display_count / 100)
+    if remaining >= estimate_naver_calls(news_display_count, stock_count):
+        return {'news_display_count': news_display_count, 'article_stock_limit': stock_count, 'degraded': False}
+    stock_cost = math.ceil(stock_count * NAVER_CALLS_PER_STOCK)
+    allowed_pages = min(pages, max(1, remaining - stock_cost)) if remaining > 0 else 0
+    article_stock_limit = int(max(0, remaining - allowed_pages) / NAVER_CALLS_PER_STOCK)
+    return {
+        'news_display_count': min(news_display_count, allowed_pages * 100),
+        'article_stock_limit': min(stock_count, article_stock_limit),
+        'degraded': True
+    }
+
 # --- 기존 스크립트의 헬퍼 함수들 ---
 OUTPUT_COLUMNS_WITH_REMARKS = [
-    '날짜', '티커', '종목명', '업종', '주요제품', '시가', '고가', '저가', '종가', '등락률', '거래량', '거래대금', '시장', '비고',
+    '날짜', '티커', '종목명', '테마', 'AI_한줄요약', '기사테마', '업종', '주요제품', '시가', '고가', '저가', '종가', '등락률', '거래량', '거래대금',
+    '거래량비율', '고가대비', '시장', '비고',
     '기사제목1', '기사요약1', '기사링크1',
     '기사제목2', '기사요약2', '기사링크2',
     '기사제목3', '기사요약3', '기사링크3',
@@ -284,7 +565,7 @@ def call_naver_search_api(query, display_count, client_id, client_secret):
             if current_display_needed <= 0:
                 break
                 
-            api_url = f"https://openapi.naver.com/v1/search/news.json?query={encoded_query}&display={current_display_needed}&start={start_index}&sort=date"
+            api_url = f"{NAVER_NEWS_API_URL}?query={encoded_query}&display={current_display_needed}&start={start_index}&sort=date"
             
             headers = {
                 "X-Naver-Client-Id": client_id,
@@ -292,7 +573,7 @@ def call_naver_search_api(query, display_count, client_id, client_secret):
                 "Content-Type": "application/json"
             }
             
-            response = requests.get(api_url, headers=headers, timeout=10)
+            response = naver_news_get(api_url, headers)
             response.raise_for_status()
             
             if response.status_code == 200:
@@ -343,6 +624,7 @@ def call_naver_search_api(query, display_count, client_id, client_secret):
                 
         except requests.exceptions.RequestException as e:
             st.warning(f"API 호출 중 오류 발생: {str(e)}")
+            record_metrics(retries=1, backoff=0.5)
             time.sleep(0.5)  # 오류 발생 시 500ms로 감소
             continue
         except json.JSONDecodeError as e:
@@ -398,13 +680,14 @@ def extract_featured_stock_names_from_news(news_articles_list, target_date_str,
     return featured_stock_info
 
 # KRX 기업 정보 로드
-krx_company_list_url = "https://kind.krx.co.kr/corpgeneral/corpList.do?method=download&searchType=13"
+krx_company_list_url = KRX_COMPANY_LIST_URL
 krx_column_names_map = {
     'source_ticker_col': '종목코드',
     'source_industry_col': '업종',
     'source_products_col': '주요제품'
 }
-company_details_df_global = load_company_info_from_krx_url(krx_company_list_url, krx_column_names_map)
+with timed_span('KRX 기업목록'):
+    company_details_df_global = load_company_info_from_krx_url(krx_company_list_url, krx_column_names_map)
 if company_details_df_global is None:
     st.warning("앱 시작 시 KRX 기업 정보를 로드하지 못했습니다. '업종', '주요제품'은 비어있을 수 있습니다.")
     company_details_df_global = pd.DataFrame(columns=['티커', '업종', '주요제품'])
@@ -419,7 +702,9 @@ def get_all_market_data_with_names(date_str, company_info_df):
     for market_code, market_name in markets_to_fetch.items():
         try:
             # 기본 시장 데이터 조회
-            df_market_raw = stock.get_market_ohlcv(date_str, market=market_code)
+            with timed_span(f'OHLCV {market_name}'):
+                df_market_raw = stock.get_market_ohlcv(date_str, market=market_code)
+                record_metrics(calls=1)
             if not df_market_raw.empty and '등락률' in df_market_raw.columns:
                 df_market = df_market_raw.reset_index()
                 if '티커' not in df_market.columns and 'index' in df_market.columns:
@@ -429,12 +714,14 @@ def get_all_market_data_with_names(date_str, company_info_df):
                 df_market['티커'] = df_market['티커'].astype(str).str.zfill(6)
                 
                 # 종목명 매핑
-                name_map = {ticker: stock.get_market_ticker_name(ticker) for ticker in df_market['티커'] if stock.get_market_ticker_name(ticker)}
-                df_market['종목명'] = df_market['티커'].map(name_map)
+                with timed_span(f'종목명 매핑 {market_name}', items=len(df_market)):
+                    name_map = {ticker: stock.get_market_ticker_name(ticker) for ticker in df_market['티커'] if stock.get_market_ticker_name(ticker)}
+                    df_market['종목명'] = df_market['티커'].map(name_map)
                 
                 # 회사 정보 병합
                 if company_info_df is not None and not company_info_df.empty:
-                    df_market = pd.merge(df_market, company_info_df, on="티커", how="left")
+                    with timed_span(f'기업정보 병합 {market_name}'):
+                        df_market = pd.merge(df_market, company_info_df, on="티커", how="left")
                 
                 # 업종, 주요제품 컬럼이 없는 경우 빈 문자열로 초기화
                 for col in company_info_cols_to_add:
@@ -463,7 +750,582 @@ def get_all_market_data_with_names(date_str, company_info_df):
     if combined_df.empty:
         st.warning(f"{date_str} 날짜에 유효한 전체 시장 데이터가 없습니다.")
         return None
-    return combined_df
+    with timed_span('컬럼 타입 축소'):
+        return compact_dtypes(combined_df.reset_index(drop=True))
+
+# 타입 축소 대상 컬럼
+CATEGORY_COLUMNS = ['시장', '업종']
+INT32_CANDIDATE_COLUMNS = ['시가', '고가', '저가', '종가', '거래량', '거래대금']
+INT32_MIN, INT32_MAX = -2 ** 31, 2 ** 31 - 1
+
+def compact_dtypes(df, float32_columns=('등락률',)):
+    """메모리를 줄이기 위해 컬럼 타입을 축소합니다 (DataFrame을 직접 수정하여 반환).
+    시장/업종은 category로, 가격·거래량은 값이 모두 정수이고 int32 범위에 들면 int32로,
+    float32_columns는 float32로 바꿉니다. 티커는 앞자리 0이 유지되도록 6자리 문자열 그대로 둡니다.
+    변환 전후 메모리(바이트)는 df.attrs의 memory_before / memory_after에 기록합니다."""
+    memory_before = int(df.memory_usage(deep=True).sum())
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna('').astype('category')
+    for col in INT32_CANDIDATE_COLUMNS:
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+            values = df[col]
+            if (values.notna().all() and (values % 1 == 0).all()
+                    and values.min() >= INT32_MIN and values.max() <= INT32_MAX):
+                df[col] = values.astype('int32')
+    for col in float32_columns:
+        if col in df.columns:
+            df[col] = df[col].astype('float32')
+    df.attrs['memory_before'] = memory_before
+    df.attrs['memory_after'] = int(df.memory_usage(deep=True).sum())
+    return df
+
+# --- KRX 거래일 달력 ---
+TRADING_CALENDAR_INDEX = '1001'  # KOSPI 지수 시세가 있는 날을 거래일로 봅니다.
+
+def ensure_trading_calendar_table(cursor):
+    """날짜별 개장 여부(1: 거래일, 0: 휴장일) 캐시. 장이 끝나 확정된 어제까지의 날짜만 기록합니다."""
+    cursor.execute("CREATE TABLE IF NOT EXISTS trading_calendar (날짜 TEXT PRIMARY KEY, 개장 INTEGER NOT NULL)")
+
+def fetch_trading_days(start_str, end_str):
+    """기간 내 거래일 집합을 pykrx 지수 시세 1회 호출로 조회합니다."""
+    with timed_span('거래일 달력 조회'):
+        df = stock.get_index_ohlcv_by_date(start_str, end_str, TRADING_CALENDAR_INDEX)
+        record_metrics(calls=1)
+    if df is None or df.empty:
+        return set()
+    return {pd.Timestamp(day).strftime('%Y%m%d') for day in df.index}
+
+def _write_trading_calendar(cursor, rows):
+    cursor.executemany("INSERT OR REPLACE INTO trading_calendar (날짜, 개장) VALUES (?, ?)", rows)
+
+def load_trading_calendar(start_str, end_str):
+    """start~end 날짜별 개장 여부를 {날짜: bool}로 반환합니다 (날짜 오름차순).
+    캐시에 없는 어제까지의 날짜는 해당 연도 전체를 한 번에 조회해 저장합니다.
+    오늘 이후 날짜와 조회에 실패한 날짜는 주말만 휴장일로 봅니다."""
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
+    days = [day.strftime('%Y%m%d') for day in pd.date_range(start_str, end_str)]
+    conn = sqlite3.connect('stock_analysis.db')
+    try:
+        calendar = dict(conn.execute(
+            "SELECT 날짜, 개장 FROM trading_calendar WHERE 날짜 BETWEEN ? AND ?", (start_str, end_str)
+        ).fetchall())
+    finally:
+        conn.close()
+    missing = [day for day in days if day not in calendar and day <= yesterday]
+    if missing:
+        fetch_start = missing[0][:4] + '0101'
+        fetch_end = min(missing[-1][:4] + '1231', yesterday)
+        try:
+            trading_days = fetch_trading_days(fetch_start, fetch_end)
+        except Exception:
+            trading_days = set()
+        # 빈 응답은 조회 실패로 보고 기록하지 않습니다 (다음에 다시 조회).
+        if trading_days:
+            rows = [(day.strftime('%Y%m%d'), int(day.strftime('%Y%m%d') in trading_days))
+                    for day in pd.date_range(fetch_start, fetch_end)]
+            get_db_writer().submit(_write_trading_calendar, rows).result()
+            calendar.update(rows)
+    return {
+        day: bool(calendar[day]) if day in calendar else datetime.strptime(day, '%Y%m%d').weekday() < 5
+        for day in days
+    }
+
+def trading_days_between(start_str, end_str):
+    """start~end(양끝 포함)의 거래일 목록 (오름차순)"""
+    return [day for day, is_open in load_trading_calendar(start_str, end_str).items() if is_open]
+
+def previous_trading_day(date_str, max_lookback_days=30):
+    """date_str이 거래일이면 그대로, 휴장일이면 직전 거래일을 반환합니다."""
+    start_str = (datetime.strptime(date_str, '%Y%m%d') - timedelta(days=max_lookback_days)).strftime('%Y%m%d')
+    trading_days = trading_days_between(start_str, date_str)
+    return trading_days[-1] if trading_days else date_str
+
+# --- 과거 시세 컨텍스트 (날짜별 전체 시장 스냅샷 캐시) ---
+HISTORY_CONTEXT_COLUMNS = ['거래량비율', '고가대비']
+
+def ensure_market_snapshot_tables(cursor):
+    """날짜별 전체 시장 시세 캐시 테이블. market_snapshot_dates는 조회를 마친 날짜(휴장일은 종목수 0)를 기록합니다."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS market_snapshot (
+            날짜 TEXT,
+            티커 TEXT,
+            시가 REAL,
+            고가 REAL,
+            저가 REAL,
+            종가 REAL,
+            거래량 INTEGER,
+            거래대금 INTEGER,
+            등락률 REAL,
+            PRIMARY KEY (날짜, 티커)
+        )
+    ''')
+    cursor.execute("CREATE TABLE IF NOT EXISTS market_snapshot_dates (날짜 TEXT PRIMARY KEY, 종목수 INTEGER NOT NULL)")
+
+def fetch_market_snapshot(date_str):
+    """한 날짜의 전체 시장 시세를 pykrx 1회 호출로 조회합니다. 휴장일이면 빈 데이터프레임을 반환합니다."""
+    with timed_span(f'과거 시세 조회 {date_str}'):
+        df_raw = stock.get_market_ohlcv(date_str, market="ALL")
+        record_metrics(calls=1)
+    columns = ['티커', '시가', '고가', '저가', '종가', '거래량', '거래대금', '등락률']
+    if df_raw is None or df_raw.empty:
+        return pd.DataFrame(columns=columns)
+    df = df_raw.reset_index()
+    if '티커' not in df.columns:
+        df = df.rename(columns={df.columns[0]: '티커'})
+    df['티커'] = df['티커'].astype(str).str.zfill(6)
+    df = df[columns]
+    # 휴장일에는 거래량이 모두 0인 데이터가 올 수 있습니다.
+    if (pd.to_numeric(df['거래량'], errors='coerce').fillna(0) == 0).all():
+        return pd.DataFrame(columns=columns)
+    return df
+
+def _write_market_snapshot(cursor, date_str, rows):
+    cursor.execute("DELETE FROM market_snapshot WHERE 날짜 = ?", (date_str,))
+    cursor.executemany(
+        "INSERT INTO market_snapshot (날짜, 티커, 시가, 고가, 저가, 종가, 거래량, 거래대금, 등락률) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    cursor.execute("INSERT OR REPLACE INTO market_snapshot_dates (날짜, 종목수) VALUES (?, ?)", (date_str, len(rows)))
+
+def store_market_snapshot(date_str, df):
+    """스냅샷 저장을 DB writer에 맡기고 완료 Future를 반환합니다."""
+    rows = [(date_str, *row) for row in df.astype(object).where(df.notna(), None).itertuples(index=False)]
+    return get_db_writer().submit(_write_market_snapshot, date_str, rows)
+
+def ensure_market_history(date_str, window=HISTORY_WINDOW_DAYS, max_calendar_days=45):
+    """date_str 직전 거래일 window개의 시장 스냅샷이 캐시에 있도록 빠진 날짜만 조회해 채웁니다.
+    거래일 달력에서 휴장일로 확인된 날짜는 조회하지 않습니다. (거래일 목록, 새로 조회한 날짜 수)를 반환합니다."""
+    target = datetime.strptime(date_str, '%Y%m%d')
+    oldest = (target - timedelta(days=max_calendar_days)).strftime('%Y%m%d')
+    candidates = trading_days_between(oldest, (target - timedelta(days=1)).strftime('%Y%m%d'))
+    conn = sqlite3.connect('stock_analysis.db')
+    try:
+        known = dict(conn.execute(
+            "SELECT 날짜, 종목수 FROM market_snapshot_dates WHERE 날짜 >= ? AND 날짜 < ?", (oldest, date_str)
+        ).fetchall())
+    finally:
+        conn.close()
+    trading_dates = []
+    fetched = 0
+    pending_writes = []
+    for day_str in reversed(candidates):
+        if len(trading_dates) >= window:
+            break
+        if day_str not in known:
+            try:
+                snapshot = fetch_market_snapshot(day_str)
+            except Exception:
+                continue  # 조회 실패한 날짜는 기록하지 않고 다음 실행에서 다시 시도합니다.
+            pending_writes.append(store_market_snapshot(day_str, snapshot))
+            known[day_str] = len(snapshot)
+            fetched += 1
+        if known[day_str] > 0:
+            trading_dates.append(day_str)
+    # 바로 뒤에서 캐시를 읽으므로 저장이 끝날 때까지 기다립니다.
+    for future in pending_writes:
+        future.result()
+    return sorted(trading_dates), fetched
+
+def load_market_history(dates, tickers):
+    """캐시에서 지정한 날짜들 × 종목들의 시세를 읽습니다."""
+    if not dates or not tickers:
+        return pd.DataFrame(columns=['날짜', '티커', '고가', '종가', '거래량'])
+    conn = sqlite3.connect('stock_analysis.db')
+    try:
+        return pd.read_sql_query(
+            f"SELECT 날짜, 티커, 고가, 종가, 거래량 FROM market_snapshot "
+            f"WHERE 날짜 IN ({','.join('?' * len(dates))}) AND 티커 IN ({','.join('?' * len(tickers))})",
+            conn, params=list(dates) + list(tickers)
+        )
+    finally:
+        conn.close()
+
+def compute_history_context(history_df, current_df, window=HISTORY_WINDOW_DAYS):
+    """과거 시세를 날짜×티커로 펼쳐 롤링 윈도로 한 번에 계산합니다.
+    거래량비율: 당일 거래량 / 직전 window일 평균 거래량, 고가대비: 당일 종가의 직전 window일 최고가 대비 등락(%)"""
+    context = pd.DataFrame({'티커': current_df['티커'].astype(str).unique()})
+    if history_df.empty:
+        return context.assign(거래량비율=float('nan'), 고가대비=float('nan'))
+    volume = history_df.pivot(index='날짜', columns='티커', values='거래량').sort_index()
+    high = history_df.pivot(index='날짜', columns='티커', values='고가').sort_index()
+    average_volume = volume.rolling(window, min_periods=1).mean().iloc[-1]
+    highest = high.rolling(window, min_periods=1).max().iloc[-1]
+    current = current_df.assign(티커=current_df['티커'].astype(str)).drop_duplicates('티커').set_index('티커')
+    current = current.reindex(context['티커'])
+    volume_ratio = current['거래량'].astype('float64') / average_volume.reindex(context['티커']).replace(0, float('nan'))
+    high_gap = (current['종가'].astype('float64') / highest.reindex(context['티커']).replace(0, float('nan')) - 1) * 100
+    context['거래량비율'] = volume_ratio.round(2).to_numpy()
+    context['고가대비'] = high_gap.round(2).to_numpy()
+    return context
+
+# --- AI 테마 / 한줄요약 ---
+AI_SUMMARY_COLUMNS = ['테마', 'AI_한줄요약']
+
+class RateLimiter:
+    """여러 스레드가 공유하는 토큰 버킷 호출 제한기. 평균 호출 속도는 분당 per_minute회로 제한하되,
+    토큰이 쌓여 있으면 burst회까지는 기다리지 않고 바로 보내 동시 작업자가 함께 출발할 수 있습니다."""
+
+    def __init__(self, per_minute, burst=1):
+        self.rate = per_minute / 60.0 if per_minute > 0 else 0.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 하나를 쓰고, 토큰이 모자라면 채워질 때까지 기다린 뒤 대기한 시간(초)을 반환합니다."""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 음수가 되면 앞서 기다리는 호출 뒤에 줄을 선 것입니다.
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+@st.cache_resource
+def get_ai_rate_limiter():
+    # 호출 한도는 API 키 단위이므로 모든 세션이 하나의 제한기를 공유합니다.
+    return RateLimiter(AI_REQUESTS_PER_MINUTE, burst=AI_MAX_WORKERS)
+
+def ensure_ai_summary_cache(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ai_summary_cache (
+            날짜 TEXT,
+            종목명 TEXT,
+            테마 TEXT,
+            AI_한줄요약 TEXT,
+            모델 TEXT,
+            생성시각 TEXT,
+            PRIMARY KEY (날짜, 종목명)
+        )
+    ''')
+
+def build_ai_messages(date_str, stocks):
+    """종목 묶음 하나에 대한 chat/completions 메시지를 만듭니다."""
+    lines = []
+    for item in stocks:
+        line = f"- {item['종목명']} ({item.get('업종') or '업종 미상'}, 등락률 {item.get('등락률', 0):+.2f}%)"
+        if item.get('기사제목'):
+            line += f" 참고 기사: {item['기사제목']}"
+        lines.append(line)
+    formatted_date = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:8]}"
+    return [
+        {"role": "system", "content": "너는 한국 주식시장 애널리스트다. 설명 없이 JSON 배열만 출력한다."},
+        {"role": "user", "content": (
+            f"{formatted_date} 기준 최신 이슈를 바탕으로 아래 종목들의 테마(쉼표로 구분한 짧은 키워드)와 "
+            f"상승 이유 한줄요약(40자 이내)을 작성해줘.\n"
+            f'형식: [{{"종목명": "...", "테마": "...", "한줄요약": "..."}}]\n' + "\n".join(lines)
+        )},
+    ]
+
+def parse_ai_summaries(content, stock_names):
+    """응답 본문에서 JSON 배열을 찾아 {종목명: (테마, 한줄요약)}으로 변환합니다. 요청하지 않은 종목은 버립니다."""
+    start, end = content.find('['), content.rfind(']')
+    if start < 0 or end < start:
+        raise ValueError("응답에서 JSON 배열을 찾을 수 없습니다.")
+    wanted = set(stock_names)
+    summaries = {}
+    for item in json.loads(content[start:end + 1]):
+        name = str(item.get('종목명', '')).strip()
+        if name in wanted:
+            summaries[name] = (str(item.get('테마', '')).strip(), str(item.get('한줄요약', '')).strip())
+    return summaries
+
+def request_ai_summaries(date_str, stocks, limiter, max_retries=3):
+    """작업 스레드에서 한 묶음을 요청합니다. 스레드에는 타이머가 없으므로 지표는 반환값으로 돌려줍니다.
+    반환값: (요약 dict, 지표 dict, 오류 메시지 또는 None)"""
+    metrics = {'calls': 0, 'retries': 0, 'bytes': 0, 'backoff': 0.0}
+    headers = {"Authorization": f"Bearer {AI_API_KEY}", "Content-Type": "application/json"}
+    payload = {"model": AI_MODEL, "messages": build_ai_messages(date_str, stocks), "temperature": 0.2}
+    error = None
+    for attempt in range(max_retries):
+        metrics['backoff'] += limiter.acquire()
+        try:
+            response = requests.post(AI_API_URL, headers=headers, json=payload, timeout=60)
+            metrics['calls'] += 1
+            metrics['bytes'] += len(response.content)
+            if response.status_code == 429 or response.status_code >= 500:
+                wait = float(response.headers.get('Retry-After', 2 ** attempt))
+                metrics['retries'] += 1
+                metrics['backoff'] += wait
+                error = f"HTTP {response.status_code}"
+                time.sleep(wait)
+                continue
+            response.raise_for_status()
+            content = response.json()['choices'][0]['message']['content']
+            return parse_ai_summaries(content, [item['종목명'] for item in stocks]), metrics, None
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+            metrics['retries'] += 1
+            if attempt < max_retries - 1:
+                # 연결 오류/타임아웃도 바로 다시 보내지 않고 점점 길게 기다립니다.
+                wait = 2 ** attempt
+                metrics['backoff'] += wait
+                time.sleep(wait)
+        except (ValueError, KeyError, IndexError) as e:
+            error = str(e)
+            metrics['retries'] += 1
+    return {}, metrics, error
+
+def load_cached_ai_summaries(date_str, stock_names):
+    conn = sqlite3.connect('stock_analysis.db')
+    try:
+        rows = conn.execute(
+            f"SELECT 종목명, 테마, AI_한줄요약 FROM ai_summary_cache "
+            f"WHERE 날짜 = ? AND 종목명 IN ({','.join('?' * len(stock_names))})",
+            [date_str] + list(stock_names)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {name: (theme, summary) for name, theme, summary in rows}
+
+def store_ai_summaries(date_str, summaries, writer=None):
+    """요약 캐시 저장을 DB writer에 맡기고 완료 Future를 반환합니다 (기다리지 않아도 됩니다)."""
+    created_at = datetime.now().isoformat(timespec='seconds')
+    return (writer or get_db_writer()).submit(
+        lambda cursor, rows: cursor.executemany(
+            "INSERT OR REPLACE INTO ai_summary_cache (날짜, 종목명, 테마, AI_한줄요약, 모델, 생성시각) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        ),
+        [(date_str, name, theme, summary, AI_MODEL, created_at) for name, (theme, summary) in summaries.items()]
+    )
+
+def split_cached_ai_summaries(df, date_str):
+    """선별 종목의 테마/한줄요약을 (날짜, 종목명) 캐시에서 찾습니다.
+    반환값: ({종목명: (테마, 한줄요약)}, 캐시에 없어 새로 요청할 종목 목록)"""
+    columns = [col for col in ['종목명', '업종', '등락률', '기사제목1'] if col in df.columns]
+    stocks = df[columns].drop_duplicates('종목명').astype(object).where(lambda d: d.notna(), None).to_dict('records')
+    names = [item['종목명'] for item in stocks]
+    summaries = load_cached_ai_summaries(date_str, names) if names else {}
+    missing = [
+        {'종목명': item['종목명'], '업종': item.get('업종') or '', '등락률': float(item.get('등락률') or 0),
+         '기사제목': item.get('기사제목1') or ''}
+        for item in stocks if item['종목명'] not in summaries
+    ]
+    return summaries, missing
+
+def request_missing_ai_summaries(date_str, missing, limiter, writer, batch_size=AI_BATCH_SIZE, max_workers=AI_MAX_WORKERS):
+    """캐시에 없는 종목을 묶음 단위로 동시에 요청하고 요약 캐시에 저장합니다.
+    백그라운드 스레드에서 실행되므로 st 함수를 쓰지 않고, 지표는 반환값으로 돌려줍니다.
+    반환값: ({종목명: (테마, 한줄요약)}, 지표 dict, 오류 메시지 목록)"""
+    batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+    fetched = {}
+    totals = {'calls': 0, 'retries': 0, 'bytes': 0, 'backoff': 0.0}
+    errors = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as executor:
+        futures = [executor.submit(request_ai_summaries, date_str, batch, limiter) for batch in batches]
+        for future in as_completed(futures):
+            batch_summaries, metrics, error = future.result()
+            for key, value in metrics.items():
+                totals[key] += value
+            fetched.update(batch_summaries)
+            if error:
+                errors.append(error)
+    if fetched:
+        store_ai_summaries(date_str, fetched, writer)
+    return fetched, totals, errors
+
+@st.cache_resource
+def get_ai_executor():
+    # 분석 결과 표시를 막지 않도록 캐시에 없는 요약은 세션과 무관한 백그라운드 스레드에서 요청합니다.
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix='ai-summary')
+
+def start_ai_summaries(df, date_str):
+    """캐시된 요약은 바로 돌려주고, 캐시에 없는 종목은 백그라운드 요청으로 넘깁니다.
+    반환값: (캐시된 {종목명: (테마, 한줄요약)}, 요청 Future 또는 None)"""
+    summaries, missing = split_cached_ai_summaries(df, date_str)
+    if not missing:
+        return summaries, None
+    future = get_ai_executor().submit(
+        request_missing_ai_summaries, date_str, missing, get_ai_rate_limiter(), get_db_writer()
+    )
+    return summaries, future
+
+def fill_ai_summaries(df, summaries):
+    """AI 컬럼을 {종목명: (테마, 한줄요약)}으로 채운 복사본을 반환합니다. 없는 종목은 기존 값을 유지합니다."""
+    filled = df.copy()
+    for i, column in enumerate(AI_SUMMARY_COLUMNS):
+        values = filled['종목명'].map({name: pair[i] for name, pair in summaries.items()})
+        current = filled[column] if column in filled.columns else pd.Series('', index=filled.index)
+        filled[column] = values.where(values.notna(), current).fillna('')
+    return filled
+
+def apply_pending_ai_summaries(result_cache, key):
+    """캐시 항목의 백그라운드 AI 요약이 끝났으면 요약을 채운 새 결과로 교체하고, 현재 결과를 반환합니다.
+    교체는 캐시 잠금 안에서 한 번만 일어나므로 지표 기록과 오류 표시는 교체한 세션에서만 합니다.
+    항목이 캐시에서 제거되었으면 None을 반환합니다."""
+    outcome = {}
+
+    def fill(result):
+        future = result.get('ai_future')
+        if future is None or not future.done():
+            return None
+        try:
+            fetched, outcome['metrics'], outcome['errors'] = future.result()
+        except Exception as e:
+            fetched, outcome['exception'] = {}, e
+        return {**result, 'final_df': fill_ai_summaries(result['final_df'], fetched), 'ai_future': None}
+
+    with timed_span('AI 테마/요약 반영'):
+        result = result_cache.update(key, fill)
+        if 'metrics' in outcome:
+            record_metrics(**outcome['metrics'])
+    if outcome.get('errors'):
+        st.warning(f"AI 요약 요청 {len(outcome['errors'])}건 실패: {outcome['errors'][0]}")
+    if 'exception' in outcome:
+        st.warning(f"AI 테마/요약 생성 중 오류 발생: {str(outcome['exception'])}")
+    return result
+
+def wait_for_ai_summaries(future, poll_sec=1):
+    """결과를 모두 그린 뒤 백그라운드 AI 요약을 기다렸다가, 분석을 다시 돌리지 않는 표시 경로로 재실행해 컬럼을 채웁니다.
+    poll_sec마다 상태 문구를 갱신하므로 기다리는 동안 다른 위젯을 조작하면 바로 그 조작으로 다시 실행되고,
+    요청은 백그라운드에서 계속됩니다."""
+    status = st.empty()
+    waited = 0
+    while True:
+        status.caption(f"⏳ AI 테마/한줄요약을 생성 중입니다 ({waited}초). 완료되면 결과 표에 채워집니다.")
+        try:
+            future.result(timeout=poll_sec)
+            break
+        except FutureTimeoutError:
+            waited += poll_sec
+        except Exception:
+            break  # 오류는 apply_pending_ai_summaries에서 표시합니다.
+    status.empty()
+    st.session_state.ai_summary_rerun = True
+    st.rerun()
+
+# --- 기사 기반 테마 클러스터링 (TF-IDF + k-means, 외부 서비스 없음) ---
+ARTICLE_THEME_COLUMN = '기사테마'
+UNCLASSIFIED_THEME = '미분류'
+THEME_STOPWORDS = {
+    '특징주', '주가', '상승', '상승세', '급등', '강세', '상한가', '장중', '종목', '관련', '관련주', '거래',
+    '오늘', '속보', '마감', '코스피', '코스닥', '증시', '시장', '기대', '기대감', '전망', '소식', '발표',
+    '공시', '회사', '측은', '통해', '세부', '내용', '밝혔다', '전했다', '보이고', '있다', '했다',
+}
+# 라벨에 조사가 붙지 않도록 세 글자 이상 단어의 끝 조사를 떼어 냅니다.
+THEME_PARTICLE_PATTERN = re.compile(r'(으로|에서|에게|이|가|을|를|은|는|에|의|과|와|로|도)$')
+
+def theme_tokens(text, stock_name=''):
+    """기사 텍스트를 단어와 한글 2글자 조각('#' 접두)으로 나눕니다. 종목명과 불용어는 제외합니다.
+    조사를 떼지 못한 활용형('증설한', '증설하는')도 2글자 조각으로 서로 겹치게 됩니다."""
+    if stock_name:
+        text = text.replace(stock_name, ' ')
+    text = re.sub(r'\[[^\]]*\]|\([^)]*\)|<[^>]+>', ' ', text).lower()
+    tokens = []
+    for word in re.findall(r'[가-힣a-z0-9]+', text):
+        if len(word) > 2:
+            word = THEME_PARTICLE_PATTERN.sub('', word)
+        if len(word) < 2 or word.isdigit() or word in THEME_STOPWORDS:
+            continue
+        tokens.append(word)
+        if len(word) > 2 and re.fullmatch(r'[가-힣]+', word):
+            tokens.extend('#' + word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+def build_tfidf_matrix(token_lists, min_df=2):
+    """문서별 토큰 목록으로 L2 정규화된 TF-IDF 행렬(문서×단어)과 단어 목록을 만듭니다.
+    한 문서에만 나온 단어는 유사도에 기여하지 않으므로 min_df 미만은 버립니다."""
+    vocabulary = {}
+    rows, cols = [], []
+    for row, tokens in enumerate(token_lists):
+        for token in tokens:
+            rows.append(row)
+            cols.append(vocabulary.setdefault(token, len(vocabulary)))
+    counts = np.zeros((len(token_lists), len(vocabulary)), dtype=np.float32)
+    np.add.at(counts, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1.0)
+    document_frequency = (counts > 0).sum(axis=0)
+    keep = document_frequency >= min_df
+    counts, document_frequency = counts[:, keep], document_frequency[keep]
+    terms = np.array(list(vocabulary), dtype=object)[keep]
+    tfidf = np.log1p(counts) * (np.log((1 + len(token_lists)) / (1 + document_frequency)) + 1).astype(np.float32)
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    return np.divide(tfidf, norms, out=np.zeros_like(tfidf), where=norms > 0), terms
+
+def spherical_kmeans(matrix, k, n_init=4, max_iter=50, seed=0):
+    """정규화된 행렬을 코사인 유사도 기준 k-means(k-means++ 초기화)로 묶고 (군집 번호, 중심 행렬)을 반환합니다."""
+    rng = np.random.default_rng(seed)
+    best = None
+    for _ in range(n_init):
+        centers = [matrix[rng.integers(len(matrix))]]
+        for _ in range(1, k):
+            distance = np.clip(1 - (matrix @ np.array(centers).T).max(axis=1), 0, None) ** 2
+            if distance.sum() <= 0:
+                break
+            centers.append(matrix[rng.choice(len(matrix), p=distance / distance.sum())])
+        centers = np.array(centers)
+        labels = None
+        for _ in range(max_iter):
+            new_labels = (matrix @ centers.T).argmax(axis=1)
+            if labels is not None and np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+            for cluster in range(len(centers)):
+                members = matrix[labels == cluster]
+                if len(members):
+                    center = members.sum(axis=0)
+                    centers[cluster] = center / (np.linalg.norm(center) or 1)
+        score = (matrix @ centers.T).max(axis=1).sum()
+        if best is None or score > best[0]:
+            best = (score, labels, centers)
+    return best[1], best[2]
+
+def cluster_article_themes(df, max_clusters=12, min_similarity=0.1):
+    """기사제목/기사요약 컬럼으로 종목을 테마별로 묶어 (종목별 테마 라벨 Series, {라벨: 키워드 목록})을 반환합니다.
+    라벨은 군집 중심에서 비중이 큰 단어 두 개이며, 기사가 없거나 어느 군집과도 닮지 않은 종목은 '미분류'입니다."""
+    text_columns = [col for col in df.columns if re.fullmatch(r'기사(제목|요약)\d', col)]
+    texts = df[text_columns].astype(object).fillna('').astype(str).agg(' '.join, axis=1) if text_columns else pd.Series('', index=df.index)
+    token_lists = [theme_tokens(text, name) for text, name in zip(texts, df['종목명'].astype(str))]
+    labels = pd.Series(UNCLASSIFIED_THEME, index=df.index, dtype=object)
+    keywords = {}
+    if not token_lists:
+        return labels, keywords
+    matrix, terms = build_tfidf_matrix(token_lists)
+    has_text = np.linalg.norm(matrix, axis=1) > 0
+    documents = matrix[has_text]
+    if len(documents) < 2 or matrix.shape[1] == 0:
+        return labels, keywords
+    k = int(min(max_clusters, max(2, round(math.sqrt(len(documents) / 2))), len(np.unique(documents, axis=0))))
+    cluster_of, centers = spherical_kmeans(documents, k)
+    similarity = (documents * centers[cluster_of]).sum(axis=1)
+    word_terms = np.array([not term.startswith('#') for term in terms])
+    cluster_names = {}
+    for cluster in range(len(centers)):
+        weights = np.where(word_terms, centers[cluster], 0)
+        top_terms = [terms[i] for i in np.argsort(weights)[::-1][:5] if weights[i] > 0]
+        name = '·'.join(top_terms[:2]) or f"테마{cluster + 1}"
+        while name in keywords:
+            name += '*'
+        cluster_names[cluster] = name
+        keywords[name] = top_terms
+    document_labels = [
+        cluster_names[cluster] if score >= min_similarity else UNCLASSIFIED_THEME
+        for cluster, score in zip(cluster_of, similarity)
+    ]
+    labels[labels.index[has_text]] = document_labels
+    return labels, {name: words for name, words in keywords.items() if name in set(document_labels)}
+
+def theme_cluster_summary(df, keywords):
+    """테마별 종목 수, 평균/최고 등락률, 대표 종목(등락률 상위 3개), 주요 키워드 표"""
+    if ARTICLE_THEME_COLUMN not in df.columns or df.empty:
+        return pd.DataFrame()
+    ordered = df.sort_values('등락률', ascending=False)
+    summary = ordered.groupby(ARTICLE_THEME_COLUMN, sort=False).agg(
+        종목수=('종목명', 'size'),
+        평균등락률=('등락률', 'mean'),
+        최고등락률=('등락률', 'max'),
+        대표종목=('종목명', lambda names: ', '.join(names.head(3))),
+    ).reset_index().rename(columns={ARTICLE_THEME_COLUMN: '테마'})
+    summary['주요키워드'] = summary['테마'].map(lambda name: ', '.join(keywords.get(name, [])))
+    summary['평균등락률'] = summary['평균등락률'].astype('float64').round(2)
+    return summary.sort_values(['종목수', '평균등락률'], ascending=False).reset_index(drop=True)
 
 def is_valid_date_format(date_string):
     if not re.match(r"^\d{8}$", date_string): return False
@@ -480,53 +1342,237 @@ def initialize_article_columns(stock_info, start_idx=1, end_idx=5):
         stock_info[f'기사링크{i}'] = ''
     return stock_info
 
-def search_stock_articles_by_date(stock_name, client_id, client_secret, target_date_str, max_count=5, max_retries=3, delay=0.3, match_date=False):
-    """종목명으로 네이버 뉴스 검색하여 기사 최대 max_count개 반환"""
+def article_shingles(article, size=3):
+    """기사 제목+요약을 정규화한 뒤 글자 size-gram의 해시 집합(shingle)을 만듭니다.
+    [특징주] 같은 말머리와 (OO일보) 같은 괄호 표기, 공백/기호는 비교에서 제외합니다."""
+    text = f"{article.get('title', '')} {article.get('description', '')}"
+    text = re.sub(r'\[[^\]]*\]|\([^)]*\)', ' ', text)
+    text = re.sub(r'[^0-9a-z가-힣]', '', text.lower())
+    if len(text) <= size:
+        return {hash(text)}
+    return {hash(text[i:i + size]) for i in range(len(text) - size + 1)}
+
+def shingle_similarity(a, b):
+    """두 shingle 집합의 Jaccard 유사도"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class ArticleDeduplicator:
+    """여러 매체가 전재한 같은 기사를 걸러냅니다.
+    링크가 같거나 shingle 유사도가 threshold 이상이면 이미 고른 기사와 같은 기사로 봅니다."""
+
+    def __init__(self, threshold=None):
+        self.threshold = ARTICLE_DUPLICATE_THRESHOLD if threshold is None else threshold
+        self.kept = []
+        self.dropped = 0
+
+    def remember(self, article):
+        """비교 대상에만 추가합니다 (이미 다른 곳에 채운 기사 등)."""
+        self.kept.append((article.get('link'), article_shingles(article)))
+
+    def add(self, article):
+        """새 기사면 기억하고 True, 중복이면 dropped를 늘리고 False를 반환합니다."""
+        link = article.get('link')
+        shingles = article_shingles(article)
+        for kept_link, kept_shingles in self.kept:
+            if (link and link == kept_link) or shingle_similarity(shingles, kept_shingles) >= self.threshold:
+                self.dropped += 1
+                return False
+        self.kept.append((link, shingles))
+        return True
+
+NEWS_PAGE_SIZE = 100
+NEWS_MAX_START = 1000  # 네이버 뉴스 검색 API의 start 최댓값
+NEWS_MAX_PAGE = (NEWS_MAX_START - 1) // NEWS_PAGE_SIZE
+
+def news_pub_date(item):
+    """기사 pubDate(RFC 822)를 'YYYYMMDD'로 변환합니다. 형식이 다르면 None."""
+    try:
+        return datetime.strptime(item['pubDate'], '%a, %d %b %Y %H:%M:%S %z').strftime('%Y%m%d')
+    except Exception:
+        return None
+
+class NewsPageIndex:
+    """종목명별 최신순 검색 결과 페이지(100건 단위)의 날짜 경계 (최신 기사 날짜, 가장 오래된 기사 날짜)
+    새 기사가 올라오면 경계가 뒤로 밀리므로 ttl_min 동안만 첫 탐색 위치를 고르는 데 쓰고,
+    실제 날짜는 항상 조회한 페이지로 다시 확인합니다."""
+
+    def __init__(self, ttl_min):
+        self.ttl_sec = ttl_min * 60
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _pages(self, stock_name):
+        entry = self._entries.get(stock_name)
+        if entry is None or time.time() - entry['created'] > self.ttl_sec:
+            return None
+        return entry['pages']
+
+    def record(self, stock_name, page, newest, oldest):
+        with self._lock:
+            pages = self._pages(stock_name)
+            if pages is None:
+                pages = {}
+                self._entries[stock_name] = {'created': time.time(), 'pages': pages}
+            pages[page] = (newest, oldest)
+
+    def guess(self, stock_name, target_date_str):
+        """target_date_str 기사가 시작될 것으로 보이는 페이지 (기록이 없으면 0)"""
+        with self._lock:
+            pages = dict(self._pages(stock_name) or {})
+        reached = [page for page, (_, oldest) in pages.items() if oldest and oldest <= target_date_str]
+        if reached:
+            return min(reached)
+        newer = [page for page, (_, oldest) in pages.items() if oldest]
+        return min(max(newer) + 1, NEWS_MAX_PAGE) if newer else 0
+
+@st.cache_resource
+def get_news_page_index():
+    return NewsPageIndex(NEWS_PAGE_INDEX_TTL_MIN)
+
+def fetch_news_page(encoded_query, page, headers, delay, max_retries):
+    """최신순 검색 결과 한 페이지를 재시도하며 조회합니다. (응답 JSON 또는 None, 조정된 대기 시간) 반환"""
     for attempt in range(max_retries):
         try:
             time.sleep(delay)
-            encoded_query = quote(stock_name)
-            api_url = f"https://openapi.naver.com/v1/search/news.json?query={encoded_query}&display=100&start=1&sort=date"
-            headers = {"X-Naver-Client-Id": client_id, "X-Naver-Client-Secret": client_secret}
-            response = requests.get(api_url, headers=headers, timeout=10)
+            api_url = f"{NAVER_NEWS_API_URL}?query={encoded_query}&display={NEWS_PAGE_SIZE}&start={1 + page * NEWS_PAGE_SIZE}&sort=date"
+            response = naver_news_get(api_url, headers)
             if response.status_code == 429:
+                record_metrics(retries=1, backoff=delay * 1.5)
                 time.sleep(delay * 1.5)  # 429 오류 시 대기 시간 증가율 감소
                 delay *= 1.5
                 continue
             response.raise_for_status()
-            news_data = response.json()
-            result = []
-            if 'items' in news_data and news_data['items']:
-                if match_date:
-                    for item in news_data['items']:
-                        try:
-                            pub_dt_object = datetime.strptime(item['pubDate'], '%a, %d %b %Y %H:%M:%S %z')
-                            pub_date_str = pub_dt_object.strftime('%Y%m%d')
-                            if pub_date_str == target_date_str:
-                                result.append({
-                                    'title': re.sub(r'<[^>]+>', '', item['title']).strip(),
-                                    'description': re.sub(r'<[^>]+>', '', item['description']).strip(),
-                                    'link': item['link']
-                                })
-                                if len(result) >= max_count:
-                                    break
-                        except Exception:
-                            continue
-                else:
-                    for item in news_data['items'][:max_count]:
-                        result.append({
-                            'title': re.sub(r'<[^>]+>', '', item['title']).strip(),
-                            'description': re.sub(r'<[^>]+>', '', item['description']).strip(),
-                            'link': item['link']
-                        })
-            return result  # 결과가 없으면 빈 리스트 반환
+            return response.json(), delay
         except requests.exceptions.RequestException:
             if attempt < max_retries - 1:
+                record_metrics(retries=1, backoff=delay * (attempt + 0.5))
                 time.sleep(delay * (attempt + 0.5))  # 재시도 시 대기 시간 증가율 감소
             continue
         except Exception:
-            return []  # 에러 발생시 빈 리스트 반환
-    return []  # 최대 재시도 횟수 초과시 빈 리스트 반환
+            break
+    return None, delay
+
+def find_date_start_page(load_page, target_date_str, guess, last_page):
+    """최신순 페이지 중 target_date_str 이하 기사가 처음 나오는 페이지를 찾습니다.
+    추정 위치(guess)에서 간격을 두 배씩 늘려 가며(갤로핑) 경계를 감싼 뒤 이진 탐색으로 좁힙니다.
+    조회 가능한 범위(start ≤ 1000) 안에 대상 날짜까지 닿는 페이지가 없으면 None."""
+    def reaches(page):
+        items, dates = load_page(page)
+        return not items or not dates or min(dates) <= target_date_str
+
+    def starts_here(page):
+        # 이 페이지에 대상 날짜보다 최신 기사가 있으면 앞 페이지는 모두 대상 날짜보다 최신입니다.
+        items, dates = load_page(page)
+        return page == 0 or bool(dates and max(dates) > target_date_str)
+
+    lo, hi = 0, last_page() + 1  # 답은 [lo, hi] 범위, hi가 last_page() + 1이면 아직 닿지 못함
+    page = min(guess, hi - 1)
+    step = 1
+    if reaches(page):
+        hi = page
+        while lo < hi:  # 추정 위치에서 앞쪽으로 갤로핑
+            if starts_here(hi):
+                lo = hi
+                break
+            probe = max(lo, hi - step)
+            if not reaches(probe):
+                lo = probe + 1
+                break
+            hi = probe
+            step *= 2
+    else:
+        lo = page + 1
+        while lo <= last_page():  # 추정 위치에서 뒤쪽으로 갤로핑
+            probe = min(last_page(), lo - 1 + step)
+            if reaches(probe):
+                hi = probe
+                if starts_here(probe):
+                    lo = probe
+                break
+            lo = probe + 1
+            step *= 2
+        hi = min(hi, last_page() + 1)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if reaches(mid):
+            hi = mid
+            if starts_here(mid):
+                break
+        else:
+            lo = mid + 1
+    if hi > last_page() or not load_page(hi)[0]:
+        return None
+    return hi
+
+def search_stock_articles_by_date(stock_name, client_id, client_secret, target_date_str, max_count=5, max_retries=3, delay=0.3, match_date=False, exclude=None, max_pages=3):
+    """종목명으로 네이버 뉴스 검색하여 서로 다른 기사 최대 max_count개 반환
+    유사 기사(exclude로 넘긴 기사와 비슷한 기사 포함)는 건너뛰고, 서로 다른 기사가 max_count개 모일 때까지
+    다음 페이지를 최대 max_pages쪽까지 검색합니다. 건너뛴 중복 기사 수는 타이밍 지표(duplicates)로 남깁니다.
+    match_date이면 pubDate로 대상 날짜가 시작되는 페이지를 먼저 찾아(find_date_start_page) 거기서부터 읽고,
+    찾은 페이지 경계는 종목별로 기억해 다음 과거 날짜 검색의 시작 위치로 씁니다."""
+    deduplicator = ArticleDeduplicator()
+    for article in exclude or []:
+        deduplicator.remember(article)
+    encoded_query = quote(stock_name)
+    headers = {"X-Naver-Client-Id": client_id, "X-Naver-Client-Secret": client_secret}
+    page_index = get_news_page_index()
+    pages = {}
+    last_page = NEWS_MAX_PAGE
+
+    def load_page(page):
+        nonlocal delay, last_page
+        if page not in pages:
+            news_data, delay = fetch_news_page(encoded_query, page, headers, delay, max_retries)
+            items = (news_data or {}).get('items') or []
+            dates = [date for date in map(news_pub_date, items) if date]
+            pages[page] = (items, dates)
+            total = (news_data or {}).get('total')
+            if isinstance(total, int):
+                last_page = min(last_page, max(0, (total - 1) // NEWS_PAGE_SIZE))
+            if match_date and dates:
+                page_index.record(stock_name, page, max(dates), min(dates))
+        return pages[page]
+
+    first_page = 0
+    if match_date:
+        first_page = find_date_start_page(
+            load_page, target_date_str, page_index.guess(stock_name, target_date_str), lambda: last_page)
+        if first_page is None:
+            record_metrics(duplicates=deduplicator.dropped)
+            return []
+    result = []
+    for page in range(first_page, first_page + max_pages):
+        if page > last_page:
+            break
+        items, _ = load_page(page)
+        reached_older_articles = False
+        for item in items:
+            if match_date:
+                pub_date_str = news_pub_date(item)
+                if pub_date_str is None:
+                    continue
+                if pub_date_str < target_date_str:
+                    # 최신순 정렬이므로 이후 기사는 모두 대상 날짜 이전입니다.
+                    reached_older_articles = True
+                    break
+                if pub_date_str != target_date_str:
+                    continue
+            article = {
+                'title': re.sub(r'<[^>]+>', '', item['title']).strip(),
+                'description': re.sub(r'<[^>]+>', '', item['description']).strip(),
+                'link': item['link']
+            }
+            if not deduplicator.add(article):
+                continue
+            result.append(article)
+            if len(result) >= max_count:
+                break
+        if len(result) >= max_count or reached_older_articles or len(items) < NEWS_PAGE_SIZE:
+            break
+    record_metrics(duplicates=deduplicator.dropped)
+    return result  # 결과가 없으면 빈 리스트 반환
 
 @st.cache_data
 def get_excel_data(df, date_str):
@@ -556,6 +1602,271 @@ def format_percentage(x):
     except:
         return str(x)
 
+def number_formatters(df, numeric_columns):
+    """Styler.format용 컬럼별 포맷 함수 (숫자는 천단위 쉼표, 등락률은 %)."""
+    formatters = {col: format_number for col in numeric_columns if col in df.columns}
+    if '등락률' in df.columns:
+        formatters['등락률'] = format_percentage
+    if '고가대비' in df.columns:
+        formatters['고가대비'] = format_percentage
+    if '거래량비율' in df.columns:
+        formatters['거래량비율'] = lambda x: "" if pd.isna(x) else f"{x:,.2f}배"
+    return formatters
+
+# --- 스크리닝 ---
+SCREEN_OPERATORS = {'>=': operator.ge, '>': operator.gt, '<=': operator.le, '<': operator.lt, '==': operator.eq}
+
+# 선언형 스크리닝 조건. rules는 (컬럼, 연산자, 값)이며 값이 문자열이면 다른 컬럼과 비교합니다.
+# 'top' 연산자는 해당 컬럼 상위 N개를 뜻합니다. 필요한 컬럼이 스냅샷에 없으면 일치하는 종목이 없습니다.
+SCREEN_DEFINITIONS = {
+    '급등+거래대금': {
+        'label': '급등대금',
+        'rules': [('등락률', '>=', 15.0), ('거래대금', '>=', 10_000_000_000)],
+    },
+    '상한가': {
+        'label': '상한가',
+        'rules': [('등락률', '>=', 29.5)],
+    },
+    '52주 신고가': {
+        'label': '52주신고가',
+        'rules': [('고가', '>=', '52주고가')],
+        'help': '과거 시세(52주고가)가 있는 경우에만 평가됩니다.',
+    },
+}
+FEATURED_LABEL = '특징주'
+
+def top_n_screen(top_n_count):
+    """기존 등락률 상위 N개 선별을 스크리닝 형태로 표현합니다."""
+    return ('Top N', f"top{top_n_count}", (('등락률', 'top', int(top_n_count)),))
+
+def screen_threshold_key(name, column):
+    return f"screen_{name}_{column}"
+
+def build_screens(selected_names, thresholds=None):
+    """선택한 스크리닝에 사용자가 바꾼 기준값을 적용해 (이름, 라벨, 규칙) 튜플로 만듭니다.
+    해시 가능한 형태이므로 캐시 키로 그대로 사용할 수 있습니다."""
+    thresholds = thresholds or {}
+    screens = []
+    for name in selected_names:
+        definition = SCREEN_DEFINITIONS[name]
+        rules = tuple(
+            (column, op, value if isinstance(value, str) else thresholds.get((name, column), value))
+            for column, op, value in definition['rules']
+        )
+        screens.append((name, definition['label'], rules))
+    return tuple(screens)
+
+def evaluate_screen_masks(df, screens):
+    """전체 종목 스냅샷에 스크리닝들을 벡터화된 불리언 마스크로 한 번에 평가합니다.
+    스크리닝 이름별 bool 컬럼을 가진 데이터프레임(인덱스는 df와 동일)을 반환합니다."""
+    masks = {}
+    for name, _, rules in screens:
+        mask = pd.Series(True, index=df.index)
+        for column, op, value in rules:
+            if column not in df.columns or (isinstance(value, str) and value not in df.columns):
+                mask = pd.Series(False, index=df.index)
+                break
+            if op == 'top':
+                mask &= df.index.isin(df[column].sort_values(ascending=False).head(value).index)
+            else:
+                mask &= SCREEN_OPERATORS[op](df[column], df[value] if isinstance(value, str) else value)
+        masks[name] = mask.fillna(False).astype(bool)
+    return pd.DataFrame(masks, index=df.index)
+
+def snapshot_key(df, date_str):
+    """스냅샷을 식별하는 가벼운 키 (날짜, 종목 수, 거래대금 합계)"""
+    return (date_str, len(df), float(df['거래대금'].sum()) if '거래대금' in df.columns else 0.0)
+
+@st.cache_data(max_entries=64)
+def get_screen_masks(snapshot_id, _df, screens):
+    """스냅샷별 스크리닝 결과 캐시. _df는 해시하지 않고 snapshot_id로 식별합니다."""
+    return evaluate_screen_masks(_df, screens)
+
+def screen_remarks(masks, screens, featured=None):
+    """일치한 스크리닝 라벨을 '+'로 이어 비고를 만듭니다. 특징주는 항상 마지막에 붙입니다."""
+    remarks = pd.Series('', index=masks.index, dtype=object)
+    for name, label, _ in screens:
+        remarks = remarks.where(~masks[name], remarks + '+' + label)
+    if featured is not None:
+        remarks = remarks.where(~featured, remarks + '+' + FEATURED_LABEL)
+    return remarks.str.lstrip('+')
+
+def remark_has(remarks, label):
+    """비고('+'로 이어진 라벨)에 label이 토큰으로 들어 있는지 여부"""
+    return ('+' + remarks.astype(str) + '+').str.contains(f"+{label}+", regex=False)
+
+# --- 관심종목 알림 ---
+# 관심종목에만 스크리닝 규칙을 평가합니다. 규칙 형식은 build_screens 결과와 같습니다 (이름, 라벨, 조건들).
+WATCHLIST_SCREENS = (
+    ('급등', '급등', (('등락률', '>=', WATCHLIST_SURGE_RATE),)),
+)
+WATCHLIST_TICKER_PATTERN = re.compile(r'^[0-9A-Z]{6}$')
+
+def ensure_watchlist_tables(cursor):
+    """관심종목과 발송한 알림 (날짜, 티커, 규칙마다 한 번만 알리기 위한 기록)"""
+    cursor.execute("CREATE TABLE IF NOT EXISTS watchlist (티커 TEXT PRIMARY KEY, 등록시각 TEXT)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS watchlist_alerts (
+            날짜 TEXT,
+            티커 TEXT,
+            규칙 TEXT,
+            종목명 TEXT,
+            등락률 REAL,
+            내용 TEXT,
+            링크 TEXT,
+            발생시각 TEXT,
+            PRIMARY KEY (날짜, 티커, 규칙)
+        )
+    ''')
+
+def get_watchlist():
+    conn = sqlite3.connect('stock_analysis.db')
+    try:
+        return [row[0] for row in conn.execute("SELECT 티커 FROM watchlist ORDER BY 티커")]
+    finally:
+        conn.close()
+
+def parse_watchlist_input(text):
+    """쉼표/공백/줄바꿈으로 구분한 티커 입력을 (올바른 티커 목록, 잘못된 입력 목록)으로 나눕니다."""
+    tickers, invalid = [], []
+    for token in re.split(r'[\s,]+', text.upper()):
+        if not token:
+            continue
+        ticker = token.zfill(6) if token.isdigit() else token
+        if WATCHLIST_TICKER_PATTERN.match(ticker):
+            if ticker not in tickers:
+                tickers.append(ticker)
+        else:
+            invalid.append(token)
+    return tickers, invalid
+
+def _replace_watchlist(cursor, tickers):
+    existing = {row[0] for row in cursor.execute("SELECT 티커 FROM watchlist")}
+    cursor.executemany("DELETE FROM watchlist WHERE 티커 = ?", [(ticker,) for ticker in existing - set(tickers)])
+    registered_at = datetime.now().isoformat(timespec='seconds')
+    cursor.executemany(
+        "INSERT OR IGNORE INTO watchlist (티커, 등록시각) VALUES (?, ?)", [(ticker, registered_at) for ticker in tickers]
+    )
+
+WATCHLIST_ALERT_COLUMNS = ['날짜', '티커', '종목명', '규칙', '등락률', '내용', '링크', '발생시각']
+
+def build_ticker_index(market_df):
+    """스냅샷을 만들 때 한 번 티커 인덱스로 바꿔 둡니다. 관심종목 평가는 여기서 관심종목 수만큼만 조회합니다."""
+    if market_df is None or market_df.empty:
+        return None
+    return market_df.drop_duplicates('티커').set_index('티커')
+
+def evaluate_watchlist(date_str, ticker_index, featured_stock_info, watchlist):
+    """관심종목에 규칙(WATCHLIST_SCREENS, 특징주 기사)을 평가해 알림 목록을 반환합니다.
+    전체 스냅샷을 다시 훑지 않고 티커 인덱스(build_ticker_index)에서 관심종목 행만 꺼내 평가합니다."""
+    if not watchlist or ticker_index is None:
+        return []
+    watched = ticker_index.reindex(watchlist).dropna(subset=['종목명'])
+    masks = evaluate_screen_masks(watched, WATCHLIST_SCREENS)
+    masks[FEATURED_LABEL] = watched['종목명'].isin(list(featured_stock_info))
+    hits = masks.stack()
+    hits = hits[hits.astype(bool)]
+    if hits.empty:
+        return []
+    alerts = hits.index.to_frame(index=False, name=['티커', '규칙']).join(watched[['종목명', '등락률']], on='티커')
+    alerts['등락률'] = alerts['등락률'].astype('float64').round(2)
+    articles = {name: featured_stock_info[name][0] for name in watched['종목명'] if name in featured_stock_info}
+    is_featured = alerts['규칙'] == FEATURED_LABEL
+    alerts['내용'] = alerts['종목명'].map({name: article['title'] for name, article in articles.items()}).where(
+        is_featured, '등락률 ' + alerts['등락률'].map('{:.2f}%'.format)
+    )
+    alerts['링크'] = alerts['종목명'].map({name: article['link'] for name, article in articles.items()}).where(is_featured, '')
+    alerts['날짜'] = date_str
+    alerts['발생시각'] = datetime.now().isoformat(timespec='seconds')
+    return alerts[WATCHLIST_ALERT_COLUMNS].to_dict('records')
+
+def _record_new_alerts(cursor, alerts):
+    """아직 보내지 않은 알림만 기록하고 반환합니다."""
+    new_alerts = []
+    for alert in alerts:
+        cursor.execute(
+            "INSERT OR IGNORE INTO watchlist_alerts (날짜, 티커, 규칙, 종목명, 등락률, 내용, 링크, 발생시각) "
+            "VALUES (:날짜, :티커, :규칙, :종목명, :등락률, :내용, :링크, :발생시각)",
+            alert
+        )
+        if cursor.rowcount:
+            new_alerts.append(alert)
+    return new_alerts
+
+def emit_alerts(alerts, path=ALERT_LOG_PATH):
+    """알림을 로그 파일에 JSON 한 줄씩 남기고, ALERT_WEBHOOK_URL이 있으면 한 번에 POST합니다."""
+    try:
+        log_dir = os.path.dirname(path)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for alert in alerts:
+                f.write(json.dumps(alert, ensure_ascii=False) + '\n')
+    except OSError as e:
+        st.warning(f"알림 기록 저장 실패: {e}")
+    if ALERT_WEBHOOK_URL:
+        try:
+            requests.post(ALERT_WEBHOOK_URL, json={'alerts': alerts}, timeout=5).raise_for_status()
+        except requests.exceptions.RequestException as e:
+            st.warning(f"알림 웹훅 전송 실패: {e}")
+
+def check_watchlist(date_str, ticker_index, featured_stock_info):
+    """새 스냅샷/특징주 추출마다 관심종목을 평가하고, 처음 발생한 알림만 기록/전송해 화면에 표시합니다.
+    ticker_index는 스냅샷을 만들 때 build_ticker_index로 한 번 만든 티커 인덱스입니다."""
+    watchlist = get_watchlist()
+    if not watchlist:
+        return []
+    with timed_span('관심종목 알림', items=len(watchlist)):
+        alerts = evaluate_watchlist(date_str, ticker_index, featured_stock_info, watchlist)
+        new_alerts = get_db_writer().submit(_record_new_alerts, alerts).result() if alerts else []
+        if new_alerts:
+            emit_alerts(new_alerts)
+    if new_alerts:
+        st.warning(
+            f"관심종목 알림 {len(new_alerts)}건: "
+            + ", ".join(f"{alert['종목명']}({alert['규칙']})" for alert in new_alerts[:10])
+            + (" 외" if len(new_alerts) > 10 else "")
+        )
+    return new_alerts
+
+def get_recent_alerts(limit=50):
+    conn = sqlite3.connect('stock_analysis.db')
+    try:
+        return pd.read_sql_query(
+            "SELECT 날짜, 발생시각, 티커, 종목명, 규칙, 등락률, 내용, 링크 FROM watchlist_alerts "
+            "ORDER BY 발생시각 DESC, 날짜 DESC LIMIT ?",
+            conn, params=(limit,)
+        )
+    finally:
+        conn.close()
+
+def display_watchlist_settings():
+    """관심종목 편집과 최근 알림"""
+    with st.expander("관심종목 알림"):
+        watchlist = get_watchlist()
+        watchlist_text = st.text_area(
+            "관심종목 티커 (쉼표, 공백, 줄바꿈으로 구분)", value="\n".join(watchlist), height=120
+        )
+        if st.button("관심종목 저장", key="watchlist_save"):
+            tickers, invalid = parse_watchlist_input(watchlist_text)
+            get_db_writer().submit(_replace_watchlist, tickers).result()
+            st.success(f"관심종목 {len(tickers)}개를 저장했습니다.")
+            if invalid:
+                st.warning(f"티커 형식이 아니어서 제외했습니다: {', '.join(invalid[:10])}")
+            watchlist = tickers
+        st.caption(
+            f"관심종목 {len(watchlist)}개 · 분석 실행/실시간 모니터링의 새 스냅샷마다 등락률 {WATCHLIST_SURGE_RATE:g}% 이상 급등과 "
+            f"특징주 기사를 확인해 날짜별 한 번만 알립니다. (기록: {ALERT_LOG_PATH}"
+            + (", 웹훅 전송" if ALERT_WEBHOOK_URL else "") + ")"
+        )
+        recent_alerts = get_recent_alerts()
+        if not recent_alerts.empty:
+            st.dataframe(
+                recent_alerts.style.format({'등락률': format_percentage}),
+                use_container_width=True, hide_index=True,
+                column_config={"링크": st.column_config.LinkColumn("링크")}
+            )
+
 def color_negative_red(val):
     """숫자 값에 따라 색상을 반환합니다."""
     try:
@@ -566,7 +1877,7 @@ def color_negative_red(val):
     except:
         return None
 
-def display_analysis_results(final_df_sorted, date_str, all_market_data_df, top_n_count):
+def display_analysis_results(final_df_sorted, date_str, all_market_data_df, top_n_count, theme_summary=None):
     # 결과 표시
     st.success(f"분석이 완료되었습니다. (총 {len(final_df_sorted):,}개 종목)")
 
@@ -589,26 +1900,29 @@ def display_analysis_results(final_df_sorted, date_str, all_market_data_df, top_
             high_volume_count = len(final_df_sorted[final_df_sorted['거래대금'] >= 10000000000])
             st.metric("거래대금 100억 이상", f"{high_volume_count:,}")
         
+        remarks = final_df_sorted['비고']
+        is_top_n = remark_has(remarks, f"top{top_n_count}")
+        is_featured = remark_has(remarks, FEATURED_LABEL)
         with col2:
-            top_featured_count = len(final_df_sorted[final_df_sorted['비고'] == f"top{top_n_count}+특징주"])
+            top_featured_count = int((is_top_n & is_featured).sum())
             st.metric("Top N + 특징주", f"{top_featured_count:,}")
         
         with col3:
-            featured_count = len(final_df_sorted[final_df_sorted['비고'] == "특징주"])
+            featured_count = int((is_featured & ~is_top_n).sum())
             st.metric("특징주", f"{featured_count:,}")
         
         with col4:
             total_count = len(final_df_sorted)
             st.metric("전체 분석 종목", f"{total_count:,}")
+        screen_counts = [
+            f"{name} {int(remark_has(remarks, definition['label']).sum()):,}"
+            for name, definition in SCREEN_DEFINITIONS.items()
+            if remark_has(remarks, definition['label']).any()
+        ]
+        if screen_counts:
+            st.caption("추가 스크리닝: " + " · ".join(screen_counts))
         
-        # 상세 결과 테이블
-        display_df = final_df_sorted.copy()
-        numeric_columns = ['시가', '고가', '저가', '종가', '거래량', '거래대금']
-        for col in numeric_columns:
-            if col in display_df.columns:
-                display_df[col] = display_df[col].apply(format_number)
-        display_df['등락률'] = display_df['등락률'].apply(format_percentage)
-        
+        # 상세 결과 테이블 (원본을 복사하지 않고 표시 형식만 지정)
         # 거래대금 100억 이상 강조를 위한 스타일 함수
         def highlight_high_amount(val):
             try:
@@ -617,9 +1931,27 @@ def display_analysis_results(final_df_sorted, date_str, all_market_data_df, top_
             except:
                 return None
         
-        styled_df = display_df.style.map(color_negative_red, subset=['등락률']).map(highlight_high_amount, subset=['거래대금'])
+        numeric_columns = ['시가', '고가', '저가', '종가', '거래량', '거래대금']
+        styled_df = (
+            final_df_sorted.style
+            .format(number_formatters(final_df_sorted, numeric_columns))
+            .map(color_negative_red, subset=['등락률'])
+            .map(highlight_high_amount, subset=['거래대금'])
+        )
         st.dataframe(styled_df, use_container_width=True)
 
+        with st.expander("기사 기반 테마 클러스터"):
+            # 분석 실행 때 만든 요약을 쓰고, 없으면 결과의 기사테마 라벨로 다시 묶습니다 (키워드 제외).
+            if theme_summary is None:
+                theme_summary = theme_cluster_summary(final_df_sorted, {})
+            if theme_summary.empty:
+                st.info("테마를 묶을 기사가 없습니다.")
+            else:
+                st.dataframe(
+                    theme_summary.style.format({'평균등락률': format_percentage, '최고등락률': format_percentage}),
+                    use_container_width=True, hide_index=True
+                )
+
         # 하단에만 다운로드/저장 버튼
         st.subheader("급등주+특징주 데이터 내보내기")
         excel_data = get_excel_data(final_df_sorted, date_str)
@@ -691,31 +2023,52 @@ def display_analysis_results(final_df_sorted, date_str, all_market_data_df, top_
 
     with tab2:
         st.subheader(f"전체 종목 (총 {len(all_market_data_df):,}개 종목)")
+        if 'memory_after' in all_market_data_df.attrs:
+            st.caption(
+                f"메모리 사용량: {all_market_data_df.attrs['memory_after'] / 1024 / 1024:,.2f} MB "
+                f"(타입 축소 전 {all_market_data_df.attrs['memory_before'] / 1024 / 1024:,.2f} MB)"
+            )
 
         # 전체 시장 데이터 표시 (가장 위로)
-        market_display_df = all_market_data_df.copy()
-        numeric_columns = ['시가', '고가', '저가', '종가', '등락률', '거래량', '거래대금']
-        for col in numeric_columns:
-            if col in market_display_df.columns:
-                market_display_df[col] = market_display_df[col].apply(format_number)
-        market_display_df['등락률'] = market_display_df['등락률'].apply(format_percentage)
-        styled_market_df = market_display_df.style.map(color_negative_red, subset=['등락률'])
+        numeric_columns = ['시가', '고가', '저가', '종가', '거래량', '거래대금']
+        styled_market_df = (
+            all_market_data_df.style
+            .format(number_formatters(all_market_data_df, numeric_columns))
+            .map(color_negative_red, subset=['등락률'])
+        )
         st.dataframe(styled_market_df, use_container_width=True, height=400)
+
+        # 전체 종목 스크리닝 (스냅샷별로 캐시되어 조건을 바꿔도 다시 조회하지 않음)
+        screen_names = st.multiselect(
+            "스크리닝 조건 (기본 기준값)", list(SCREEN_DEFINITIONS), key=f"market_screens_{date_str}"
+        )
+        if screen_names:
+            screens = build_screens(screen_names)
+            market_masks = get_screen_masks(snapshot_key(all_market_data_df, date_str), all_market_data_df, screens)
+            matched = market_masks.all(axis=1)
+            screened_market_df = all_market_data_df[matched].sort_values(by='등락률', ascending=False)
+            st.caption(f"{' & '.join(screen_names)}: {len(screened_market_df):,}개 종목")
+            st.dataframe(
+                screened_market_df.style
+                .format(number_formatters(screened_market_df, numeric_columns))
+                .map(color_negative_red, subset=['등락률']),
+                use_container_width=True, hide_index=True
+            )
         st.markdown('<div style="height: 24px;"></div>', unsafe_allow_html=True)
 
         # 등락률 Top30, 거래대금 Top30 데이터
         top30_rate = all_market_data_df.nlargest(30, '등락률')
         top30_amount = all_market_data_df.nlargest(30, '거래대금')
+        market_chart_key = snapshot_key(all_market_data_df, date_str)
 
         # 4개 컬럼으로 한 줄에 배치
         col1, col2, col3, col4 = st.columns(4)
 
         with col1:
             st.markdown("<div style='text-align:center; font-weight:bold; font-size:1.1em;'>등락률 Top30</div>", unsafe_allow_html=True)
-            top30_rate_table = top30_rate[['종목명', '등락률', '업종', '주요제품']].copy()
-            top30_rate_table['등락률'] = top30_rate_table['등락률'].apply(format_percentage)
+            top30_rate_table = top30_rate[['종목명', '등락률', '업종', '주요제품']]
             st.dataframe(
-                top30_rate_table.style.set_table_styles([
+                top30_rate_table.style.format({'등락률': format_percentage}).set_table_styles([
                     {'selector': 'td', 'props': [('font-size', '0.95em')]},
                     {'selector': 'th', 'props': [('font-size', '0.95em')]}
                 ]),
@@ -724,15 +2077,14 @@ def display_analysis_results(final_df_sorted, date_str, all_market_data_df, top_
 
         with col2:
             st.markdown("<div style='text-align:center; font-weight:bold; font-size:1.1em;'>등락률 Top30 시장별 분포</div>", unsafe_allow_html=True)
-            fig1 = px.pie(top30_rate, names='시장', title=None)
+            fig1 = cached_figure('등락률 Top30 시장별 분포', market_chart_key, lambda: px.pie(top30_rate, names='시장', title=None))
             st.plotly_chart(fig1, use_container_width=True)
 
         with col3:
             st.markdown("<div style='text-align:center; font-weight:bold; font-size:1.1em;'>거래대금 Top30</div>", unsafe_allow_html=True)
-            top30_amount_table = top30_amount[['종목명', '거래대금', '업종', '주요제품']].copy()
-            top30_amount_table['거래대금'] = top30_amount_table['거래대금'].apply(format_number)
+            top30_amount_table = top30_amount[['종목명', '거래대금', '업종', '주요제품']]
             st.dataframe(
-                top30_amount_table.style.set_table_styles([
+                top30_amount_table.style.format({'거래대금': format_number}).set_table_styles([
                     {'selector': 'td', 'props': [('font-size', '0.95em')]},
                     {'selector': 'th', 'props': [('font-size', '0.95em')]}
                 ]),
@@ -741,12 +2093,14 @@ def display_analysis_results(final_df_sorted, date_str, all_market_data_df, top_
 
         with col4:
             st.markdown("<div style='text-align:center; font-weight:bold; font-size:1.1em;'>거래대금 Top30 시장별 분포</div>", unsafe_allow_html=True)
-            fig2 = px.pie(top30_amount, names='시장', title=None)
+            fig2 = cached_figure('거래대금 Top30 시장별 분포', market_chart_key, lambda: px.pie(top30_amount, names='시장', title=None))
             st.plotly_chart(fig2, use_container_width=True)
 
         # 전체 시장 거래대금 표시
         try:
-            df_total_investor = stock.get_market_trading_value_by_date(date_str, date_str, "ALL", etf=True, etn=True, elw=True)
+            with timed_span('투자자별 거래대금 조회'):
+                df_total_investor = stock.get_market_trading_value_by_date(date_str, date_str, "ALL", etf=True, etn=True, elw=True)
+                record_metrics(calls=1)
             if not df_total_investor.empty:
                 # '전체' 컬럼 제거
                 if '전체' in df_total_investor.columns:
@@ -775,8 +2129,10 @@ def display_analysis_results(final_df_sorted, date_str, all_market_data_df, top_
 
         # 시장별 투자자 정보 표시 (KOSPI/KOSDAQ 통합)
         try:
-            df_kospi = stock.get_market_trading_value_by_date(date_str, date_str, "KOSPI", etf=True, etn=True, elw=True, detail=True)
-            df_kosdaq = stock.get_market_trading_value_by_date(date_str, date_str, "KOSDAQ", etf=True, etn=True, elw=True, detail=True)
+            with timed_span('시장별 투자자 정보 조회'):
+                df_kospi = stock.get_market_trading_value_by_date(date_str, date_str, "KOSPI", etf=True, etn=True, elw=True, detail=True)
+                df_kosdaq = stock.get_market_trading_value_by_date(date_str, date_str, "KOSDAQ", etf=True, etn=True, elw=True, detail=True)
+                record_metrics(calls=2)
             if not df_kospi.empty:
                 df_kospi["시장"] = "KOSPI"
             if not df_kosdaq.empty:
@@ -816,13 +2172,378 @@ def display_analysis_results(final_df_sorted, date_str, all_market_data_df, top_
         except Exception as e:
             st.warning(f"KOSPI/KOSDAQ 투자자 정보 조회 중 오류 발생: {e}")
 
-def init_database():
-    """SQLite 데이터베이스 초기화"""
+# --- 기사 전문 검색 (FTS5) ---
+# article_fts의 rowid는 stock_analysis.rowid * 8 + 기사번호(1~5)로 두어 행 삭제 시 바로 찾을 수 있게 합니다.
+ARTICLE_SLOTS = range(1, 6)
+
+def _fts_insert_sql(source_alias, source_table='stock_analysis', target='article_fts'):
+    """기사 슬롯별 FTS 삽입문 (트리거에서는 NEW, 재구성 시에는 테이블 별칭을 사용)."""
+    statements = []
+    for i in ARTICLE_SLOTS:
+        select = (
+            f"SELECT {source_alias}.rowid * 8 + {i}, {source_alias}.기사제목{i}, {source_alias}.기사요약{i}, "
+            f"{source_alias}.날짜, {source_alias}.티커, {source_alias}.종목명, {i}, {source_alias}.기사링크{i}"
+        )
+        condition = f"COALESCE({source_alias}.기사제목{i}, '') != ''"
+        if source_alias != 'NEW':
+            select += f" FROM {source_table} AS {source_alias}"
+        statements.append(
+            f"INSERT INTO {target} (rowid, 제목, 요약, 날짜, 티커, 종목명, 기사번호, 링크) "
+            f"{select} WHERE {condition};"
+        )
+    return "\n".join(statements)
+
+def rebuild_article_fts(cursor):
+    """stock_analysis 전체로 FTS 인덱스를 다시 만듭니다."""
+    cursor.execute("DELETE FROM article_fts")
+    cursor.executescript(_fts_insert_sql('sa'))
+
+ARTICLE_FTS_COLUMNS = '''
+    제목, 요약,
+    날짜 UNINDEXED, 티커 UNINDEXED, 종목명 UNINDEXED, 기사번호 UNINDEXED, 링크 UNINDEXED,
+    tokenize = 'unicode61'
+'''
+
+def ensure_article_fts(cursor):
+    """기사 제목/요약 전문 검색용 FTS5 테이블과 동기화 트리거를 만듭니다.
+    인덱스가 비어 있으면 기존 데이터로 채웁니다. SQLite에 FTS5가 없으면 False를 반환합니다."""
     try:
-        conn = sqlite3.connect('stock_analysis.db')
-        c = conn.cursor()
-        
-        # 테이블이 없을 때만 생성 (테마, AI_한줄요약 컬럼 포함)
+        cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS article_fts USING fts5({ARTICLE_FTS_COLUMNS})")
+    except sqlite3.OperationalError:
+        return False
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS stock_analysis_fts_insert AFTER INSERT ON stock_analysis BEGIN
+            {_fts_insert_sql('NEW')}
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS stock_analysis_fts_delete AFTER DELETE ON stock_analysis BEGIN
+            DELETE FROM article_fts WHERE rowid BETWEEN OLD.rowid * 8 + 1 AND OLD.rowid * 8 + 5;
+        END
+    ''')
+    has_index = cursor.execute("SELECT 1 FROM article_fts LIMIT 1").fetchone()
+    has_data = cursor.execute("SELECT 1 FROM stock_analysis LIMIT 1").fetchone()
+    if has_data and not has_index:
+        rebuild_article_fts(cursor)
+    return True
+
+def ensure_analysis_indexes(cursor):
+    """종목별 시계열 조회 / DB 브라우저 페이지 조회용 인덱스와 데이터 버전 메타 테이블을 만듭니다."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_stock_analysis_ticker_date ON stock_analysis (티커, 날짜)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_stock_analysis_browse ON stock_analysis (날짜 DESC, 등락률 DESC, 티커)")
+    cursor.execute("CREATE TABLE IF NOT EXISTS db_meta (키 TEXT PRIMARY KEY, 값 TEXT)")
+
+def bump_data_version(cursor):
+    """stock_analysis가 바뀔 때마다 데이터 버전을 올려 버전별 캐시를 무효화합니다."""
+    cursor.execute(
+        "INSERT INTO db_meta (키, 값) VALUES ('data_version', '1') "
+        "ON CONFLICT(키) DO UPDATE SET 값 = CAST(값 AS INTEGER) + 1"
+    )
+
+def get_data_version():
+    """현재 데이터 버전 (저장/초기화할 때마다 증가)"""
+    try:
+        conn = sqlite3.connect('stock_analysis.db')
+        row = conn.execute("SELECT 값 FROM db_meta WHERE 키 = 'data_version'").fetchone()
+        conn.close()
+        return int(row[0]) if row else 0
+    except sqlite3.Error:
+        return 0
+
+# --- 오래된 분석 데이터 보관 (archive/YYYY/YYYYMMDD.jsonl.gz) ---
+# 보관한 날짜는 stock_analysis에서 지우고 archived_dates에 기록합니다. 읽기는 analysis_connection의
+# analysis_view(hot DB + 요청 기간의 보관 행 스냅샷)를 거치므로 화면 코드는 보관 여부를 알 필요가 없습니다.
+def ensure_archive_tables(cursor):
+    cursor.execute("CREATE TABLE IF NOT EXISTS archived_dates (날짜 TEXT PRIMARY KEY, 종목수 INTEGER, 경로 TEXT, 보관시각 TEXT)")
+
+def archive_path(date_str):
+    return os.path.join(ARCHIVE_DIR, date_str[:4], f"{date_str}.jsonl.gz")
+
+def write_archive_file(path, df):
+    """한 날짜의 행들을 gzip JSON lines로 씁니다. 임시 파일에 쓴 뒤 교체해 반쯤 쓰인 파일이 남지 않게 합니다."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+    temp_path = path + '.tmp'
+    with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    os.replace(temp_path, path)
+
+def read_archive_file(path):
+    """보관 파일 하나를 (컬럼 목록, 행 튜플 목록)으로 읽습니다.
+    테이블에 바로 넣을 수 있도록 DataFrame을 거치지 않습니다."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    columns = list(records[0]) if records else []
+    return columns, [tuple(record.get(col) for col in columns) for record in records]
+
+def archived_dates_between(conn, start_date=None, end_date=None):
+    if start_date and end_date:
+        return conn.execute(
+            "SELECT 날짜, 경로 FROM archived_dates WHERE 날짜 BETWEEN ? AND ? ORDER BY 날짜", (start_date, end_date)
+        ).fetchall()
+    return conn.execute("SELECT 날짜, 경로 FROM archived_dates ORDER BY 날짜").fetchall()
+
+class ArchiveSnapshot:
+    """기간 안의 보관 날짜 행을 한 번만 읽어 둔 공유 메모리 DB(archive_rows + 인덱스, archive_fts).
+    연결마다 ATTACH해 analysis_view에 합치므로 조회할 때마다 보관 파일을 다시 넣지 않고,
+    hot DB와 같은 인덱스가 있어 키셋 페이지 조회도 양쪽 인덱스를 병합해 정렬 없이 처리됩니다.
+    keeper 연결이 열려 있는 동안만 메모리 DB가 유지되고, 만든 뒤에는 읽기만 합니다."""
+
+    _counter = 0
+    _counter_lock = threading.Lock()
+
+    def __init__(self, archived, db_path='stock_analysis.db'):
+        with ArchiveSnapshot._counter_lock:
+            ArchiveSnapshot._counter += 1
+            serial = ArchiveSnapshot._counter
+        self.uri = f"file:archive_snapshot_{os.getpid()}_{serial}?mode=memory&cache=shared"
+        self.warnings = []
+        self.has_fts = False
+        self._keeper = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        self._build(archived, db_path)
+
+    def _build(self, archived, db_path):
+        conn = self._keeper
+        # 스키마는 hot DB의 stock_analysis를 그대로 따릅니다.
+        conn.execute("ATTACH DATABASE ? AS source", (db_path,))
+        conn.execute("CREATE TABLE archive_rows AS SELECT * FROM source.stock_analysis WHERE 0")
+        conn.execute("DETACH DATABASE source")
+        table_columns = [row[1] for row in conn.execute("PRAGMA table_info(archive_rows)")]
+        for _, path in archived:
+            try:
+                file_columns, rows = read_archive_file(path)
+            except OSError as e:
+                self.warnings.append(f"보관 파일을 읽지 못했습니다: {path} ({e})")
+                continue
+            # 보관 이후 추가된 컬럼은 NULL로, 이후 없어진 컬럼은 버립니다.
+            positions = [i for i, col in enumerate(file_columns) if col in table_columns]
+            columns = [file_columns[i] for i in positions]
+            conn.executemany(
+                f"INSERT INTO archive_rows ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                (tuple(row[i] for i in positions) for row in rows)
+            )
+        conn.execute("CREATE INDEX idx_archive_rows_ticker_date ON archive_rows (티커, 날짜)")
+        conn.execute("CREATE INDEX idx_archive_rows_browse ON archive_rows (날짜 DESC, 등락률 DESC, 티커)")
+        conn.commit()
+        try:
+            conn.execute(f"CREATE VIRTUAL TABLE archive_fts USING fts5({ARTICLE_FTS_COLUMNS})")
+            conn.executescript(_fts_insert_sql('ar', 'archive_rows', 'archive_fts'))
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            pass
+        conn.commit()
+
+@st.cache_resource(max_entries=4)
+def get_archive_snapshot(start_date, end_date, data_version=0):
+    """(기간, 데이터 버전)별 보관 행 스냅샷. 보관/저장/초기화로 data_version이 바뀌면 새로 만듭니다.
+    기간에 보관 날짜가 없으면 None."""
+    conn = sqlite3.connect('stock_analysis.db')
+    try:
+        archived = archived_dates_between(conn, start_date, end_date)
+    finally:
+        conn.close()
+    return ArchiveSnapshot(archived) if archived else None
+
+@contextmanager
+def analysis_connection(start_date=None, end_date=None):
+    """analysis_view(stock_analysis + [start_date, end_date] 안의 보관 날짜)를 가진 읽기용 연결.
+    보관 날짜가 없으면 뷰는 stock_analysis 그대로이므로 인덱스도 그대로 쓰입니다.
+    보관 날짜가 있으면 get_archive_snapshot을 archive 스키마로 붙입니다 (기사 FTS는 archive.archive_fts)."""
+    conn = sqlite3.connect('stock_analysis.db', uri=True)
+    try:
+        snapshot = None
+        if archived_dates_between(conn, start_date, end_date):
+            snapshot = get_archive_snapshot(start_date, end_date, get_data_version())
+        if snapshot is not None:
+            for message in snapshot.warnings:
+                st.warning(message)
+            conn.execute("ATTACH DATABASE ? AS archive", (snapshot.uri,))
+            conn.execute("CREATE TEMP VIEW analysis_view AS SELECT * FROM main.stock_analysis UNION ALL SELECT * FROM archive.archive_rows")
+        else:
+            conn.execute("CREATE TEMP VIEW analysis_view AS SELECT * FROM main.stock_analysis")
+        yield conn
+    finally:
+        conn.close()
+
+def _archive_date(cursor, date_str):
+    """writer 스레드에서 실행: 한 날짜를 보관 파일로 쓰고 다시 읽어 행 수를 확인한 뒤에만 hot DB에서 지웁니다.
+    보관한 행 수를 반환합니다."""
+    date_df = pd.read_sql_query("SELECT * FROM stock_analysis WHERE 날짜 = ?", cursor.connection, params=(date_str,))
+    if date_df.empty:
+        return 0
+    path = archive_path(date_str)
+    write_archive_file(path, date_df)
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        written = sum(1 for line in f if line.strip())
+    if written != len(date_df):
+        raise IOError(f"{date_str} 보관 파일 검증 실패: {len(date_df)}행 중 {written}행 기록")
+    cursor.execute("DELETE FROM stock_analysis WHERE 날짜 = ?", (date_str,))
+    cursor.execute(
+        "INSERT OR REPLACE INTO archived_dates (날짜, 종목수, 경로, 보관시각) VALUES (?, ?, ?, ?)",
+        (date_str, len(date_df), path, datetime.now().isoformat(timespec='seconds'))
+    )
+    bump_data_version(cursor)
+    return len(date_df)
+
+def _compact_database(cursor):
+    """writer 스레드에서 트랜잭션 밖에서 실행: VACUUM으로 파일을 줄입니다.
+    VACUUM은 rowid를 다시 매길 수 있으므로 FTS 인덱스를 재구성합니다."""
+    cursor.execute("VACUUM")
+    if ensure_article_fts(cursor):
+        rebuild_article_fts(cursor)
+        cursor.execute("INSERT INTO article_fts (article_fts) VALUES ('optimize')")
+
+def archive_old_dates(cutoff_date_str):
+    """cutoff_date_str 이전 날짜를 보관 파일로 옮기고 (보관한 날짜 수, 행 수)를 반환합니다.
+    날짜마다 DB writer 작업 하나로 처리하므로 보관 중에도 다른 저장이 날짜 사이에 끼어들 수 있고,
+    마지막 VACUUM도 writer가 다른 작업 없이 단독으로 실행합니다."""
+    conn = sqlite3.connect('stock_analysis.db')
+    try:
+        dates = [row[0] for row in conn.execute(
+            "SELECT DISTINCT 날짜 FROM stock_analysis WHERE 날짜 < ? ORDER BY 날짜", (cutoff_date_str,)
+        )]
+    finally:
+        conn.close()
+    writer = get_db_writer()
+    futures = [writer.submit(_archive_date, date_str) for date_str in dates]
+    row_counts = [future.result() for future in futures]
+    archived_count = sum(1 for count in row_counts if count)
+    if archived_count:
+        writer.submit(_compact_database, exclusive=True).result()
+    return archived_count, sum(row_counts)
+
+def drop_archived_date(cursor, date_str):
+    """보관 기록을 지우고 보관 파일 경로를 반환합니다 (파일은 커밋 후 호출한 쪽에서 삭제)."""
+    row = cursor.execute("SELECT 경로 FROM archived_dates WHERE 날짜 = ?", (date_str,)).fetchone()
+    cursor.execute("DELETE FROM archived_dates WHERE 날짜 = ?", (date_str,))
+    return row[0] if row else None
+
+def display_archive_controls():
+    """데이터베이스 탭의 보관 UI"""
+    with st.expander("오래된 데이터 보관"):
+        conn = sqlite3.connect('stock_analysis.db')
+        try:
+            hot_dates, hot_rows = conn.execute("SELECT COUNT(DISTINCT 날짜), COUNT(*) FROM stock_analysis").fetchone()
+            archived_count = conn.execute("SELECT COUNT(*) FROM archived_dates").fetchone()[0]
+        finally:
+            conn.close()
+        db_size_mb = os.path.getsize('stock_analysis.db') / 1024 / 1024
+        st.caption(f"DB {db_size_mb:,.1f} MB · 저장 {hot_dates:,}일 ({hot_rows:,}행) · 보관 {archived_count:,}일")
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            archive_days = st.number_input("보관 기준 (일 전보다 오래된 데이터)", min_value=1, max_value=3650,
+                                           value=ARCHIVE_AFTER_DAYS, step=1, key="archive_after_days")
+        cutoff_date_str = (datetime.now() - timedelta(days=int(archive_days))).strftime('%Y%m%d')
+        with col2:
+            st.write("")
+            if st.button(f"{cutoff_date_str} 이전 데이터 보관", key="archive_run"):
+                try:
+                    with st.spinner("보관 중..."):
+                        date_count, row_count = archive_old_dates(cutoff_date_str)
+                    st.success(f"{date_count:,}일 ({row_count:,}행)을 {ARCHIVE_DIR}에 보관했습니다.")
+                except Exception as e:
+                    st.error(f"데이터 보관 중 오류 발생: {str(e)}")
+
+# --- 단일 writer ---
+class DatabaseWriter:
+    """stock_analysis.db 쓰기를 전용 스레드 하나로 모아 순서대로 처리합니다.
+    submit(task, *args)는 Future를 반환하고, task(cursor, *args)는 writer 스레드에서 실행됩니다.
+    대기 중인 작업을 최대 batch_size개씩 한 트랜잭션으로 묶되 작업마다 SAVEPOINT를 두어,
+    한 작업이 실패하면 그 작업만 되돌리고 나머지는 함께 커밋합니다. Future는 커밋 후에 완료됩니다.
+    exclusive=True로 넘긴 작업(VACUUM 등)은 트랜잭션 밖에서 단독으로 실행합니다.
+    DB는 WAL 모드이므로 쓰는 동안에도 다른 연결의 읽기가 막히지 않습니다."""
+
+    def __init__(self, db_path='stock_analysis.db', batch_size=32):
+        self.db_path = os.path.abspath(db_path)
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, task, *args, exclusive=False):
+        future = Future()
+        self._queue.put((task, args, future, exclusive))
+        return future
+
+    def _take_batch(self):
+        jobs = [self._queue.get()]
+        while len(jobs) < self.batch_size:
+            try:
+                jobs.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        # 이미 취소된 작업은 건너뜁니다.
+        return [job for job in jobs if job[2].set_running_or_notify_cancel()]
+
+    def _run(self):
+        # isolation_level=None: 트랜잭션을 BEGIN/COMMIT으로 직접 관리합니다.
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        while True:
+            group = []
+            # 단독 작업을 경계로 나누어 그 사이의 작업들만 한 트랜잭션으로 묶습니다.
+            for job in self._take_batch():
+                if job[3]:
+                    self._run_transaction(conn, group)
+                    group = []
+                    self._run_exclusive(conn, job)
+                else:
+                    group.append(job)
+            self._run_transaction(conn, group)
+
+    def _run_transaction(self, conn, jobs):
+        if not jobs:
+            return
+        cursor = conn.cursor()
+        outcomes = []
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for task, args, _, _ in jobs:
+                cursor.execute("SAVEPOINT writer_job")
+                try:
+                    outcomes.append((True, task(cursor, *args)))
+                    cursor.execute("RELEASE writer_job")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO writer_job")
+                    cursor.execute("RELEASE writer_job")
+                    outcomes.append((False, e))
+            cursor.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            outcomes = [(False, e)] * len(jobs)
+        for (_, _, future, _), (ok, value) in zip(jobs, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _run_exclusive(self, conn, job):
+        task, args, future, _ = job
+        try:
+            result = task(conn.cursor(), *args)
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+@st.cache_resource
+def get_db_writer():
+    return DatabaseWriter()
+
+def init_database():
+    """SQLite 데이터베이스 초기화"""
+    try:
+        conn = sqlite3.connect('stock_analysis.db')
+        c = conn.cursor()
+        # 쓰기(DB writer) 중에도 읽기가 막히지 않도록 WAL 모드 사용 (DB 파일에 유지됨)
+        c.execute("PRAGMA journal_mode=WAL")
+        
+        # 테이블이 없을 때만 생성 (테마, AI_한줄요약 컬럼 포함)
         c.execute('''
             CREATE TABLE IF NOT EXISTS stock_analysis (
                 날짜 TEXT,
@@ -859,11 +2580,16 @@ def init_database():
         ''')
         
         # 기존 테이블에 새 컬럼 추가 (이미 있으면 무시)
-        for col in ["테마", "AI_한줄요약"]:
+        for col in ["테마", "AI_한줄요약", ARTICLE_THEME_COLUMN]:
             try:
                 c.execute(f"ALTER TABLE stock_analysis ADD COLUMN {col} TEXT")
             except sqlite3.OperationalError:
                 pass
+        for col in HISTORY_CONTEXT_COLUMNS:
+            try:
+                c.execute(f"ALTER TABLE stock_analysis ADD COLUMN {col} REAL")
+            except sqlite3.OperationalError:
+                pass
         
         # 기존 테이블에 새 기사 컬럼 추가
         try:
@@ -877,6 +2603,18 @@ def init_database():
             # 컬럼이 이미 존재하는 경우 무시
             pass
         
+        # 기사 전문 검색 인덱스
+        ensure_article_fts(c)
+        ensure_analysis_indexes(c)
+        ensure_market_snapshot_tables(c)
+        ensure_trading_calendar_table(c)
+        ensure_watchlist_tables(c)
+        ensure_ai_summary_cache(c)
+        ensure_archive_tables(c)
+        
+        # 네이버 API 일일 호출 수 (초기화해도 유지)
+        c.execute("CREATE TABLE IF NOT EXISTS api_quota (날짜 TEXT PRIMARY KEY, 호출수 INTEGER NOT NULL DEFAULT 0)")
+        
         conn.commit()
         conn.close()
     except Exception as e:
@@ -884,177 +2622,653 @@ def init_database():
         if conn:
             conn.close()
 
+def _reset_analysis_tables(cursor):
+    """writer 스레드에서 실행: 분석 테이블을 지우고 다시 만든 뒤 보관 기록도 지웁니다.
+    커밋 후 지울 보관 파일 경로 목록을 반환합니다."""
+    # 기존 테이블 삭제 (동기화 트리거도 함께 삭제됨)
+    cursor.execute("DROP TABLE IF EXISTS stock_analysis")
+    cursor.execute("DROP TABLE IF EXISTS article_fts")
+
+    # 테이블 다시 생성
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stock_analysis (
+            날짜 TEXT,
+            티커 TEXT,
+            종목명 TEXT,
+            업종 TEXT,
+            주요제품 TEXT,
+            시가 REAL,
+            고가 REAL,
+            저가 REAL,
+            종가 REAL,
+            등락률 REAL,
+            거래량 INTEGER,
+            거래대금 INTEGER,
+            시장 TEXT,
+            비고 TEXT,
+            기사제목1 TEXT,
+            기사요약1 TEXT,
+            기사링크1 TEXT,
+            기사제목2 TEXT,
+            기사요약2 TEXT,
+            기사링크2 TEXT,
+            기사제목3 TEXT,
+            기사요약3 TEXT,
+            기사링크3 TEXT,
+            기사제목4 TEXT,
+            기사요약4 TEXT,
+            기사링크4 TEXT,
+            기사제목5 TEXT,
+            기사요약5 TEXT,
+            기사링크5 TEXT,
+            PRIMARY KEY (날짜, 티커)
+        )
+    ''')
+    ensure_article_fts(cursor)
+    ensure_analysis_indexes(cursor)
+    ensure_archive_tables(cursor)
+    archive_paths = [path for _, path in archived_dates_between(cursor)]
+    cursor.execute("DELETE FROM archived_dates")
+    bump_data_version(cursor)
+    return archive_paths
+
 def reset_database():
-    """데이터베이스를 완전히 초기화 (모든 데이터 삭제)"""
+    """데이터베이스를 완전히 초기화 (모든 데이터 삭제). 진행 중인 저장과 겹치지 않도록 DB writer에서 실행합니다."""
     try:
-        conn = sqlite3.connect('stock_analysis.db')
-        c = conn.cursor()
-        
-        # 기존 테이블 삭제
-        c.execute("DROP TABLE IF EXISTS stock_analysis")
-        
-        # 테이블 다시 생성
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS stock_analysis (
-                날짜 TEXT,
-                티커 TEXT,
-                종목명 TEXT,
-                업종 TEXT,
-                주요제품 TEXT,
-                시가 REAL,
-                고가 REAL,
-                저가 REAL,
-                종가 REAL,
-                등락률 REAL,
-                거래량 INTEGER,
-                거래대금 INTEGER,
-                시장 TEXT,
-                비고 TEXT,
-                기사제목1 TEXT,
-                기사요약1 TEXT,
-                기사링크1 TEXT,
-                기사제목2 TEXT,
-                기사요약2 TEXT,
-                기사링크2 TEXT,
-                기사제목3 TEXT,
-                기사요약3 TEXT,
-                기사링크3 TEXT,
-                기사제목4 TEXT,
-                기사요약4 TEXT,
-                기사링크4 TEXT,
-                기사제목5 TEXT,
-                기사요약5 TEXT,
-                기사링크5 TEXT,
-                PRIMARY KEY (날짜, 티커)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        archive_paths = get_db_writer().submit(_reset_analysis_tables).result()
+        for path in archive_paths:
+            if os.path.exists(path):
+                os.remove(path)
         st.success("데이터베이스가 초기화되었습니다.")
     except Exception as e:
         st.error(f"데이터베이스 초기화 중 오류 발생: {str(e)}")
-        if conn:
-            conn.close()
 
-def save_to_database(df, overwrite=False):
-    """데이터프레임을 SQLite 데이터베이스에 저장"""
-    if df is None or df.empty:
-        return False, "저장할 데이터가 없습니다."
+def _write_analysis_rows(cursor, date_str, columns, rows, overwrite):
+    """writer 스레드에서 실행: 존재 여부 확인, (덮어쓰기 시) 기존 행 삭제, 삽입, 건수 확인을 한 작업으로 처리합니다.
+    반환값: (성공 여부, 메시지, 기존 데이터 삭제 여부, 지울 보관 파일 경로)"""
+    cursor.execute("SELECT COUNT(*) FROM stock_analysis WHERE 날짜 = ?", (date_str,))
+    exists = cursor.fetchone()[0] > 0
+    archived = cursor.execute("SELECT 1 FROM archived_dates WHERE 날짜 = ?", (date_str,)).fetchone() is not None
 
-    conn = None
-    try:
-        conn = sqlite3.connect('stock_analysis.db')
-        cursor = conn.cursor()
-        date_str = df['날짜'].iloc[0]
+    if (exists or archived) and not overwrite:
+        return False, "already_exists", False, None
 
-        # 데이터 존재 여부 확인
-        cursor.execute("SELECT COUNT(*) FROM stock_analysis WHERE 날짜 = ?", (date_str,))
-        exists = cursor.fetchone()[0] > 0
+    # 덮어쓰기 모드이면 기존 데이터 삭제 (보관된 날짜면 보관 기록도 삭제)
+    archived_file = None
+    if exists or archived:
+        cursor.execute("DELETE FROM stock_analysis WHERE 날짜 = ?", (date_str,))
+        archived_file = drop_archived_date(cursor, date_str)
 
-        if exists and not overwrite:
-            return False, "already_exists"
+    insert_sql = f'''
+        INSERT INTO stock_analysis (
+            {','.join(columns)}
+        ) VALUES ({','.join(['?' for _ in columns])})
+    '''
+    cursor.executemany(insert_sql, rows)
+    bump_data_version(cursor)
 
-        # 덮어쓰기 모드이거나 데이터가 없는 경우
-        if exists and overwrite:
-            # 기존 데이터 삭제
-            cursor.execute("DELETE FROM stock_analysis WHERE 날짜 = ?", (date_str,))
-            conn.commit()
-            st.info(f"{date_str} 날짜의 기존 데이터를 삭제했습니다.")
+    # 저장된 데이터 수 확인 (불일치하면 예외로 이 작업만 되돌립니다)
+    cursor.execute("SELECT COUNT(*) FROM stock_analysis WHERE 날짜 = ?", (date_str,))
+    saved_count = cursor.fetchone()[0]
+    if saved_count != len(rows):
+        raise ValueError(f"데이터 저장 불일치: 원본 {len(rows)}개, 저장됨 {saved_count}개")
+    return True, f"데이터베이스 저장 완료 (저장된 데이터: {saved_count}개)", exists or archived, archived_file
 
-        # 데이터 전처리
-        df_to_save = df.copy()
-        
-        # 숫자형 컬럼 변환
-        numeric_columns = {
-            'float': ['시가', '고가', '저가', '종가', '등락률'],
-            'int': ['거래량', '거래대금']
-        }
-        
-        for col in numeric_columns['float']:
-            df_to_save[col] = pd.to_numeric(df_to_save[col], errors='coerce')
-        
-        for col in numeric_columns['int']:
-            df_to_save[col] = pd.to_numeric(df_to_save[col], errors='coerce').fillna(0).astype('int64')
-        
-        # 문자열 컬럼 전처리
-        string_columns = [col for col in df_to_save.columns if col not in 
-                         numeric_columns['float'] + numeric_columns['int']]
-        
-        for col in string_columns:
-            df_to_save[col] = df_to_save[col].fillna('').astype(str)
-
-        # 데이터 저장
-        placeholders = ','.join(['?' for _ in df_to_save.columns])
-        insert_sql = f'''
-            INSERT INTO stock_analysis (
-                {','.join(df_to_save.columns)}
-            ) VALUES ({placeholders})
-        '''
-        
-        # 데이터를 리스트로 변환하여 한 번에 저장
-        data_to_insert = df_to_save.values.tolist()
-        
-        # 청크 단위로 데이터 저장
-        chunk_size = 500
-        for i in range(0, len(data_to_insert), chunk_size):
-            chunk = data_to_insert[i:i + chunk_size]
-            cursor.executemany(insert_sql, chunk)
-            conn.commit()
-        
-        # 저장된 데이터 수 확인
-        cursor.execute("SELECT COUNT(*) FROM stock_analysis WHERE 날짜 = ?", (date_str,))
-        saved_count = cursor.fetchone()[0]
-        
-        # 원본 데이터와 저장된 데이터 수 비교
-        if saved_count != len(df):
-            return False, f"데이터 저장 불일치: 원본 {len(df)}개, 저장됨 {saved_count}개"
-        
-        conn.close()
-        return True, f"데이터베이스 저장 완료 (저장된 데이터: {saved_count}개)"
-        
+def submit_save_to_database(df, overwrite=False):
+    """저장할 행을 준비해 DB writer에 넘기고 완료 Future를 반환합니다."""
+    df_to_save = df.copy()
+    
+    # 숫자형 컬럼 변환
+    numeric_columns = {
+        'float': ['시가', '고가', '저가', '종가', '등락률'] + [col for col in HISTORY_CONTEXT_COLUMNS if col in df_to_save.columns],
+        'int': ['거래량', '거래대금']
+    }
+    
+    for col in numeric_columns['float']:
+        df_to_save[col] = pd.to_numeric(df_to_save[col], errors='coerce')
+    
+    for col in numeric_columns['int']:
+        df_to_save[col] = pd.to_numeric(df_to_save[col], errors='coerce').fillna(0).astype('int64')
+    
+    # 문자열 컬럼 전처리
+    string_columns = [col for col in df_to_save.columns if col not in 
+                     numeric_columns['float'] + numeric_columns['int']]
+    
+    for col in string_columns:
+        df_to_save[col] = df_to_save[col].astype(object).fillna('').astype(str)
+
+    rows = df_to_save.astype(object).where(df_to_save.notna(), None).values.tolist()
+    return get_db_writer().submit(
+        _write_analysis_rows, str(df_to_save['날짜'].iloc[0]), list(df_to_save.columns), rows, overwrite
+    )
+
+def save_to_database(df, overwrite=False):
+    """데이터프레임을 SQLite 데이터베이스에 저장 (DB writer가 끝낼 때까지 기다립니다)"""
+    if df is None or df.empty:
+        return False, "저장할 데이터가 없습니다."
+
+    try:
+        success, message, deleted, archived_file = submit_save_to_database(df, overwrite).result()
     except Exception as e:
-        if conn:
-            conn.close()
         return False, f"데이터베이스 저장 중 오류 발생: {str(e)}"
+    if archived_file and os.path.exists(archived_file):
+        os.remove(archived_file)
+    if deleted:
+        st.info(f"{df['날짜'].iloc[0]} 날짜의 기존 데이터를 삭제했습니다.")
+    return success, message
 
 def get_saved_dates():
     """저장된 날짜 목록 조회"""
     conn = sqlite3.connect('stock_analysis.db')
     c = conn.cursor()
-    c.execute("SELECT DISTINCT 날짜 FROM stock_analysis ORDER BY 날짜 DESC")
+    c.execute("SELECT 날짜 FROM stock_analysis UNION SELECT 날짜 FROM archived_dates ORDER BY 날짜 DESC")
     dates = [row[0] for row in c.fetchall()]
     conn.close()
     return dates
 
+def get_hot_dates():
+    """보관되지 않고 DB에 남아 있는 날짜 목록"""
+    conn = sqlite3.connect('stock_analysis.db')
+    try:
+        return [row[0] for row in conn.execute("SELECT DISTINCT 날짜 FROM stock_analysis ORDER BY 날짜 DESC")]
+    finally:
+        conn.close()
+
 def get_analysis_by_date(date_str):
     """특정 날짜의 분석 결과 조회"""
     try:
-        conn = sqlite3.connect('stock_analysis.db')
-        query = "SELECT * FROM stock_analysis WHERE 날짜 = ?"
-        df = pd.read_sql_query(query, conn, params=(date_str,))
-        conn.close()
-        return df
+        with analysis_connection(date_str, date_str) as conn:
+            query = "SELECT * FROM analysis_view WHERE 날짜 = ?"
+            return pd.read_sql_query(query, conn, params=(date_str,))
     except Exception as e:
         st.error(f"데이터 조회 중 오류 발생: {str(e)}")
-        if conn:
-            conn.close()
         return pd.DataFrame()
 
 def get_data_by_date_range(start_date, end_date):
     """특정 기간의 분석 결과를 조회"""
     try:
-        conn = sqlite3.connect('stock_analysis.db')
-        query = "SELECT * FROM stock_analysis WHERE 날짜 BETWEEN ? AND ?"
-        df = pd.read_sql_query(query, conn, params=(start_date, end_date))
-        conn.close()
-        return df
+        with analysis_connection(start_date, end_date) as conn:
+            query = "SELECT * FROM analysis_view WHERE 날짜 BETWEEN ? AND ?"
+            return pd.read_sql_query(query, conn, params=(start_date, end_date))
     except Exception as e:
         st.error(f"데이터 조회 중 오류 발생: {str(e)}")
-        if conn:
-            conn.close()
         return pd.DataFrame()
 
+STREAK_ANALYTICS_SQL = '''
+    WITH days AS (
+        SELECT 날짜, ROW_NUMBER() OVER (ORDER BY 날짜) AS 일순번
+        FROM (SELECT DISTINCT 날짜 FROM analysis_view WHERE 날짜 BETWEEN :start AND :end)
+    ),
+    hits AS (
+        SELECT s.티커, s.종목명, s.날짜, s.등락률, s.비고, s.기사제목1, s.기사링크1,
+               d.일순번 - ROW_NUMBER() OVER (PARTITION BY s.티커 ORDER BY s.날짜) AS 구간
+        FROM analysis_view AS s JOIN days AS d ON d.날짜 = s.날짜
+    ),
+    streaks AS (
+        SELECT 티커, 구간, MIN(날짜) AS 시작일, MAX(날짜) AS 종료일, COUNT(*) AS 연속일수,
+               (EXP(SUM(LN(1 + 등락률 / 100.0))) - 1) * 100 AS 누적등락률
+        FROM hits
+        GROUP BY 티커, 구간
+    ),
+    ranked AS (
+        SELECT *,
+               ROW_NUMBER() OVER (PARTITION BY 티커 ORDER BY 종료일 DESC) AS 최근순,
+               MAX(연속일수) OVER (PARTITION BY 티커) AS 최장연속일수,
+               SUM(연속일수) OVER (PARTITION BY 티커) AS 출현횟수
+        FROM streaks
+    ),
+    latest AS (
+        SELECT 티커, 종목명, 비고, ROW_NUMBER() OVER (PARTITION BY 티커 ORDER BY 날짜 DESC) AS 순번
+        FROM hits
+    ),
+    latest_article AS (
+        SELECT 티커, 날짜, 기사제목1, 기사링크1,
+               ROW_NUMBER() OVER (PARTITION BY 티커 ORDER BY 날짜 DESC) AS 순번
+        FROM hits
+        WHERE COALESCE(기사제목1, '') != ''
+    )
+    SELECT r.티커, l.종목명, r.연속일수, r.시작일, r.종료일, ROUND(r.누적등락률, 2) AS 누적등락률,
+           r.최장연속일수, r.출현횟수, l.비고 AS 최근비고,
+           a.날짜 AS 기사날짜, a.기사제목1 AS 최근기사제목, a.기사링크1 AS 최근기사링크,
+           r.종료일 = (SELECT MAX(날짜) FROM days) AS 진행중
+    FROM ranked AS r
+    JOIN latest AS l ON l.티커 = r.티커 AND l.순번 = 1
+    LEFT JOIN latest_article AS a ON a.티커 = r.티커 AND a.순번 = 1
+    WHERE r.최근순 = 1 AND r.연속일수 >= :min_streak AND (:ongoing_only = 0 OR r.종료일 = (SELECT MAX(날짜) FROM days))
+    ORDER BY 진행중 DESC, r.연속일수 DESC, 누적등락률 DESC
+'''
+
+def register_math_functions(conn):
+    """SQLite 빌드에 LN/EXP 수학 함수가 없으면 파이썬 함수로 등록합니다."""
+    try:
+        conn.execute("SELECT LN(1), EXP(0)")
+    except sqlite3.OperationalError:
+        conn.create_function("LN", 1, math.log, deterministic=True)
+        conn.create_function("EXP", 1, math.exp, deterministic=True)
+
+@st.cache_data
+def get_streak_analytics(start_date, end_date, min_streak=2, ongoing_only=False, data_version=0):
+    """기간 내 저장일 기준으로 종목별 가장 최근 연속 출현 구간(연속일수, 복리 누적등락률),
+    최장 연속일수, 출현횟수, 최근 기사를 조회합니다. data_version은 캐시 키로만 사용합니다."""
+    try:
+        with analysis_connection(start_date, end_date) as conn:
+            register_math_functions(conn)
+            df = pd.read_sql_query(STREAK_ANALYTICS_SQL, conn, params={
+                'start': start_date, 'end': end_date,
+                'min_streak': int(min_streak), 'ongoing_only': int(bool(ongoing_only))
+            })
+        df['진행중'] = df['진행중'].astype(bool)
+        return df
+    except Exception as e:
+        st.error(f"연속 출현 분석 중 오류 발생: {str(e)}")
+        return pd.DataFrame()
+
+def display_streak_analytics(start_date_str, end_date_str):
+    """기간 내 연속 출현(Top N / 특징주) 종목 표"""
+    st.subheader("연속 출현 종목")
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        min_streak = st.number_input("최소 연속일수", min_value=1, max_value=60, value=2, step=1, key="streak_min_days")
+    with col2:
+        st.write("")
+        ongoing_only = st.checkbox("마지막 저장일까지 이어진 종목만", value=False, key="streak_ongoing_only")
+    streak_df = get_streak_analytics(start_date_str, end_date_str, min_streak, ongoing_only, get_data_version())
+    if streak_df.empty:
+        st.info(f"{min_streak}일 이상 연속으로 출현한 종목이 없습니다.")
+        return
+    st.caption("연속일수는 저장된 분석일 기준이며, 누적등락률은 연속 구간의 일별 등락률을 복리로 합산한 값입니다.")
+    st.dataframe(
+        streak_df.style.format({'누적등락률': format_percentage}).map(color_negative_red, subset=['누적등락률']),
+        use_container_width=True, hide_index=True,
+        column_config={"최근기사링크": st.column_config.LinkColumn("최근기사링크")}
+    )
+
+# --- 날짜 비교 ---
+COMPARISON_COLUMNS = ['티커', '종목명', '업종', '시장', '등락률', '거래대금', '비고']
+COMPARISON_STATUS_ORDER = {'유지': 0, '신규': 1, '이탈': 2}
+
+@st.cache_data(max_entries=64)
+def get_comparison_snapshot(date_str, data_version=0):
+    """비교에 필요한 컬럼만 한 날짜씩 (날짜, 티커) 기본키 인덱스로 읽고 등락률 순위를 붙입니다.
+    날짜별로 캐시하므로 여러 비교 조합에서 같은 날짜를 다시 읽지 않습니다."""
+    with analysis_connection(date_str, date_str) as conn:
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(COMPARISON_COLUMNS)} FROM analysis_view WHERE 날짜 = ?", conn, params=(date_str,)
+        )
+    df[['종목명', '업종', '시장', '비고']] = df[['종목명', '업종', '시장', '비고']].fillna('')
+    df['순위'] = df['등락률'].rank(ascending=False, method='min', na_option='bottom').astype('int64')
+    return df
+
+def compare_two_dates(previous_df, current_df):
+    """두 날짜의 종목을 티커로 외부 조인해 유지/신규/이탈 구분, 등락률, 순위 변화를 계산합니다."""
+    merged = previous_df.merge(current_df, on='티커', how='outer', suffixes=('_이전', ''), indicator=True)
+    merged['구분'] = merged['_merge'].astype(str).map({'both': '유지', 'right_only': '신규', 'left_only': '이탈'})
+    for col in ['종목명', '업종', '시장']:
+        merged[col] = merged[col].fillna(merged[f'{col}_이전'])
+    merged['순위변화'] = (merged['순위_이전'] - merged['순위']).astype('Int64')
+    merged[['순위_이전', '순위']] = merged[['순위_이전', '순위']].astype('Int64')
+    # 유지/신규는 현재 순위, 이탈은 이전 순위 순으로 정렬
+    merged['_정렬'] = merged['구분'].map(COMPARISON_STATUS_ORDER)
+    merged['_순위'] = merged['순위'].fillna(merged['순위_이전'])
+    merged = merged.sort_values(['_정렬', '_순위'])
+    return merged.rename(columns={'등락률_이전': '이전등락률', '순위_이전': '이전순위'})[
+        ['구분', '티커', '종목명', '업종', '시장', '이전등락률', '등락률', '이전순위', '순위', '순위변화']
+    ].reset_index(drop=True)
+
+def comparison_summary(snapshots):
+    """연속한 두 날짜마다 유지/신규/이탈 종목 수와 유지율"""
+    dates = list(snapshots)
+    rows = []
+    for previous, current in zip(dates, dates[1:]):
+        previous_tickers = set(snapshots[previous]['티커'])
+        current_tickers = set(snapshots[current]['티커'])
+        kept = len(previous_tickers & current_tickers)
+        rows.append({
+            '이전날짜': previous, '날짜': current, '유지': kept,
+            '신규': len(current_tickers - previous_tickers), '이탈': len(previous_tickers - current_tickers),
+            '유지율': round(kept / len(previous_tickers) * 100, 1) if previous_tickers else 0.0,
+        })
+    return pd.DataFrame(rows)
+
+def industry_mix_changes(snapshots):
+    """날짜별 업종 종목 수와 첫 날짜 대비 증감"""
+    dates = list(snapshots)
+    counts = pd.concat(
+        {date: df['업종'].replace('', '(업종 없음)').value_counts() for date, df in snapshots.items()}, axis=1
+    ).fillna(0).astype('int64')
+    counts['증감'] = counts[dates[-1]] - counts[dates[0]]
+    return counts.sort_values(['증감', dates[-1]], ascending=False).rename_axis('업종').reset_index()
+
+def presence_across_dates(snapshots):
+    """종목별 날짜 × 등락률 표와 출현 횟수 (여러 날짜에 걸쳐 유지된 종목 확인용)"""
+    dates = list(snapshots)
+    stacked = pd.concat([df[['티커', '종목명', '등락률']].assign(날짜=date) for date, df in snapshots.items()])
+    presence = stacked.pivot(index='티커', columns='날짜', values='등락률')[dates]
+    presence.columns = list(dates)
+    presence.insert(0, '종목명', stacked.drop_duplicates('티커', keep='last').set_index('티커')['종목명'])
+    presence['출현횟수'] = presence[dates].notna().sum(axis=1)
+    return presence.sort_values(['출현횟수', dates[-1]], ascending=False).reset_index()
+
+def display_date_comparison(saved_dates):
+    """저장된 날짜를 2개 이상 골라 종목 유지/신규/이탈, 순위 변화, 업종 구성 변화를 비교합니다."""
+    with st.expander("날짜 비교"):
+        selected_dates = st.multiselect(
+            "비교할 날짜 (2개 이상)", saved_dates, default=saved_dates[:2][::-1], key="compare_dates"
+        )
+        if len(selected_dates) < 2:
+            st.caption("비교할 날짜를 2개 이상 선택하세요.")
+            return
+        dates = sorted(selected_dates)
+        data_version = get_data_version()
+        snapshots = {date: get_comparison_snapshot(date, data_version) for date in dates}
+
+        st.dataframe(comparison_summary(snapshots), use_container_width=True, hide_index=True)
+
+        pairs = [f"{previous} → {current}" for previous, current in zip(dates, dates[1:])]
+        pair = st.selectbox("상세 비교 구간", pairs, index=len(pairs) - 1, key="compare_pair")
+        previous, current = pair.split(" → ")
+        detail_df = compare_two_dates(snapshots[previous], snapshots[current])
+        status_filter = st.multiselect("구분", list(COMPARISON_STATUS_ORDER), default=list(COMPARISON_STATUS_ORDER), key="compare_status")
+        detail_df = detail_df[detail_df['구분'].isin(status_filter)]
+        st.dataframe(
+            detail_df.style.format({'이전등락률': format_percentage, '등락률': format_percentage})
+                .map(color_negative_red, subset=['이전등락률', '등락률', '순위변화']),
+            use_container_width=True, hide_index=True
+        )
+        st.caption("순위는 날짜별 등락률 순위이며, 순위변화가 양수이면 순위가 올라간 종목입니다.")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**업종 구성 변화**")
+            mix_df = industry_mix_changes(snapshots)
+            st.dataframe(mix_df.style.map(color_negative_red, subset=['증감']), use_container_width=True, hide_index=True)
+        with col2:
+            st.markdown("**날짜별 등락률 (출현 횟수 순)**")
+            presence_df = presence_across_dates(snapshots)
+            st.dataframe(
+                presence_df.style.format({date: format_percentage for date in dates}),
+                use_container_width=True, hide_index=True
+            )
+
+def build_fts_query(text, match_all=False):
+    """검색어를 FTS5 질의문으로 변환합니다.
+    각 단어는 접두어 검색으로 처리하여 '수주'가 '수주를', '2차전지'가 '2차전지주'에도 일치하게 합니다."""
+    terms = [term for term in re.split(r'[\s,]+', text.strip()) if term]
+    quoted = ['"' + term.replace('"', '""') + '"*' for term in terms]
+    return (" AND " if match_all else " OR ").join(quoted)
+
+def search_articles(query_text, start_date=None, end_date=None, page=1, page_size=50, match_all=False):
+    """저장된 기사 제목/요약을 전문 검색하여 (결과 DataFrame, 전체 건수)를 반환합니다.
+    결과는 관련도(bm25) 순이며 page(1부터)와 page_size로 나누어 조회합니다."""
+    fts_query = build_fts_query(query_text, match_all)
+    if not fts_query:
+        return pd.DataFrame(), 0
+    conditions = ["article_fts MATCH ?"]
+    params = [fts_query]
+    if start_date and end_date:
+        conditions.append("날짜 BETWEEN ? AND ?")
+        params += [start_date, end_date]
+    where = " AND ".join(conditions)
+    try:
+        with analysis_connection(start_date, end_date) as conn:
+            # 기간에 보관 날짜가 있으면 보관 스냅샷의 FTS(archive.archive_fts) 결과도 함께 순위를 매깁니다.
+            fts_tables = [('article_fts', 'article_fts')]
+            if conn.execute("SELECT 1 FROM pragma_database_list WHERE name = 'archive'").fetchone() and \
+                    conn.execute("SELECT 1 FROM archive.sqlite_master WHERE name = 'archive_fts'").fetchone():
+                fts_tables.append(('archive.archive_fts', 'archive_fts'))
+            matches = " UNION ALL ".join(
+                f"SELECT 날짜, 종목명, 티커, 기사번호, 제목, 요약, 링크, rank FROM {table} WHERE {where.replace('article_fts', name)}"
+                for table, name in fts_tables
+            )
+            match_params = params * len(fts_tables)
+            total = conn.execute(f"SELECT COUNT(*) FROM ({matches})", match_params).fetchone()[0]
+            df = pd.read_sql_query(
+                f'''
+                    SELECT 날짜, 종목명, 티커, 기사번호, 제목 AS 기사제목, 요약 AS 기사요약, 링크 AS 기사링크
+                    FROM ({matches})
+                    ORDER BY rank, 날짜 DESC
+                    LIMIT ? OFFSET ?
+                ''',
+                conn, params=match_params + [page_size, (page - 1) * page_size]
+            )
+        return df, total
+    except sqlite3.OperationalError as e:
+        st.error(f"기사 검색 중 오류 발생: {str(e)}")
+        return pd.DataFrame(), 0
+
+def display_article_search(start_date_str, end_date_str):
+    """데이터베이스 탭의 기사 전문 검색 UI"""
+    st.subheader("기사 전문 검색")
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        query_text = st.text_input("검색어 (공백으로 구분)", placeholder="예: 2차전지 수주", key="article_search_query")
+    with col2:
+        match_all = st.checkbox("모든 단어 포함", value=False, key="article_search_match_all")
+    with col3:
+        page_size = st.selectbox("페이지당", [20, 50, 100], index=1, key="article_search_page_size")
+    if not query_text.strip():
+        return
+    # 검색 조건이 바뀌면 첫 페이지부터 표시
+    search_signature = (query_text, match_all, page_size, start_date_str, end_date_str)
+    if st.session_state.get("article_search_signature") != search_signature:
+        st.session_state.article_search_signature = search_signature
+        st.session_state.article_search_page = 1
+    page = st.session_state.article_search_page
+    started = time.perf_counter()
+    results_df, total = search_articles(query_text, start_date_str, end_date_str, page, page_size, match_all)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    total_pages = max(1, (total + page_size - 1) // page_size)
+    st.caption(f"{start_date_str}~{end_date_str} 기간 {total:,}건 · {elapsed_ms:,.1f}ms")
+    if results_df.empty:
+        st.info("검색 결과가 없습니다.")
+        return
+    st.dataframe(
+        results_df,
+        use_container_width=True, hide_index=True,
+        column_config={"기사링크": st.column_config.LinkColumn("기사링크")}
+    )
+    if total_pages > 1:
+        st.number_input(
+            f"페이지 (총 {total_pages}쪽)", min_value=1, max_value=total_pages,
+            step=1, key="article_search_page"
+        )
+
+# --- 데이터베이스 브라우저 (키셋 페이지네이션) ---
+BROWSE_ORDERS = {
+    "최신 날짜 · 등락률 높은 순": [('날짜', True), ('등락률', True), ('티커', False)],
+    "오래된 날짜 · 등락률 높은 순": [('날짜', False), ('등락률', True), ('티커', False)],
+}
+BROWSE_REMARK_FILTERS = {
+    "Top N": "비고 LIKE 'top%'",
+    **{name: f"('+' || 비고 || '+') LIKE '%+{definition['label']}+%'" for name, definition in SCREEN_DEFINITIONS.items()},
+    "특징주": "비고 LIKE '%특징주%'",
+}
+BROWSE_DEFAULT_COLUMNS = ['날짜', '티커', '종목명', '업종', '종가', '등락률', '거래대금', '시장', '비고', '기사제목1', '기사링크1']
+
+def build_browse_filter(start_date, end_date, markets=(), industries=(), remark_types=()):
+    """기간/시장/업종/비고 조건을 SQL WHERE 절과 파라미터로 만듭니다."""
+    clauses = ["날짜 BETWEEN ? AND ?"]
+    params = [start_date, end_date]
+    if markets:
+        clauses.append(f"시장 IN ({','.join('?' * len(markets))})")
+        params.extend(markets)
+    if industries:
+        clauses.append(f"업종 IN ({','.join('?' * len(industries))})")
+        params.extend(industries)
+    if remark_types:
+        clauses.append("(" + " OR ".join(BROWSE_REMARK_FILTERS[r] for r in remark_types) + ")")
+    return " AND ".join(clauses), params
+
+def browse_connection(params):
+    """build_browse_filter 파라미터의 앞 두 값(기간)으로 analysis_view 연결을 엽니다."""
+    return analysis_connection(params[0], params[1])
+
+def keyset_condition(order, last_values):
+    """정렬 키(order: [(컬럼, 내림차순 여부)])상 last_values 다음 행들을 고르는 WHERE 조건과 파라미터.
+    OFFSET 없이 인덱스에서 바로 다음 페이지 위치를 찾으므로 몇 번째 페이지든 조회 비용이 같습니다.
+    SQLite는 NULL을 가장 작은 값으로 정렬하므로(오름차순 맨 앞, 내림차순 맨 뒤) NULL 키는 IS NULL 조건으로 따로 비교합니다."""
+    last_values = [None if pd.isna(value) else value for value in last_values]
+    clauses = []
+    params = []
+    for i, (column, descending) in enumerate(order):
+        value = last_values[i]
+        if value is None:
+            if descending:
+                continue  # 내림차순에서 NULL 다음에는 이 컬럼 값이 더 없습니다.
+            parts, part_params = [f"{column} IS NOT NULL"], []
+        elif descending:
+            parts, part_params = [f"({column} < ? OR {column} IS NULL)"], [value]
+        else:
+            parts, part_params = [f"{column} > ?"], [value]
+        for prev_column, prev_value in reversed(list(zip([c for c, _ in order[:i]], last_values[:i]))):
+            if prev_value is None:
+                parts.insert(0, f"{prev_column} IS NULL")
+            else:
+                parts.insert(0, f"{prev_column} = ?")
+                part_params.insert(0, prev_value)
+        clauses.append("(" + " AND ".join(parts) + ")")
+        params.extend(part_params)
+    if not clauses:
+        return "0", []
+    # 첫 정렬 컬럼의 범위 조건을 중복으로 붙여 인덱스 탐색이 커서 위치에서 시작되도록 합니다.
+    first_column, first_descending = order[0]
+    if last_values[0] is None:
+        return "(" + " OR ".join(clauses) + ")", params
+    seek = f"{first_column} {'<=' if first_descending else '>='} ?"
+    if first_descending:
+        seek = f"({seek} OR {first_column} IS NULL)"
+    return f"({seek} AND (" + " OR ".join(clauses) + "))", [last_values[0]] + params
+
+def fetch_browse_page(columns, where, params, order, after=None, page_size=50):
+    """선택한 컬럼만 한 페이지 조회하고 (페이지 데이터프레임, 다음 페이지 존재 여부)를 반환합니다."""
+    key_columns = [column for column, _ in order]
+    select_columns = list(dict.fromkeys(list(columns) + key_columns))
+    query_where, query_params = where, list(params)
+    if after is not None:
+        condition, condition_params = keyset_condition(order, after)
+        query_where += f" AND {condition}"
+        query_params += condition_params
+    order_sql = ", ".join(f"{column} {'DESC' if descending else 'ASC'}" for column, descending in order)
+    query = (f"SELECT {', '.join(select_columns)} FROM analysis_view "
+             f"WHERE {query_where} ORDER BY {order_sql} LIMIT ?")
+    with browse_connection(params) as conn:
+        df = pd.read_sql_query(query, conn, params=query_params + [page_size + 1])
+    return df.head(page_size), len(df) > page_size
+
+@st.cache_data(max_entries=256)
+def count_browse_rows(where, params, data_version=0):
+    """조건에 맞는 전체 행 수. 페이지를 넘길 때마다 기간 전체를 세지 않도록 (조건, 데이터 버전)별로 캐시합니다."""
+    with browse_connection(params) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM analysis_view WHERE {where}", params).fetchone()[0]
+
+@st.cache_data
+def get_browse_options(start_date, end_date, data_version=0):
+    """기간 내 시장/업종 선택지 (data_version은 캐시 키로만 사용)"""
+    with analysis_connection(start_date, end_date) as conn:
+        options = {}
+        for column in ['시장', '업종']:
+            rows = conn.execute(
+                f"SELECT DISTINCT {column} FROM analysis_view "
+                f"WHERE 날짜 BETWEEN ? AND ? AND COALESCE({column}, '') != '' ORDER BY {column}",
+                (start_date, end_date)
+            ).fetchall()
+            options[column] = [row[0] for row in rows]
+        return options
+
+def fetch_browse_export(where, params, order):
+    """내보내기용으로 조건에 맞는 전체 행을 조회합니다."""
+    order_sql = ", ".join(f"{column} {'DESC' if descending else 'ASC'}" for column, descending in order)
+    with browse_connection(params) as conn:
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(OUTPUT_COLUMNS_WITH_REMARKS)} FROM analysis_view WHERE {where} ORDER BY {order_sql}",
+            conn, params=params
+        )
+    return df
+
+def _browse_next_page():
+    st.session_state.db_browse_cursors.append(st.session_state.db_browse_next_cursor)
+
+def _browse_prev_page():
+    if len(st.session_state.db_browse_cursors) > 1:
+        st.session_state.db_browse_cursors.pop()
+
+def display_db_browser(start_date_str, end_date_str):
+    """데이터베이스 탭의 기간별 조회 표. 필터/정렬은 SQL로 처리하고 한 페이지씩만 불러와 표시합니다."""
+    options = get_browse_options(start_date_str, end_date_str, get_data_version())
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        markets = st.multiselect("시장", options['시장'], key="db_browse_markets")
+    with col2:
+        industries = st.multiselect("업종", options['업종'], key="db_browse_industries")
+    with col3:
+        remark_types = st.multiselect("비고", list(BROWSE_REMARK_FILTERS), key="db_browse_remarks")
+    col1, col2, col3 = st.columns([3, 2, 1])
+    with col1:
+        columns = st.multiselect(
+            "표시할 컬럼", OUTPUT_COLUMNS_WITH_REMARKS, default=BROWSE_DEFAULT_COLUMNS, key="db_browse_columns"
+        ) or BROWSE_DEFAULT_COLUMNS
+    with col2:
+        order_label = st.selectbox("정렬", list(BROWSE_ORDERS), key="db_browse_order")
+    with col3:
+        page_size = st.selectbox("페이지당", [50, 100, 200], index=1, key="db_browse_page_size")
+    order = BROWSE_ORDERS[order_label]
+    where, params = build_browse_filter(start_date_str, end_date_str, markets, industries, remark_types)
+
+    # 조회 조건이 바뀌면 첫 페이지부터 표시
+    browse_signature = (start_date_str, end_date_str, tuple(markets), tuple(industries),
+                        tuple(remark_types), order_label, page_size)
+    if st.session_state.get("db_browse_signature") != browse_signature:
+        st.session_state.db_browse_signature = browse_signature
+        st.session_state.db_browse_cursors = [None]
+    cursors = st.session_state.db_browse_cursors
+
+    started = time.perf_counter()
+    total = count_browse_rows(where, tuple(params), get_data_version())
+    if total == 0:
+        st.warning("선택한 기간에 저장된 데이터가 없습니다.")
+        return
+    page_df, has_next = fetch_browse_page(columns, where, params, order, cursors[-1], page_size)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if page_df.empty:
+        st.session_state.db_browse_cursors = [None]
+        st.rerun()
+    st.session_state.db_browse_next_cursor = page_df[[column for column, _ in order]].iloc[-1].tolist()
+
+    total_pages = (total + page_size - 1) // page_size
+    st.caption(f"총 {total:,}건 · {len(cursors)} / {total_pages}쪽 · 조회 {elapsed_ms:,.1f}ms")
+    page_df = page_df[columns]
+    styled_df = page_df.style.format(number_formatters(page_df, ['시가', '고가', '저가', '종가', '거래량', '거래대금']))
+    if '등락률' in page_df.columns:
+        styled_df = styled_df.map(color_negative_red, subset=['등락률'])
+    st.dataframe(
+        styled_df, use_container_width=True, hide_index=True,
+        column_config={f"기사링크{i}": st.column_config.LinkColumn(f"기사링크{i}") for i in ARTICLE_SLOTS}
+    )
+    col1, col2, _ = st.columns([1, 1, 4])
+    with col1:
+        st.button("◀ 이전", key="db_browse_prev", disabled=len(cursors) <= 1, on_click=_browse_prev_page)
+    with col2:
+        st.button("다음 ▶", key="db_browse_next", disabled=not has_next, on_click=_browse_next_page)
+
+    # 데이터 내보내기 (요청할 때만 전체 조건 결과를 조회)
+    if st.button(f"내보내기 파일 만들기 ({total:,}건)", key="db_browse_export"):
+        export_df = fetch_browse_export(where, params, order)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="Excel 다운로드",
+                data=get_excel_data(export_df, f"{start_date_str}-{end_date_str}"),
+                file_name=f"stock_analysis_{start_date_str}-{end_date_str}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+        with col2:
+            st.download_button(
+                label="TXT 다운로드",
+                data=get_txt_data(export_df),
+                file_name=f"stock_analysis_{start_date_str}-{end_date_str}.txt",
+                mime="text/plain"
+            )
+
 def create_market_distribution_pie(df):
     """시장별 종목 분포 파이 차트 생성"""
     market_counts = df.groupby('시장').size().reset_index(name='count')
@@ -1142,18 +3356,697 @@ def create_industry_distribution_bar(df):
     )
     return fig
 
+# --- 차트 캐시 ---
+class FigureCache:
+    """(차트 이름, 키)로 Plotly Figure를 프로세스 전체에서 공유하는 LRU 캐시.
+    꺼낸 Figure는 여러 세션이 함께 쓰므로 수정하지 않고 그대로 st.plotly_chart에 넘깁니다."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            fig = self._entries.get(key)
+            if fig is not None:
+                self._entries.move_to_end(key)
+            return fig
+
+    def put(self, key, fig):
+        with self._lock:
+            self._entries[key] = fig
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache(FIGURE_CACHE_MAX_ENTRIES)
+
+def cached_figure(chart_name, key, build):
+    """캐시에 없을 때만 build()로 Figure를 만듭니다. 조회/생성 시간과 캐시 적중 여부를 구간으로 기록합니다."""
+    cache = get_figure_cache()
+    with timed_span(f'차트: {chart_name}') as record:
+        fig = cache.get((chart_name, key))
+        record['cached'] = fig is not None
+        if fig is None:
+            fig = build()
+            cache.put((chart_name, key), fig)
+    return fig
+
+# --- 분석 결과 캐시 ---
+class AnalysisResultCache:
+    """(날짜, 상위 종목수, 기사 검색수) 키로 분석 결과를 프로세스 전체에서 공유하는 LRU 캐시.
+    저장된 DataFrame의 메모리 합계가 예산을 넘으면 가장 오래 사용하지 않은 항목부터 제거합니다.
+    여러 세션이 같은 DataFrame을 공유하므로 꺼낸 결과는 수정하지 않고 복사해서 사용해야 합니다."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def entry_size(data):
+        return int(sum(
+            value.memory_usage(deep=True, index=True).sum()
+            for value in data.values() if isinstance(value, pd.DataFrame)
+        ))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry['data']
+
+    def put(self, key, data):
+        size = self.entry_size(data)
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)['size']
+            self._entries[key] = {'data': data, 'size': size, 'cached_at': datetime.now()}
+            self.total_bytes += size
+            # 방금 넣은 항목은 예산을 넘더라도 남겨 둡니다.
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted['size']
+
+    def update(self, key, func):
+        """잠금 안에서 func(현재 결과)가 돌려준 새 결과로 항목을 교체하고 현재 결과를 반환합니다.
+        func가 None을 반환하면 그대로 두고, 항목이 없으면 None을 반환합니다."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            data = func(entry['data'])
+            if data is not None:
+                size = self.entry_size(data)
+                self.total_bytes += size - entry['size']
+                entry['data'], entry['size'] = data, size
+            return entry['data']
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.total_bytes, 'max_bytes': self.max_bytes}
+
+@st.cache_resource
+def get_result_cache():
+    return AnalysisResultCache(int(RESULT_CACHE_MAX_MB * 1024 * 1024))
+
+# --- 분석 체크포인트 ---
+class RunCheckpoint:
+    """분석 실행 하나(실행 키)의 중간 결과를 CHECKPOINT_DIR/<키 해시>/ 아래에 저장합니다.
+    단계 결과(시장 데이터, 특징주)는 pickle 파일을 임시 파일 + 교체로 원자적으로 쓰고,
+    종목별 기사는 articles.jsonl에 한 줄씩 덧붙입니다 (중단되어 잘린 마지막 줄은 읽을 때 버립니다).
+    같은 키로 다시 실행하면 완료된 단계와 종목은 API를 다시 호출하지 않고 이어서 진행합니다.
+    같은 키로 동시에 실행하는 세션끼리는 경로별 잠금으로 덧붙이기를 직렬화합니다."""
+
+    ARTICLES_FILE = 'articles.jsonl'
+    STEPS = ('market', 'featured')
+    _path_locks = {}
+    _path_locks_guard = threading.Lock()
+
+    def __init__(self, run_key, root=CHECKPOINT_DIR):
+        digest = hashlib.sha1(repr(run_key).encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(root, digest)
+        with RunCheckpoint._path_locks_guard:
+            self._lock = RunCheckpoint._path_locks.setdefault(os.path.abspath(self.path), threading.Lock())
+        self.articles = self._load_articles()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def load(self, step):
+        try:
+            with open(self._file(f'{step}.pkl'), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def save(self, step, value):
+        os.makedirs(self.path, exist_ok=True)
+        # 세션마다 다른 임시 파일에 쓴 뒤 교체하므로 동시에 저장해도 파일이 섞이지 않습니다.
+        tmp_path = self._file(f'{step}.pkl.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._file(f'{step}.pkl'))
+
+    def _load_articles(self):
+        articles = {}
+        try:
+            with open(self._file(self.ARTICLES_FILE), encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    articles[entry['종목명']] = entry['articles']
+        except OSError:
+            pass
+        return articles
+
+    def save_articles(self, stock_name, articles):
+        line = json.dumps({'종목명': stock_name, 'articles': articles}, ensure_ascii=False) + '\n'
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            with open(self._file(self.ARTICLES_FILE), 'a+b') as f:
+                # 중단되어 잘린 마지막 줄이 있으면 새 줄에서 시작합니다.
+                needs_newline = False
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    needs_newline = f.read(1) != b'\n'
+                f.write((b'\n' if needs_newline else b'') + line.encode('utf-8'))
+        self.articles[stock_name] = articles
+
+    def completed_steps(self):
+        return [step for step in self.STEPS if os.path.exists(self._file(f'{step}.pkl'))]
+
+    def step_age_minutes(self, step):
+        """단계 결과를 저장한 지 몇 분 지났는지 (없으면 None)"""
+        try:
+            return (time.time() - os.path.getmtime(self._file(f'{step}.pkl'))) / 60
+        except OSError:
+            return None
+
+    def discard_steps_older_than(self, max_age_minutes):
+        """max_age_minutes보다 오래된 단계 결과를 지우고 지운 단계 목록을 반환합니다."""
+        discarded = []
+        for step in self.completed_steps():
+            age = self.step_age_minutes(step)
+            if age is not None and age > max_age_minutes:
+                try:
+                    os.remove(self._file(f'{step}.pkl'))
+                except OSError:
+                    continue
+                discarded.append(step)
+        return discarded
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.path, ignore_errors=True)
+        self.articles = {}
+
+def prune_checkpoints(root=CHECKPOINT_DIR, ttl_hours=CHECKPOINT_TTL_HOURS):
+    """마지막으로 기록한 지 ttl_hours가 지난 체크포인트를 삭제합니다."""
+    if not os.path.isdir(root):
+        return
+    cutoff = time.time() - ttl_hours * 3600
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            updated = max([os.path.getmtime(path)] + [os.path.getmtime(os.path.join(path, f)) for f in os.listdir(path)])
+        except OSError:
+            continue
+        if updated < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+
+def run_analysis_pipeline(date_str, top_n_count, news_display_count, extra_screens=(), resume=True):
+    """시장 데이터 조회부터 기사 수집까지 분석을 실행하고 (분석 결과, 전체 시장 데이터)를 반환합니다.
+    등락률 Top N과 extra_screens(build_screens 결과) 중 하나라도 일치한 종목을 분석합니다.
+    시장 데이터, 특징주, 종목별 기사는 진행하면서 체크포인트로 저장하고, 같은 조건의 이전 실행이
+    중단되었다면 (resume=True일 때) 저장된 단계부터 이어서 진행합니다. 끝까지 완료하면 체크포인트를 지웁니다.
+    시장 데이터를 찾지 못하면 None을 반환합니다."""
+    progress_text = "분석이 진행 중입니다..."
+    progress_bar = st.progress(0, text=progress_text)
+
+    prune_checkpoints()
+    checkpoint = RunCheckpoint((date_str, int(top_n_count), int(news_display_count), tuple(extra_screens)))
+    if not resume:
+        checkpoint.clear()
+    step_labels = {'market': '시장 데이터', 'featured': '특징주'}
+    if date_str >= datetime.now().strftime('%Y%m%d'):
+        # 오늘 장중 데이터는 계속 바뀌므로 오래된 시장 데이터/특징주 단계는 이어 쓰지 않고 다시 조회합니다.
+        discarded_steps = checkpoint.discard_steps_older_than(CHECKPOINT_INTRADAY_TTL_MIN)
+        if discarded_steps:
+            st.info(
+                f"저장된 {', '.join(step_labels[step] for step in discarded_steps)} 단계가 "
+                f"{CHECKPOINT_INTRADAY_TTL_MIN:g}분보다 오래되어 다시 조회합니다."
+            )
+    resumed_steps = checkpoint.completed_steps()
+    if resumed_steps or checkpoint.articles:
+        st.info(
+            "중단된 같은 조건의 분석을 이어서 진행합니다. (저장된 단계: "
+            + ", ".join(
+                [f"{step_labels[step]} {checkpoint.step_age_minutes(step) or 0:,.0f}분 전" for step in resumed_steps]
+                + [f"기사 {len(checkpoint.articles)}개 종목"]
+            ) + ")"
+        )
+
+    # 전체 시장 데이터 조회
+    progress_bar.progress(0.5, text="시장 데이터 조회 준비 중...")
+    all_market_data_df = checkpoint.load('market')
+    with timed_span('시장 데이터 조회', resumed=all_market_data_df is not None):
+        if all_market_data_df is None:
+            all_market_data_df = get_all_market_data_with_names(date_str, company_details_df_global)
+            if all_market_data_df is not None and not all_market_data_df.empty:
+                checkpoint.save('market', all_market_data_df)
+    if all_market_data_df is None or all_market_data_df.empty:
+        st.error(f"{date_str} 날짜의 시장 데이터를 찾을 수 없습니다.")
+        progress_bar.empty()
+        return None
+    ticker_index = build_ticker_index(all_market_data_df)
+    progress_bar.progress(1.0, text="시장 데이터 조회 완료")
+
+    # 등락률 Top N + 추가 스크리닝으로 종목 선별
+    progress_bar.progress(0.20, text="종목 스크리닝 중...")
+    with timed_span('종목 스크리닝'):
+        screens = (top_n_screen(top_n_count),) + tuple(extra_screens)
+        screen_masks = get_screen_masks(snapshot_key(all_market_data_df, date_str), all_market_data_df, screens)
+        top_n_df = all_market_data_df[screen_masks.any(axis=1)].sort_values(by='등락률', ascending=False)
+        screen_labels = screen_remarks(screen_masks.loc[top_n_df.index], screens)
+        top_n_stock_names = set(top_n_df['종목명'].tolist())
+    progress_bar.progress(0.30, text="종목 스크리닝 완료")
+
+    # 특징주 뉴스 검색
+    progress_bar.progress(0.35, text="특징주 뉴스 검색 준비 중...")
+    featured_stock_info = checkpoint.load('featured')
+    naver_quota = get_naver_quota()
+    naver_quota.refresh()
+    budget = plan_naver_budget(naver_quota.remaining(), news_display_count, len(top_n_df))
+    if budget['news_display_count'] < news_display_count:
+        st.warning(
+            f"네이버 API 일일 호출량이 부족해 특징주 기사 검색수를 {news_display_count}건에서 "
+            f"{budget['news_display_count']}건으로 줄였습니다. (남은 호출 {naver_quota.remaining():,}회)"
+        )
+        news_display_count = budget['news_display_count']
+    if featured_stock_info is None and NAVER_CLIENT_ID and NAVER_CLIENT_SECRET and news_display_count > 0:
+        progress_bar.progress(0.40, text="네이버 뉴스 API 호출 중...")
+        with timed_span('특징주 뉴스 검색'):
+            news_articles = call_naver_search_api("특징주", news_display_count, NAVER_CLIENT_ID, NAVER_CLIENT_SECRET)
+        progress_bar.progress(0.50, text="특징주 정보 추출 중...")
+        with timed_span('특징주 추출'):
+            featured_stock_info = extract_featured_stock_names_from_news(news_articles, date_str, set(all_market_data_df['종목명']))
+            checkpoint.save('featured', featured_stock_info)
+    featured_stock_info = featured_stock_info or {}
+    progress_bar.progress(0.60, text="특징주 뉴스 검색 완료")
+
+    # 관심종목 알림 (새 스냅샷 + 특징주 추출 결과로 평가)
+    try:
+        check_watchlist(date_str, ticker_index, featured_stock_info)
+    except Exception as e:
+        st.warning(f"관심종목 알림 확인 중 오류 발생: {str(e)}")
+
+    # 남은 호출량으로 기사를 검색할 종목 선정 (등락률 상위 종목 우선, 체크포인트에 있는 종목은 호출하지 않음)
+    article_candidates = all_market_data_df[
+        all_market_data_df['종목명'].isin(top_n_stock_names | set(featured_stock_info))
+    ].sort_values(by='등락률', ascending=False)['종목명'].drop_duplicates()
+    pending_candidates = article_candidates[~article_candidates.isin(checkpoint.articles)]
+    article_stock_limit = plan_naver_budget(naver_quota.remaining(), 0, len(pending_candidates))['article_stock_limit']
+    article_search_stocks = set(pending_candidates.head(article_stock_limit))
+    skipped_article_stocks = []
+
+    def can_search_articles(stock_name):
+        if stock_name in checkpoint.articles:
+            return True
+        if not (NAVER_CLIENT_ID and NAVER_CLIENT_SECRET):
+            return False
+        if stock_name in article_search_stocks and naver_quota.remaining() > 0:
+            return True
+        skipped_article_stocks.append(stock_name)
+        return False
+
+    def fetch_stock_articles(stock_name, max_count, exclude=None):
+        if stock_name in checkpoint.articles:
+            return checkpoint.articles[stock_name]
+        articles = search_stock_articles_by_date(
+            stock_name,
+            NAVER_CLIENT_ID,
+            NAVER_CLIENT_SECRET,
+            date_str,
+            max_count=max_count,
+            match_date=True,
+            exclude=exclude
+        )
+        # 빈 결과는 검색 실패(타임아웃 등)일 수 있으므로 저장하지 않고 다음 실행에서 다시 검색합니다.
+        if articles:
+            checkpoint.save_articles(stock_name, articles)
+        return articles
+
+    # 최종 데이터프레임 생성
+    progress_bar.progress(0.85, text="데이터프레임 생성 중...")
+    final_data_list = []
+    processed_stocks = set()
+
+    # Top N 종목 처리
+    progress_bar.progress(0.35, text="Top N 종목 데이터 수집 중...")
+    with timed_span('선별 종목 기사 검색'):
+        for idx, (row_index, row) in enumerate(top_n_df.iterrows(), 1):
+            stock_name = row['종목명']
+            if stock_name in processed_stocks:
+                continue
+
+            progress_bar.progress(0.35 + (idx/len(top_n_df))*0.20,
+                text=f"Top N 종목 처리 중... ({idx}/{len(top_n_df)}) - {stock_name}")
+
+            processed_stocks.add(stock_name)
+            stock_info = {
+                '날짜': date_str,
+                '티커': row['티커'],
+                '종목명': stock_name,
+                '업종': row.get('업종', ''),
+                '주요제품': row.get('주요제품', ''),
+                '시가': row['시가'],
+                '고가': row['고가'],
+                '저가': row['저가'],
+                '종가': row['종가'],
+                '등락률': row['등락률'],
+                '거래량': row['거래량'],
+                '거래대금': row['거래대금'],
+                '시장': row['시장'],
+                '비고': ''
+            }
+
+            # 기사 컬럼 초기화
+            initialize_article_columns(stock_info)
+
+            if stock_name in featured_stock_info:
+                stock_info['비고'] = f"{screen_labels[row_index]}+{FEATURED_LABEL}"
+                # 첫 번째 기사는 특징주 기사로 설정
+                first_article = featured_stock_info[stock_name][0]
+                stock_info['기사제목1'] = first_article['title']
+                stock_info['기사요약1'] = first_article['description']
+                stock_info['기사링크1'] = first_article['link']
+
+                # 추가 기사 4개 검색
+                if can_search_articles(stock_name):
+                    progress_bar.progress(0.35 + (idx/len(top_n_df))*0.20,
+                        text=f"Top N 종목 추가 기사 검색 중... ({idx}/{len(top_n_df)}) - {stock_name}")
+                    additional_articles = fetch_stock_articles(stock_name, 4, exclude=[first_article])
+                    # 기사2~5에 매핑
+                    for i, article in enumerate(additional_articles, 2):
+                        stock_info[f'기사제목{i}'] = article['title']
+                        stock_info[f'기사요약{i}'] = article['description']
+                        stock_info[f'기사링크{i}'] = article['link']
+            else:
+                stock_info['비고'] = screen_labels[row_index]
+                # 일반 종목은 기사 5개 검색
+                if can_search_articles(stock_name):
+                    progress_bar.progress(0.35 + (idx/len(top_n_df))*0.20,
+                        text=f"Top N 종목 기사 검색 중... ({idx}/{len(top_n_df)}) - {stock_name}")
+                    articles = fetch_stock_articles(stock_name, 5)
+                    for i, article in enumerate(articles, 1):
+                        stock_info[f'기사제목{i}'] = article['title']
+                        stock_info[f'기사요약{i}'] = article['description']
+                        stock_info[f'기사링크{i}'] = article['link']
+
+            final_data_list.append(stock_info)
+    progress_bar.progress(0.55, text="Top N 종목 처리 완료")
+
+    # 특징주 정보 추가
+    progress_bar.progress(0.60, text="특징주 정보 수집 시작...")
+    featured_stocks = [stock for stock in featured_stock_info.keys() if stock not in processed_stocks]
+    with timed_span('특징주 기사 검색'):
+        for idx, stock_name in enumerate(featured_stocks, 1):
+            progress_bar.progress(0.60 + (idx/len(featured_stocks))*0.20,
+                text=f"특징주 정보 처리 중... ({idx}/{len(featured_stocks)}) - {stock_name}")
+            try:
+                stock_row = all_market_data_df[all_market_data_df['종목명'] == stock_name].iloc[0]
+                stock_info = {
+                    '날짜': date_str,
+                    '티커': stock_row['티커'],
+                    '종목명': stock_name,
+                    '업종': stock_row.get('업종', ''),
+                    '주요제품': stock_row.get('주요제품', ''),
+                    '시가': stock_row['시가'],
+                    '고가': stock_row['고가'],
+                    '저가': stock_row['저가'],
+                    '종가': stock_row['종가'],
+                    '등락률': stock_row['등락률'],
+                    '거래량': stock_row['거래량'],
+                    '거래대금': stock_row['거래대금'],
+                    '시장': stock_row['시장'],
+                    '비고': '특징주'
+                }
+
+                # 기사 컬럼 초기화
+                initialize_article_columns(stock_info)
+
+                # 첫 번째 기사는 특징주 기사
+                first_article = featured_stock_info[stock_name][0]
+                stock_info['기사제목1'] = first_article['title']
+                stock_info['기사요약1'] = first_article['description']
+                stock_info['기사링크1'] = first_article['link']
+
+                # 추가 기사 4개 검색
+                if can_search_articles(stock_name):
+                    progress_bar.progress(0.60 + (idx/len(featured_stocks))*0.20,
+                        text=f"특징주 추가 기사 검색 중... ({idx}/{len(featured_stocks)}) - {stock_name}")
+                    additional_articles = fetch_stock_articles(stock_name, 4, exclude=[first_article])
+
+                    # 기사2~5에 매핑
+                    for i, article in enumerate(additional_articles, 2):
+                        stock_info[f'기사제목{i}'] = article['title']
+                        stock_info[f'기사요약{i}'] = article['description']
+                        stock_info[f'기사링크{i}'] = article['link']
+
+                final_data_list.append(stock_info)
+                processed_stocks.add(stock_name)
+            except Exception as e:
+                st.error(f"특징주 {stock_name} 처리 중 오류 발생: {str(e)}")
+                continue
+    progress_bar.progress(0.80, text="특징주 정보 처리 완료")
+    if skipped_article_stocks:
+        st.warning(
+            f"네이버 API 일일 호출량이 부족해 등락률 하위 {len(skipped_article_stocks)}개 종목의 기사 검색을 생략했습니다. "
+            f"(예: {', '.join(skipped_article_stocks[:5])})"
+        )
+
+    # 최종 데이터프레임 생성 및 정렬
+    progress_bar.progress(0.85, text="데이터프레임 생성 중...")
+    with timed_span('결과 데이터프레임 생성'):
+        final_df = pd.DataFrame(final_data_list)
+        # 내보내기/DB 저장 값이 float32 오차 없이 유지되도록 결과의 등락률은 float64로 되돌립니다.
+        final_df['등락률'] = final_df['등락률'].astype('float64').round(2)
+        final_df = compact_dtypes(final_df, float32_columns=())
+        progress_bar.progress(0.90, text="데이터 정렬 중...")
+        final_df_sorted = final_df.sort_values(by='등락률', ascending=False)
+
+    # 과거 시세 컨텍스트 (직전 거래일 스냅샷 캐시에서 한 번에 계산)
+    progress_bar.progress(0.92, text="과거 시세 컨텍스트 계산 중...")
+    with timed_span('과거 시세 컨텍스트'):
+        try:
+            history_dates, _ = ensure_market_history(date_str)
+            history_df = load_market_history(history_dates, final_df_sorted['티커'].astype(str).unique().tolist())
+            context_df = compute_history_context(history_df, final_df_sorted)
+            final_df_sorted = final_df_sorted.merge(context_df, on='티커', how='left')
+        except Exception as e:
+            st.warning(f"과거 시세 컨텍스트 계산 중 오류 발생: {str(e)}")
+            for col in HISTORY_CONTEXT_COLUMNS:
+                final_df_sorted[col] = float('nan')
+        # 컨텍스트 컬럼은 거래대금 뒤에 배치
+        ordered_columns = [col for col in final_df_sorted.columns if col not in HISTORY_CONTEXT_COLUMNS]
+        insert_at = ordered_columns.index('거래대금') + 1
+        final_df_sorted = final_df_sorted[ordered_columns[:insert_at] + HISTORY_CONTEXT_COLUMNS + ordered_columns[insert_at:]]
+
+    # AI 테마 / 한줄요약 (API 키가 설정된 경우에만 요청, 컬럼은 종목명 바로 뒤)
+    # 캐시된 요약은 바로 채우고, 캐시에 없는 종목은 결과를 먼저 보여 준 뒤 백그라운드 요청이 끝나면 채웁니다.
+    for col in AI_SUMMARY_COLUMNS:
+        final_df_sorted[col] = ''
+    ai_future = None
+    if AI_API_KEY:
+        progress_bar.progress(0.94, text="AI 테마/한줄요약 캐시 확인 중...")
+        with timed_span('AI 테마/요약 생성'):
+            try:
+                cached_summaries, ai_future = start_ai_summaries(final_df_sorted, date_str)
+                final_df_sorted = fill_ai_summaries(final_df_sorted, cached_summaries)
+            except Exception as e:
+                st.warning(f"AI 테마/요약 생성 중 오류 발생: {str(e)}")
+
+    # 기사 기반 테마 클러스터링 (AI 컬럼 바로 뒤)
+    with timed_span('기사 테마 클러스터링'):
+        theme_labels, theme_keywords = cluster_article_themes(final_df_sorted)
+        final_df_sorted[ARTICLE_THEME_COLUMN] = theme_labels
+        theme_summary = theme_cluster_summary(final_df_sorted, theme_keywords)
+    leading_columns = AI_SUMMARY_COLUMNS + [ARTICLE_THEME_COLUMN]
+    ordered_columns = [col for col in final_df_sorted.columns if col not in leading_columns]
+    insert_at = ordered_columns.index('종목명') + 1
+    final_df_sorted = final_df_sorted[ordered_columns[:insert_at] + leading_columns + ordered_columns[insert_at:]]
+
+    # 끝까지 완료했으므로 중간 결과는 더 이상 필요 없습니다 (완료된 결과는 결과 캐시가 보관).
+    checkpoint.clear()
+
+    progress_bar.progress(0.95, text="분석 결과 저장 중...")
+    progress_bar.progress(1.0, text="분석이 완료되었습니다!")
+    time.sleep(1)
+    progress_bar.empty()
+    return {'final_df': final_df_sorted, 'market_df': all_market_data_df, 'ai_future': ai_future,
+            'theme_summary': theme_summary}
+
+# --- 실시간 모니터링 ---
+LIVE_CHANGE_COLUMNS = ['시각', '구분', '종목명', '순위', '이전순위', '등락률']
+LIVE_ARTICLE_COLUMNS = ['시각', '종목명', '기사제목', '기사링크']
+
+def take_live_snapshot(date_str, top_n_count, news_count):
+    """현재 등락률 Top N과 특징주 기사 목록을 한 번 조회합니다. 시장 데이터가 없으면 None을 반환합니다."""
+    market_df = get_all_market_data_with_names(date_str, company_details_df_global)
+    if market_df is None or market_df.empty:
+        return None
+    ticker_index = build_ticker_index(market_df)
+    top_df = market_df.nlargest(top_n_count, '등락률')[['티커', '종목명', '시장', '종가', '등락률', '거래대금']]
+    top_df = top_df.reset_index(drop=True)
+    top_df.insert(0, '순위', range(1, len(top_df) + 1))
+
+    featured_stock_info = {}
+    if NAVER_CLIENT_ID and NAVER_CLIENT_SECRET and news_count > 0 and get_naver_quota().remaining() > 0:
+        news_articles = call_naver_search_api("특징주", news_count, NAVER_CLIENT_ID, NAVER_CLIENT_SECRET)
+        featured_stock_info = extract_featured_stock_names_from_news(news_articles, date_str, set(market_df['종목명']))
+    articles = [
+        {'종목명': stock_name, '기사제목': info[0]['title'], '기사링크': info[0]['link']}
+        for stock_name, info in featured_stock_info.items()
+    ]
+    try:
+        check_watchlist(date_str, ticker_index, featured_stock_info)
+    except Exception as e:
+        st.warning(f"관심종목 알림 확인 중 오류 발생: {str(e)}")
+    return {
+        'time': datetime.now(),
+        'top': top_df,
+        'articles': pd.DataFrame(articles, columns=['종목명', '기사제목', '기사링크'])
+    }
+
+def diff_live_snapshots(previous, current):
+    """이전 스냅샷 대비 변경분 (신규 진입/순위 변화/이탈 행, 새 기사 행)을 반환합니다."""
+    now_label = current['time'].strftime('%H:%M:%S')
+    if previous is None:
+        changes = current['top'].assign(구분='신규 진입', 이전순위=pd.NA)
+    else:
+        merged = current['top'].merge(
+            previous['top'][['티커', '종목명', '순위', '등락률']],
+            on='티커', how='outer', suffixes=('', '_이전'), indicator=True
+        )
+        merged = merged.rename(columns={'순위_이전': '이전순위'})
+        entered = merged['_merge'] == 'left_only'
+        exited = merged['_merge'] == 'right_only'
+        moved = (merged['_merge'] == 'both') & (merged['순위'] != merged['이전순위'])
+        merged['구분'] = None
+        merged.loc[entered, '구분'] = '신규 진입'
+        merged.loc[exited, '구분'] = '이탈'
+        merged.loc[moved & (merged['순위'] < merged['이전순위']), '구분'] = '순위 상승'
+        merged.loc[moved & (merged['순위'] > merged['이전순위']), '구분'] = '순위 하락'
+        merged.loc[exited, '종목명'] = merged.loc[exited, '종목명_이전']
+        merged.loc[exited, '등락률'] = merged.loc[exited, '등락률_이전']
+        changes = merged[entered | exited | moved]
+    changes = changes.assign(시각=now_label)[LIVE_CHANGE_COLUMNS].sort_values(by='순위', na_position='last')
+    # add_rows로 이어 붙이므로 매번 같은 타입을 유지합니다.
+    changes = changes.astype({'순위': 'Int64', '이전순위': 'Int64', '등락률': 'float64'})
+
+    seen_links = set() if previous is None else set(previous['articles']['기사링크'])
+    new_articles = current['articles'][~current['articles']['기사링크'].isin(seen_links)]
+    new_articles = new_articles.assign(시각=now_label)[LIVE_ARTICLE_COLUMNS]
+    return changes.reset_index(drop=True), new_articles.reset_index(drop=True)
+
+def format_rank_change(row):
+    if pd.isna(row['이전순위']):
+        return 'NEW'
+    delta = int(row['이전순위']) - int(row['순위'])
+    return f"▲{delta}" if delta > 0 else (f"▼{-delta}" if delta < 0 else '-')
+
+def run_live_monitor(date_str, top_n_count, news_count, interval_sec, max_polls=None):
+    """interval_sec마다 시장 데이터와 특징주 기사를 다시 조회하고 변경된 행만 화면에 추가합니다.
+    스냅샷은 세션의 링 버퍼(최근 LIVE_BUFFER_SIZE개)에 보관합니다.
+    다른 위젯을 조작하면 Streamlit이 스크립트를 다시 실행하면서 갱신 루프가 멈춥니다."""
+    buffer = st.session_state.get('live_snapshots')
+    if buffer is None or buffer.maxlen != LIVE_BUFFER_SIZE or st.session_state.get('live_signature') != (date_str, top_n_count):
+        buffer = deque(maxlen=LIVE_BUFFER_SIZE)
+        st.session_state.live_snapshots = buffer
+        st.session_state.live_signature = (date_str, top_n_count)
+
+    status = st.empty()
+    poll_messages = st.empty()
+    st.markdown("#### 현재 Top N")
+    top_placeholder = st.empty()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### 변경 내역")
+        change_table = st.dataframe(
+            pd.DataFrame(columns=LIVE_CHANGE_COLUMNS), use_container_width=True, hide_index=True
+        )
+    with col2:
+        st.markdown("#### 새 특징주 기사")
+        article_table = st.dataframe(
+            pd.DataFrame(columns=LIVE_ARTICLE_COLUMNS), use_container_width=True, hide_index=True,
+            column_config={"기사링크": st.column_config.LinkColumn("기사링크")}
+        )
+
+    poll_count = 0
+    while max_polls is None or poll_count < max_polls:
+        poll_started = time.perf_counter()
+        start_pipeline_timer()  # 폴링마다 타이머를 새로 시작해 구간 기록이 쌓이지 않도록 합니다.
+        with poll_messages.container():
+            snapshot = take_live_snapshot(date_str, top_n_count, news_count)
+        poll_count += 1
+        if snapshot is not None:
+            previous = buffer[-1] if buffer else None
+            changes, new_articles = diff_live_snapshots(previous, snapshot)
+            buffer.append(snapshot)
+            # 변경이 있을 때만 다시 그리고, 변경 행만 기존 표에 덧붙입니다.
+            if previous is None or not changes.empty:
+                top_view = snapshot['top'].merge(
+                    previous['top'][['티커', '순위']].rename(columns={'순위': '이전순위'}), on='티커', how='left'
+                ) if previous is not None else snapshot['top'].assign(이전순위=pd.NA)
+                top_view['변화'] = top_view.apply(format_rank_change, axis=1)
+                top_view = top_view.drop(columns=['이전순위'])
+                top_placeholder.dataframe(
+                    top_view.style.format(number_formatters(top_view, ['종가', '거래대금'])).map(color_negative_red, subset=['등락률']),
+                    use_container_width=True, hide_index=True
+                )
+            if not changes.empty:
+                change_table.add_rows(changes)
+            if not new_articles.empty:
+                article_table.add_rows(new_articles)
+            last_update = snapshot['time'].strftime('%H:%M:%S')
+            summary = f"변경 {len(changes)}건 · 새 기사 {len(new_articles)}건"
+        else:
+            last_update = datetime.now().strftime('%H:%M:%S')
+            summary = "시장 데이터 없음"
+        poll_sec = time.perf_counter() - poll_started
+        if max_polls is not None and poll_count >= max_polls:
+            status.caption(f"마지막 갱신 {last_update} ({poll_sec:.1f}초) · {summary} · 폴링 {poll_count}회 · 버퍼 {len(buffer)}/{buffer.maxlen} · 종료")
+            break
+        # 1초 단위로 상태를 갱신해 대기 중에도 다른 조작이 바로 반영되도록 합니다.
+        for remaining in range(int(interval_sec), 0, -1):
+            status.caption(
+                f"마지막 갱신 {last_update} ({poll_sec:.1f}초) · {summary} · 폴링 {poll_count}회 · "
+                f"버퍼 {len(buffer)}/{buffer.maxlen} · 다음 갱신까지 {remaining}초"
+            )
+            time.sleep(1)
+
 # --- Streamlit UI ---
 
 # 앱 시작시 데이터베이스 초기화
 init_database()
 
-# 세션 상태 초기화
-if 'analysis_results' not in st.session_state:
-    st.session_state.analysis_results = None
-if 'analysis_date' not in st.session_state:
-    st.session_state.analysis_date = None
-if 'all_market_data' not in st.session_state:
-    st.session_state.all_market_data = None
+# 세션 상태 초기화 (분석 결과는 공유 캐시에 두고 세션에는 키만 보관)
+if 'analysis_key' not in st.session_state:
+    st.session_state.analysis_key = None
+if 'last_run_timing' not in st.session_state:
+    st.session_state.last_run_timing = None
+# AI 요약 완료 후의 재실행은 분석을 다시 돌리지 않고 이전 결과 표시 경로로 보냅니다.
+ai_summary_rerun = st.session_state.pop('ai_summary_rerun', False)
+
+# 분석 입력값 기본값 (위젯 기본값 대신 세션 상태로 지정)
+ANALYSIS_INPUT_DEFAULTS = {
+    'analysis_input_date': lambda: datetime.strptime(previous_trading_day(datetime.now().strftime('%Y%m%d')), '%Y%m%d').date(),
+    'analysis_top_n': lambda: 40,
+    'analysis_news_count': lambda: 500,
+    'analysis_refresh': lambda: False,
+    'analysis_screens': lambda: [],
+    'live_mode': lambda: False,
+    'live_interval': lambda: 60,
+    **{
+        screen_threshold_key(name, column): (lambda value=value: value)
+        for name, definition in SCREEN_DEFINITIONS.items()
+        for column, _, value in definition['rules'] if not isinstance(value, str)
+    },
+}
+for widget_key, default_value in ANALYSIS_INPUT_DEFAULTS.items():
+    if widget_key not in st.session_state:
+        st.session_state[widget_key] = default_value()
+    # 선택한 화면만 실행하므로 다른 화면에 있는 동안 위젯 값이 지워지지 않도록 다시 지정합니다.
+    st.session_state[widget_key] = st.session_state[widget_key]
 
 def read_google_sheet(worksheet_name=None):
     sheet = get_google_sheet()
@@ -1177,266 +4070,177 @@ def read_google_sheet(worksheet_name=None):
     df = pd.DataFrame(data)
     return df, worksheet_names
 
-# 4개의 탭 생성 (복원)
-tab1, tab2, tab3, tab4 = st.tabs(["실시간 분석", "데이터베이스", "인포그래픽", "구글 시트 보기"])
+# 화면 선택 (탭 모양의 라디오). st.tabs는 모든 탭 본문을 매번 실행하므로 선택한 화면만 실행합니다.
+VIEW_NAMES = ["실시간 분석", "데이터베이스", "인포그래픽", "구글 시트 보기"]
+st.markdown('<div id="view-nav"></div>', unsafe_allow_html=True)
+active_view = st.radio("화면", VIEW_NAMES, horizontal=True, key="active_view", label_visibility="collapsed")
 
 # 실시간 분석 탭
-with tab1:
+if active_view == "실시간 분석":
     # 분석 설정
     col1, col2, col3 = st.columns(3)
     with col1:
         input_date = st.date_input(
             "조회 날짜",
-            value=datetime.now().date(),
-            format="YYYY-MM-DD"
+            format="YYYY-MM-DD",
+            key="analysis_input_date"
         )
     with col2:
         top_n_count = st.number_input(
             "상위 종목수",
             min_value=1,
             max_value=100,
-            value=40,
-            step=1
+            step=1,
+            key="analysis_top_n"
         )
     with col3:
         news_display_count = st.number_input(
             "특징주 기사 검색수",
             min_value=1,
             max_value=1000,
-            value=500,
-            step=1
+            step=1,
+            key="analysis_news_count"
         )
 
+    # 등락률 Top N 외 추가 스크리닝
+    with st.expander("추가 스크리닝 조건"):
+        selected_screens = st.multiselect(
+            "Top N 외에 함께 분석할 조건", list(SCREEN_DEFINITIONS), key="analysis_screens"
+        )
+        screen_thresholds = {}
+        for name in selected_screens:
+            definition = SCREEN_DEFINITIONS[name]
+            numeric_rules = [(column, op) for column, op, value in definition['rules'] if not isinstance(value, str)]
+            if definition.get('help'):
+                st.caption(f"{name}: {definition['help']}")
+            for rule_col, (column, op) in zip(st.columns(max(1, len(numeric_rules))), numeric_rules):
+                with rule_col:
+                    screen_thresholds[(name, column)] = st.number_input(
+                        f"{name} · {column} {op}", key=screen_threshold_key(name, column)
+                    )
+    extra_screens = build_screens(selected_screens, screen_thresholds)
+    display_watchlist_settings()
+
     # 분석 실행 버튼과 다운로드 버튼을 나란히 배치
-    col1, _, _ = st.columns([2,1,1])
+    col1, col2, col3, col4 = st.columns([2,1,1,1])
     with col1:
         run_analysis = st.button("분석 실행", type="primary")
+    with col2:
+        refresh_analysis = st.checkbox("캐시 무시하고 새로 분석", key="analysis_refresh")
+    with col3:
+        live_mode = st.toggle("실시간 모니터링", key="live_mode")
+    with col4:
+        live_interval = st.number_input("갱신 주기(초)", min_value=10, max_value=600, step=10, key="live_interval")
+    cache_stats = get_result_cache().stats()
+    naver_quota = get_naver_quota()
+    naver_used = naver_quota.used()
+    st.caption(
+        f"결과 캐시: {cache_stats['entries']}건 · "
+        f"{cache_stats['bytes'] / 1024 / 1024:,.1f} / {cache_stats['max_bytes'] / 1024 / 1024:,.0f} MB · "
+        f"네이버 API 오늘 {naver_used:,} / {naver_quota.daily_quota:,}회 사용 · "
+        f"이번 분석 예상 약 {estimate_naver_calls(news_display_count, top_n_count):,}회 이상 (특징주 종목 제외)"
+    )
+
+    # 실시간 모니터링 (켜져 있는 동안 분석 결과 대신 표시)
+    if live_mode:
+        run_live_monitor(
+            previous_trading_day(input_date.strftime("%Y%m%d")), int(top_n_count), min(int(news_display_count), 100),
+            int(live_interval), max_polls=LIVE_MAX_POLLS or None
+        )
 
     # 분석 실행
-    if run_analysis:
+    elif run_analysis and not ai_summary_rerun:
+        run_timer = get_pipeline_timer()
+        run_status = 'stopped'
+        ai_future = None
         try:
             # 입력값 검증
             date_str = input_date.strftime("%Y%m%d")
             if not is_valid_date_format(date_str):
                 st.error("잘못된 날짜 형식입니다.")
                 st.stop()
+            # 휴장일이면 조회하지 않고 직전 거래일로 분석합니다.
+            trading_date_str = previous_trading_day(date_str)
+            if trading_date_str != date_str:
+                st.info(f"{date_str}은(는) 휴장일이라 직전 거래일 {trading_date_str} 기준으로 분석합니다.")
+                date_str = trading_date_str
 
-            progress_text = "분석이 진행 중입니다..."
-            progress_bar = st.progress(0, text=progress_text)
-
-            # 전체 시장 데이터 조회
-            progress_bar.progress(0.5, text="시장 데이터 조회 준비 중...")
-            all_market_data_df = get_all_market_data_with_names(date_str, company_details_df_global)
-            if all_market_data_df is None or all_market_data_df.empty:
-                st.error(f"{date_str} 날짜의 시장 데이터를 찾을 수 없습니다.")
-                st.stop()
-            progress_bar.progress(1.0, text="시장 데이터 조회 완료")
-
-            # 등락률 기준 상위 N개 종목 선택
-            progress_bar.progress(0.20, text="상위 종목 선별 중...")
-            top_n_df = all_market_data_df.sort_values(by='등락률', ascending=False).head(top_n_count)
-            top_n_stock_names = set(top_n_df['종목명'].tolist())
-            progress_bar.progress(0.30, text="상위 종목 선별 완료")
-
-            # 특징주 뉴스 검색
-            progress_bar.progress(0.35, text="특징주 뉴스 검색 준비 중...")
-            featured_stock_info = {}
-            if NAVER_CLIENT_ID and NAVER_CLIENT_SECRET:
-                progress_bar.progress(0.40, text="네이버 뉴스 API 호출 중...")
-                news_articles = call_naver_search_api("특징주", news_display_count, NAVER_CLIENT_ID, NAVER_CLIENT_SECRET)
-                progress_bar.progress(0.50, text="특징주 정보 추출 중...")
-                featured_stock_info = extract_featured_stock_names_from_news(news_articles, date_str, set(all_market_data_df['종목명']))
-            progress_bar.progress(0.60, text="특징주 뉴스 검색 완료")
-
-            # 최종 데이터프레임 생성
-            progress_bar.progress(0.85, text="데이터프레임 생성 중...")
-            final_data_list = []
-            processed_stocks = set()
-
-            # Top N 종목 처리
-            progress_bar.progress(0.35, text="Top N 종목 데이터 수집 중...")
-            for idx, (_, row) in enumerate(top_n_df.iterrows(), 1):
-                stock_name = row['종목명']
-                if stock_name in processed_stocks:
-                    continue
-
-                progress_bar.progress(0.35 + (idx/len(top_n_df))*0.20,
-                    text=f"Top N 종목 처리 중... ({idx}/{len(top_n_df)}) - {stock_name}")
-
-                processed_stocks.add(stock_name)
-                stock_info = {
-                    '날짜': date_str,
-                    '티커': row['티커'],
-                    '종목명': stock_name,
-                    '업종': row.get('업종', ''),
-                    '주요제품': row.get('주요제품', ''),
-                    '시가': row['시가'],
-                    '고가': row['고가'],
-                    '저가': row['저가'],
-                    '종가': row['종가'],
-                    '등락률': row['등락률'],
-                    '거래량': row['거래량'],
-                    '거래대금': row['거래대금'],
-                    '시장': row['시장'],
-                    '비고': ''
-                }
-
-                # 기사 컬럼 초기화
-                initialize_article_columns(stock_info)
-
-                if stock_name in featured_stock_info:
-                    stock_info['비고'] = f"top{top_n_count}+특징주"
-                    # 첫 번째 기사는 특징주 기사로 설정
-                    first_article = featured_stock_info[stock_name][0]
-                    stock_info['기사제목1'] = first_article['title']
-                    stock_info['기사요약1'] = first_article['description']
-                    stock_info['기사링크1'] = first_article['link']
-
-                    # 추가 기사 4개 검색
-                    if NAVER_CLIENT_ID and NAVER_CLIENT_SECRET:
-                        progress_bar.progress(0.35 + (idx/len(top_n_df))*0.20,
-                            text=f"Top N 종목 추가 기사 검색 중... ({idx}/{len(top_n_df)}) - {stock_name}")
-                        additional_articles = search_stock_articles_by_date(
-                            stock_name,
-                            NAVER_CLIENT_ID,
-                            NAVER_CLIENT_SECRET,
-                            date_str,
-                            max_count=4,
-                            match_date=True
-                        )
-                        # 기사2~5에 매핑
-                        for i, article in enumerate(additional_articles, 2):
-                            stock_info[f'기사제목{i}'] = article['title']
-                            stock_info[f'기사요약{i}'] = article['description']
-                            stock_info[f'기사링크{i}'] = article['link']
-                else:
-                    stock_info['비고'] = f"top{top_n_count}"
-                    # 일반 종목은 기사 5개 검색
-                    if NAVER_CLIENT_ID and NAVER_CLIENT_SECRET:
-                        progress_bar.progress(0.35 + (idx/len(top_n_df))*0.20,
-                            text=f"Top N 종목 기사 검색 중... ({idx}/{len(top_n_df)}) - {stock_name}")
-                        articles = search_stock_articles_by_date(
-                            stock_name,
-                            NAVER_CLIENT_ID,
-                            NAVER_CLIENT_SECRET,
-                            date_str,
-                            max_count=5,
-                            match_date=True
-                        )
-                        for i, article in enumerate(articles, 1):
-                            stock_info[f'기사제목{i}'] = article['title']
-                            stock_info[f'기사요약{i}'] = article['description']
-                            stock_info[f'기사링크{i}'] = article['link']
-
-                final_data_list.append(stock_info)
-            progress_bar.progress(0.55, text="Top N 종목 처리 완료")
-
-            # 특징주 정보 추가
-            progress_bar.progress(0.60, text="특징주 정보 수집 시작...")
-            featured_stocks = [stock for stock in featured_stock_info.keys() if stock not in processed_stocks]
-            for idx, stock_name in enumerate(featured_stocks, 1):
-                progress_bar.progress(0.60 + (idx/len(featured_stocks))*0.20,
-                    text=f"특징주 정보 처리 중... ({idx}/{len(featured_stocks)}) - {stock_name}")
-                try:
-                    stock_row = all_market_data_df[all_market_data_df['종목명'] == stock_name].iloc[0]
-                    stock_info = {
-                        '날짜': date_str,
-                        '티커': stock_row['티커'],
-                        '종목명': stock_name,
-                        '업종': stock_row.get('업종', ''),
-                        '주요제품': stock_row.get('주요제품', ''),
-                        '시가': stock_row['시가'],
-                        '고가': stock_row['고가'],
-                        '저가': stock_row['저가'],
-                        '종가': stock_row['종가'],
-                        '등락률': stock_row['등락률'],
-                        '거래량': stock_row['거래량'],
-                        '거래대금': stock_row['거래대금'],
-                        '시장': stock_row['시장'],
-                        '비고': '특징주'
-                    }
-
-                    # 기사 컬럼 초기화
-                    initialize_article_columns(stock_info)
-
-                    # 첫 번째 기사는 특징주 기사
-                    first_article = featured_stock_info[stock_name][0]
-                    stock_info['기사제목1'] = first_article['title']
-                    stock_info['기사요약1'] = first_article['description']
-                    stock_info['기사링크1'] = first_article['link']
-
-                    # 추가 기사 4개 검색
-                    if NAVER_CLIENT_ID and NAVER_CLIENT_SECRET:
-                        progress_bar.progress(0.60 + (idx/len(featured_stocks))*0.20,
-                            text=f"특징주 추가 기사 검색 중... ({idx}/{len(featured_stocks)}) - {stock_name}")
-                        additional_articles = search_stock_articles_by_date(
-                            stock_name,
-                            NAVER_CLIENT_ID,
-                            NAVER_CLIENT_SECRET,
-                            date_str,
-                            max_count=4,
-                            match_date=True
-                        )
-
-                        # 기사2~5에 매핑
-                        for i, article in enumerate(additional_articles, 2):
-                            stock_info[f'기사제목{i}'] = article['title']
-                            stock_info[f'기사요약{i}'] = article['description']
-                            stock_info[f'기사링크{i}'] = article['link']
-
-                    final_data_list.append(stock_info)
-                    processed_stocks.add(stock_name)
-                except Exception as e:
-                    st.error(f"특징주 {stock_name} 처리 중 오류 발생: {str(e)}")
-                    continue
-            progress_bar.progress(0.80, text="특징주 정보 처리 완료")
-
-            # 최종 데이터프레임 생성 및 정렬
-            progress_bar.progress(0.85, text="데이터프레임 생성 중...")
-            final_df = pd.DataFrame(final_data_list)
-            progress_bar.progress(0.90, text="데이터 정렬 중...")
-            final_df_sorted = final_df.sort_values(by='등락률', ascending=False)
-
-            progress_bar.progress(0.95, text="분석 결과 저장 중...")
-
-            # 분석 결과를 세션 상태에 저장
-            st.session_state.analysis_results = final_df_sorted
-            st.session_state.analysis_date = date_str
-            st.session_state.all_market_data = all_market_data_df
-
-            progress_bar.progress(1.0, text="분석이 완료되었습니다!")
-            time.sleep(1)
-            progress_bar.empty()
+            analysis_key = (date_str, int(top_n_count), int(news_display_count), extra_screens)
+            result_cache = get_result_cache()
+            cached_result = None if refresh_analysis else result_cache.get(analysis_key)
+            if cached_result is None:
+                cached_result = run_analysis_pipeline(
+                    date_str, top_n_count, news_display_count, extra_screens, resume=not refresh_analysis
+                )
+                if cached_result is None:
+                    st.stop()
+                result_cache.put(analysis_key, cached_result)
+                run_status = 'ok'
+            else:
+                st.info("같은 조건의 분석 결과가 캐시에 있어 바로 표시합니다. 새로 분석하려면 '캐시 무시하고 새로 분석'을 선택하세요.")
+                run_status = 'cached'
+            st.session_state.analysis_key = analysis_key
+            cached_result = apply_pending_ai_summaries(result_cache, analysis_key) or cached_result
+            ai_future = cached_result.get('ai_future')
+            final_df_sorted, all_market_data_df = cached_result['final_df'], cached_result['market_df']
 
             # 결과 표시
-            display_analysis_results(final_df_sorted, date_str, all_market_data_df, top_n_count)
+            with timed_span('결과 렌더링'):
+                display_analysis_results(
+                    final_df_sorted, date_str, all_market_data_df, top_n_count, cached_result.get('theme_summary')
+                )
 
         except Exception as e:
+            run_status = 'error'
             st.error(f"분석 중 오류가 발생했습니다: {str(e)}")
             st.error("상세 오류:")
             st.exception(e)
+        finally:
+            run_record = run_timer.to_record(
+                {'date': input_date.strftime("%Y%m%d"), 'top_n': int(top_n_count), 'news_count': int(news_display_count),
+                 'screens': [name for name, _, _ in extra_screens]},
+                run_status
+            )
+            write_timing_log(run_record)
+            st.session_state.last_run_timing = run_record
+            get_naver_quota().flush()
+        display_timing_breakdown(st.session_state.last_run_timing)
+        if ai_future is not None:
+            wait_for_ai_summaries(ai_future)
 
     # 이전 분석 결과 표시 (세션에 저장된 결과가 있을 경우)
-    elif st.session_state.analysis_results is not None:
-        display_analysis_results(
-            st.session_state.analysis_results,
-            st.session_state.analysis_date,
-            st.session_state.all_market_data,
-            top_n_count
-        )
+    elif st.session_state.analysis_key is not None:
+        cached_result = get_result_cache().get(st.session_state.analysis_key)
+        if cached_result is None:
+            st.info("이전 분석 결과가 캐시에서 제거되었습니다. 분석을 다시 실행해 주세요.")
+        else:
+            if cached_result.get('ai_future') is not None:
+                cached_result = apply_pending_ai_summaries(get_result_cache(), st.session_state.analysis_key) or cached_result
+            cached_date_str, cached_top_n = st.session_state.analysis_key[:2]
+            display_analysis_results(
+                cached_result['final_df'],
+                cached_date_str,
+                cached_result['market_df'],
+                cached_top_n,
+                cached_result.get('theme_summary')
+            )
+            display_timing_breakdown(st.session_state.last_run_timing)
+            if cached_result.get('ai_future') is not None:
+                wait_for_ai_summaries(cached_result['ai_future'])
 
 # 데이터베이스 탭
-with tab2:
+elif active_view == "데이터베이스":
     saved_dates = get_saved_dates()
     st.subheader("급등주+특징주 분석 결과 기간별 조회")
     # 저장된 날짜 목록 가져오기
     if saved_dates:
-        # 기간 선택 UI
+        # 기간 선택 UI (기본 시작일은 보관되지 않은 가장 오래된 날짜)
+        hot_dates = get_hot_dates()
         col1, col2 = st.columns(2)
         with col1:
             start_date = st.date_input(
                 "시작 날짜",
-                value=datetime.strptime(min(saved_dates), '%Y%m%d').date(),
+                value=datetime.strptime(min(hot_dates or saved_dates), '%Y%m%d').date(),
                 min_value=datetime.strptime(min(saved_dates), '%Y%m%d').date(),
                 max_value=datetime.strptime(max(saved_dates), '%Y%m%d').date(),
                 format="YYYY-MM-DD"
@@ -1453,62 +4257,19 @@ with tab2:
         if start_date <= end_date:
             start_date_str = start_date.strftime('%Y%m%d')
             end_date_str = end_date.strftime('%Y%m%d')
-            period_data = get_data_by_date_range(start_date_str, end_date_str)
-
-            if not period_data.empty:
-                # 컬럼 순서 재정렬: 종목명 뒤에 테마, AI_한줄요약
-                db_columns = [
-                    '날짜', '티커', '종목명',
-                    '업종', '주요제품', '시가', '고가', '저가', '종가', '등락률', '거래량', '거래대금', '시장', '비고',
-                    '기사제목1', '기사요약1', '기사링크1',
-                    '기사제목2', '기사요약2', '기사링크2',
-                    '기사제목3', '기사요약3', '기사링크3',
-                    '기사제목4', '기사요약4', '기사링크4',
-                    '기사제목5', '기사요약5', '기사링크5'
-                ]
-                for col in db_columns:
-                    if col not in period_data.columns:
-                        period_data[col] = ""
-                period_data = period_data[db_columns]
-
-                # 상세 결과 테이블
-                display_df = period_data.copy()
-                numeric_columns = ['시가', '고가', '저가', '종가', '거래량', '거래대금']
-                for col in numeric_columns:
-                    if col in display_df.columns:
-                        display_df[col] = display_df[col].apply(format_number)
-                display_df['등락률'] = display_df['등락률'].apply(format_percentage)
-
-                styled_df = display_df.style.map(color_negative_red, subset=['등락률'])
-                st.dataframe(styled_df, use_container_width=True)
-
-                # 데이터 내보내기
-                col1, col2 = st.columns(2)
-                with col1:
-                    excel_data = get_excel_data(period_data, f"{start_date_str}-{end_date_str}")
-                    st.download_button(
-                        label="Excel 다운로드",
-                        data=excel_data,
-                        file_name=f"stock_analysis_{start_date_str}-{end_date_str}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    )
-                with col2:
-                    txt_data = get_txt_data(period_data)
-                    st.download_button(
-                        label="TXT 다운로드",
-                        data=txt_data,
-                        file_name=f"stock_analysis_{start_date_str}-{end_date_str}.txt",
-                        mime="text/plain"
-                    )
-            else:
-                st.warning("선택한 기간에 저장된 데이터가 없습니다.")
+            display_db_browser(start_date_str, end_date_str)
+
+            # 기사 전문 검색
+            display_article_search(start_date_str, end_date_str)
         else:
             st.error("종료 날짜는 시작 날짜보다 커야 합니다.")
+        display_date_comparison(saved_dates)
+        display_archive_controls()
     else:
         st.info("저장된 분석 결과가 없습니다.")
 
 # 인포그래픽 탭
-with tab3:
+elif active_view == "인포그래픽":
     saved_dates = get_saved_dates()
     st.subheader("급등주+특징주 기간별 분석 인포그래픽")
     # 저장된 전체 날짜 범위 확인
@@ -1544,17 +4305,30 @@ with tab3:
             # 선택된 기간의 데이터 조회
             viz_start_date_str = viz_start_date.strftime('%Y%m%d')
             viz_end_date_str = viz_end_date.strftime('%Y%m%d')
-            period_data = get_data_by_date_range(viz_start_date_str, viz_end_date_str)
+            # 차트가 모두 캐시에 있으면 기간 데이터를 읽지 않도록 처음 필요할 때 한 번만 조회합니다.
+            period_data_holder = {}
+            def load_period_data():
+                if 'df' not in period_data_holder:
+                    period_data_holder['df'] = get_data_by_date_range(viz_start_date_str, viz_end_date_str)
+                return period_data_holder['df']
 
-            if not period_data.empty:
+            if any(viz_start_date_str <= date <= viz_end_date_str for date in saved_dates):
+                chart_key = (viz_start_date_str, viz_end_date_str, get_data_version())
                 # 4개의 차트를 2x2 그리드로 배치
                 col1, col2 = st.columns(2)
                 with col1:
-                    st.plotly_chart(create_market_distribution_pie(period_data), use_container_width=True)
-                    st.plotly_chart(create_top_volume_bar(period_data), use_container_width=True)
+                    st.plotly_chart(cached_figure('시장별 종목 분포', chart_key, lambda: create_market_distribution_pie(load_period_data())), use_container_width=True)
+                    st.plotly_chart(cached_figure('거래량 상위 10개 종목', chart_key, lambda: create_top_volume_bar(load_period_data())), use_container_width=True)
                 with col2:
-                    st.plotly_chart(create_top_rate_changes_bar(period_data), use_container_width=True)
-                    st.plotly_chart(create_industry_distribution_bar(period_data), use_container_width=True)
+                    st.plotly_chart(cached_figure('등락률 상위 10개 종목', chart_key, lambda: create_top_rate_changes_bar(load_period_data())), use_container_width=True)
+                    st.plotly_chart(cached_figure('업종별 종목 수 분포', chart_key, lambda: create_industry_distribution_bar(load_period_data())), use_container_width=True)
+                # 새로 만든 차트가 있을 때만 차트 생성 시간을 실행 기록에 남깁니다.
+                chart_timer = get_pipeline_timer()
+                if any(span['name'].startswith('차트: ') and not span.get('cached') for span in chart_timer.spans):
+                    write_timing_log(chart_timer.to_record({'view': '인포그래픽', 'start': viz_start_date_str, 'end': viz_end_date_str}, 'charts'))
+
+                # 연속 출현 종목
+                display_streak_analytics(viz_start_date_str, viz_end_date_str)
             else:
                 st.warning("선택한 기간에 저장된 데이터가 없습니다.")
         else:
@@ -1563,7 +4337,7 @@ with tab3:
         st.info("저장된 분석 결과가 없습니다.")
 
 # 구글 시트 보기 탭
-with tab4:
+elif active_view == "구글 시트 보기":
     st.subheader("구글 시트 데이터 보기")
     # 워크시트 목록 불러오기 및 선택
     sheet = get_google_sheet()
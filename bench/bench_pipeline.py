@@ -0,0 +1,182 @@
+"""오프라인 종단간(end-to-end) 분석 파이프라인 벤치마크.
+
+fixture를 재생하는 pykrx / 네이버 대역 위에서 app.py의 '분석 실행'을
+Streamlit AppTest로 실행하고, 종단간 시간과 단계별 시간(타이밍 로그)을 보고합니다.
+
+사용 예:
+    python -m bench.bench_pipeline --dates 20240502 20240503 --repeat 3
+    python -m bench.bench_pipeline --naver-latency 0.05 --rate-429 0.1 --output bench_result.json
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from bench.fixtures import DEFAULT_FIXTURE_ROOT, ensure_fixtures
+from bench.stubs import StubServer, install_fake_pykrx
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+DEFAULT_DATES = ["20240502", "20240503", "20240507"]
+
+
+def app_secrets(server, timing_log_path):
+    """AppTest에 주입할 설정값. 모든 외부 호출이 로컬 대역을 향하게 합니다."""
+    return {
+        "NAVER_CLIENT_ID": "bench",
+        "NAVER_CLIENT_SECRET": "bench",
+        "NAVER_NEWS_API_URL": server.news_url,
+        "KRX_COMPANY_LIST_URL": server.corplist_url,
+        "AI_API_URL": server.ai_url,
+        "AI_API_KEY": "bench",
+        "ALERT_WEBHOOK_URL": server.webhook_url,
+        "TIMING_LOG_PATH": timing_log_path,
+    }
+
+
+def find_widget(widgets, label):
+    return next(widget for widget in widgets if widget.label == label)
+
+
+def run_analysis_once(date_str, server, top_n, news_count, timing_log_path, timeout=600):
+    """새 세션에서 분석을 한 번 실행하고 (종단간 시간, 타이밍 기록, AppTest)를 반환합니다."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    for key, value in app_secrets(server, timing_log_path).items():
+        at.secrets[key] = value
+    at.run()
+    find_widget(at.date_input, "조회 날짜").set_value(datetime.strptime(date_str, "%Y%m%d").date())
+    find_widget(at.number_input, "상위 종목수").set_value(top_n)
+    find_widget(at.number_input, "특징주 기사 검색수").set_value(news_count)
+    start = time.perf_counter()
+    find_widget(at.button, "분석 실행").click().run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"{date_str} 분석 중 예외 발생: {at.exception[0].value}")
+    return elapsed, read_run_timing_record(timing_log_path), at
+
+
+def read_run_timing_record(path, status="ok"):
+    """타이밍 로그에서 분석을 실제로 실행한 마지막 기록(status)을 반환합니다.
+    AI 요약 반영 등으로 뒤에 붙은 다른 상태의 기록은 건너뛰고,
+    해당 기록이 없으면(결과 캐시 적중) 마지막 기록을 반환합니다."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return next((record for record in reversed(records) if record.get("status") == status),
+                records[-1] if records else None)
+
+
+def summarize(results):
+    """반복 실행 결과를 날짜별 종단간 / 단계별 통계표로 정리합니다."""
+    e2e_rows = []
+    stage_rows = []
+    for date_str, runs in results.items():
+        totals = [run["elapsed"] for run in runs]
+        e2e_rows.append({
+            "날짜": date_str,
+            "반복": len(totals),
+            "중앙값(초)": statistics.median(totals),
+            "최소(초)": min(totals),
+            "최대(초)": max(totals),
+        })
+        spans = pd.DataFrame([
+            {**span, "run": i}
+            for i, run in enumerate(runs) if run["timing"]
+            for span in run["timing"]["spans"]
+        ])
+        if spans.empty:
+            continue
+        grouped = spans.groupby(["depth", "name"], sort=False).agg(
+            duration=("duration", "median"),
+            calls=("calls", "median"),
+            retries=("retries", "median"),
+            backoff=("backoff", "median"),
+            bytes=("bytes", "median"),
+            duplicates=("duplicates", "median"),
+        ).reset_index()
+        grouped.insert(0, "날짜", date_str)
+        stage_rows.append(grouped)
+    e2e_df = pd.DataFrame(e2e_rows)
+    stage_df = pd.concat(stage_rows, ignore_index=True) if stage_rows else pd.DataFrame()
+    return e2e_df, stage_df
+
+
+def run_benchmark(dates, repeat=1, top_n=40, news_count=500, fixture_root=DEFAULT_FIXTURE_ROOT,
+                  naver_latency=0.0, pykrx_latency=0.0, rate_429=0.0, seed=0):
+    store = ensure_fixtures(dates, root=fixture_root)
+    fake_stock = install_fake_pykrx(store, latency=pykrx_latency)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench_") as workdir, \
+            StubServer(store, latency=naver_latency, rate_429=rate_429, seed=seed) as server:
+        # 앱은 작업 디렉터리에 stock_analysis.db를 만들므로 임시 디렉터리에서 실행합니다.
+        previous_cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for date_str in dates:
+                server.date_str = date_str
+                results[date_str] = []
+                for i in range(repeat):
+                    timing_log_path = os.path.join(workdir, f"timing_{date_str}_{i}.jsonl")
+                    elapsed, timing, _ = run_analysis_once(date_str, server, top_n, news_count, timing_log_path)
+                    results[date_str].append({"elapsed": elapsed, "timing": timing})
+                    print(f"{date_str} #{i + 1}: {elapsed:.2f}초")
+        finally:
+            os.chdir(previous_cwd)
+        stub_stats = {
+            "naver_requests": server.request_count,
+            "naver_429": server.throttled_count,
+            "ai_requests": server.ai_request_count,
+            "alert_webhooks": len(server.webhook_payloads),
+            "pykrx_calls": dict(fake_stock.calls),
+        }
+    return results, stub_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 분석 파이프라인 벤치마크")
+    parser.add_argument("--dates", nargs="+", default=DEFAULT_DATES)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--top-n", type=int, default=40)
+    parser.add_argument("--news-count", type=int, default=500)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_ROOT)
+    parser.add_argument("--naver-latency", type=float, default=0.0, help="네이버 요청당 지연(초)")
+    parser.add_argument("--pykrx-latency", type=float, default=0.0, help="pykrx 호출당 지연(초)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="429 응답 확률(0~1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    results, stub_stats = run_benchmark(
+        args.dates, repeat=args.repeat, top_n=args.top_n, news_count=args.news_count,
+        fixture_root=args.fixtures, naver_latency=args.naver_latency,
+        pykrx_latency=args.pykrx_latency, rate_429=args.rate_429, seed=args.seed,
+    )
+    e2e_df, stage_df = summarize(results)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print("\n[종단간]")
+        print(e2e_df.to_string(index=False, float_format=lambda x: f"{x:,.3f}"))
+        if not stage_df.empty:
+            print("\n[단계별 중앙값]")
+            print(stage_df.to_string(index=False, float_format=lambda x: f"{x:,.3f}"))
+    print(f"\n[대역 호출] {json.dumps(stub_stats, ensure_ascii=False)}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "params": vars(args),
+                "end_to_end": e2e_df.to_dict(orient="records"),
+                "stages": stage_df.to_dict(orient="records"),
+                "stubs": stub_stats,
+                "runs": results,
+            }, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
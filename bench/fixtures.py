@@ -0,0 +1,289 @@
+"""벤치마크용 고정 데이터(fixture)를 기록, 합성, 로드합니다.
+
+디렉터리 구조 (날짜별):
+    <root>/corplist.html              KRX 상장법인목록 HTML
+    <root>/<YYYYMMDD>/ohlcv_<시장>.csv  시장별 OHLCV (티커 인덱스)
+    <root>/<YYYYMMDD>/tickers.json     티커 -> 종목명
+    <root>/<YYYYMMDD>/trading_value_<시장>.csv  투자자별 거래대금
+    <root>/<YYYYMMDD>/news.json        검색어 -> 네이버 뉴스 API 원본 items (최신순)
+
+사용 예:
+    python -m bench.fixtures record 20240502 --top-n 40
+    python -m bench.fixtures synth 20240502 20240503 20240507
+"""
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pandas as pd
+
+MARKETS = ["KOSPI", "KOSDAQ", "KONEX"]
+DEFAULT_FIXTURE_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+# 종목별 합성 기사 주제. 같은 주제는 세 매체가 전재한 유사 기사로 만듭니다.
+STORY_TOPICS = [
+    "신규 수주 계약 체결", "분기 실적 시장 기대치 상회", "해외 공장 증설 결정", "자사주 매입 및 소각 발표",
+    "신약 임상 3상 진입", "대규모 유상증자 추진", "최대주주 지분 변경", "차세대 배터리 기술 공개",
+    "정부 지원 사업 선정", "배당 확대 정책 발표", "글로벌 기업과 협력 MOU", "신제품 출시 일정 확정",
+]
+FEATURED_QUERY = "특징주"
+KST = timezone(timedelta(hours=9))
+
+
+class FixtureStore:
+    """날짜별 fixture 파일을 읽고 메모리에 보관합니다."""
+
+    def __init__(self, root=DEFAULT_FIXTURE_ROOT):
+        self.root = root
+        self._cache = {}
+
+    def date_dir(self, date_str):
+        return os.path.join(self.root, date_str)
+
+    def has_date(self, date_str):
+        return os.path.exists(os.path.join(self.date_dir(date_str), "tickers.json"))
+
+    def available_dates(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if name.isdigit() and self.has_date(name))
+
+    def _load(self, key, loader):
+        if key not in self._cache:
+            self._cache[key] = loader()
+        return self._cache[key]
+
+    def ohlcv(self, date_str, market):
+        path = os.path.join(self.date_dir(date_str), f"ohlcv_{market}.csv")
+
+        def loader():
+            if not os.path.exists(path):
+                return pd.DataFrame()
+            df = pd.read_csv(path, dtype={"티커": str}).set_index("티커")
+            return df
+        return self._load(("ohlcv", date_str, market), loader)
+
+    def ticker_names(self, date_str):
+        path = os.path.join(self.date_dir(date_str), "tickers.json")
+        return self._load(("tickers", date_str), lambda: _read_json(path, {}))
+
+    def trading_value(self, date_str, market):
+        path = os.path.join(self.date_dir(date_str), f"trading_value_{market}.csv")
+
+        def loader():
+            if not os.path.exists(path):
+                return pd.DataFrame()
+            return pd.read_csv(path, index_col=0)
+        return self._load(("trading_value", date_str, market), loader)
+
+    def news(self, date_str):
+        path = os.path.join(self.date_dir(date_str), "news.json")
+        return self._load(("news", date_str), lambda: _read_json(path, {}))
+
+    def corplist_html(self):
+        """KRX 응답 원본 바이트를 그대로 반환합니다."""
+        path = os.path.join(self.root, "corplist.html")
+
+        def loader():
+            if not os.path.exists(path):
+                return b""
+            with open(path, "rb") as f:
+                return f.read()
+        return self._load(("corplist",), loader)
+
+
+def _read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def _pub_date(date_str, minutes_before_close):
+    """네이버 API와 같은 RFC 822 형식의 pubDate를 만듭니다."""
+    close = datetime.strptime(date_str, "%Y%m%d").replace(hour=18, tzinfo=KST)
+    return format_datetime(close - timedelta(minutes=minutes_before_close))
+
+
+def synthesize_fixtures(date_str, root=DEFAULT_FIXTURE_ROOT, ticker_count=2700, featured_count=60,
+                        articles_per_stock=120, featured_articles=1000, seed=None):
+    """실제 데이터와 같은 형태의 결정적(seed 고정) 합성 fixture를 생성합니다."""
+    rng = random.Random(seed if seed is not None else int(date_str))
+    tickers = [f"{code:06d}" for code in range(5930, 5930 + ticker_count * 7, 7)][:ticker_count]
+    names = {ticker: f"합성종목{ticker}" for ticker in tickers}
+    industries = ["반도체 제조업", "소프트웨어 개발 및 공급업", "전자부품 제조업", "의약품 제조업",
+                  "기타 금융업", "자동차 부품 제조업", "화학물질 제조업", "통신 및 방송 장비 제조업"]
+    date_dir = os.path.join(root, date_str)
+    os.makedirs(date_dir, exist_ok=True)
+
+    # 시장별 OHLCV (KOSPI 35%, KOSDAQ 60%, KONEX 5%)
+    market_of = {}
+    rates = {}
+    for ticker in tickers:
+        draw = rng.random()
+        market_of[ticker] = "KOSPI" if draw < 0.35 else ("KOSDAQ" if draw < 0.95 else "KONEX")
+    for market in MARKETS:
+        rows = []
+        for ticker in (t for t in tickers if market_of[t] == market):
+            prev_close = rng.randint(500, 300000)
+            rate = max(-30.0, min(30.0, rng.gauss(0.3, 4.5)))
+            close = int(prev_close * (1 + rate / 100))
+            high = int(max(close, prev_close) * (1 + rng.random() * 0.03))
+            low = int(min(close, prev_close) * (1 - rng.random() * 0.03))
+            volume = int(rng.lognormvariate(11, 1.6))
+            rates[ticker] = rate
+            rows.append({
+                "티커": ticker, "시가": prev_close, "고가": high, "저가": low, "종가": close,
+                "거래량": volume, "거래대금": volume * close, "등락률": round(rate, 2)
+            })
+        pd.DataFrame(rows).to_csv(os.path.join(date_dir, f"ohlcv_{market}.csv"), index=False)
+
+    for market in ["ALL", "KOSPI", "KOSDAQ"]:
+        investors = ["금융투자", "보험", "투신", "사모", "은행", "기타금융", "연기금", "기타법인", "개인", "외국인", "기타외국인"]
+        values = [rng.randint(-10 ** 12, 10 ** 12) for _ in investors]
+        pd.DataFrame([values], columns=investors, index=[pd.Timestamp(date_str)]).to_csv(
+            os.path.join(date_dir, f"trading_value_{market}.csv"))
+    _write_json(os.path.join(date_dir, "tickers.json"), names)
+
+    # 특징주 검색 결과: 대상 날짜 기사와 전날 기사가 섞여 있음
+    featured = rng.sample(tickers, featured_count)
+    news = {FEATURED_QUERY: []}
+    for i in range(featured_articles):
+        ticker = featured[i % featured_count] if i < featured_count * 3 else rng.choice(tickers)
+        minutes = i * 2 if i < featured_articles // 2 else 1440 + i
+        news[FEATURED_QUERY].append({
+            "title": f"[특징주] <b>{names[ticker]}</b>, 신규 수주 기대감에 강세",
+            "originallink": f"https://news.example.com/featured/{date_str}/{i}",
+            "link": f"https://n.news.naver.com/featured/{date_str}/{i}",
+            "description": f"{names[ticker]} 주가가 장중 상승세를 보이고 있다.",
+            "pubDate": _pub_date(date_str, minutes)
+        })
+
+    # 종목별 검색 결과: 같은 기사를 여러 매체가 전재한 경우를 포함
+    ranked = sorted(tickers, key=lambda t: -rates[t])
+    for ticker in set(featured) | set(ranked[:150]):
+        items = []
+        # 종목마다 주제 순서의 시작점을 달리해 최근 기사 주제가 종목별로 갈리게 합니다.
+        offset = int(ticker) % len(STORY_TOPICS)
+        for i in range(articles_per_stock):
+            topic = STORY_TOPICS[(offset + i // 3) % len(STORY_TOPICS)]
+            items.append({
+                "title": f"{names[ticker]}, {topic} ({['A', 'B', 'C'][i % 3]}일보)",
+                "originallink": f"https://news.example.com/{ticker}/{i}",
+                "link": f"https://n.news.naver.com/{ticker}/{i}",
+                "description": f"{names[ticker]}이(가) {topic} 소식을 전했다. 회사 측은 {i // 3 + 1}차 공시를 통해 세부 내용을 밝혔다.",
+                "pubDate": _pub_date(date_str, i * 45)
+            })
+        news[names[ticker]] = items
+    _write_json(os.path.join(date_dir, "news.json"), news)
+
+    corplist_path = os.path.join(root, "corplist.html")
+    if not os.path.exists(corplist_path):
+        rows = "".join(
+            f"<tr><td>{names[t]}</td><td>{t}</td><td>{industries[int(t) % len(industries)]}</td><td>주요제품 {t}</td></tr>"
+            for t in tickers
+        )
+        with open(corplist_path, "w", encoding="utf-8") as f:
+            f.write(f"<table><tr><th>회사명</th><th>종목코드</th><th>업종</th><th>주요제품</th></tr>{rows}</table>")
+    return date_dir
+
+
+def record_fixtures(date_str, root=DEFAULT_FIXTURE_ROOT, top_n=40, featured_count=1000, client_id=None, client_secret=None):
+    """실제 pykrx / KRX / 네이버 API를 호출하여 fixture를 기록합니다."""
+    import requests
+    from pykrx import stock
+
+    client_id = client_id or os.getenv("NAVER_CLIENT_ID")
+    client_secret = client_secret or os.getenv("NAVER_CLIENT_SECRET")
+    date_dir = os.path.join(root, date_str)
+    os.makedirs(date_dir, exist_ok=True)
+
+    names = {}
+    snapshots = []
+    for market in MARKETS:
+        df = stock.get_market_ohlcv(date_str, market=market)
+        df.index.name = "티커"
+        df.reset_index().to_csv(os.path.join(date_dir, f"ohlcv_{market}.csv"), index=False)
+        names.update({ticker: stock.get_market_ticker_name(ticker) for ticker in df.index})
+        snapshots.append(df)
+    _write_json(os.path.join(date_dir, "tickers.json"), names)
+
+    for market, detail in [("ALL", False), ("KOSPI", True), ("KOSDAQ", True)]:
+        df = stock.get_market_trading_value_by_date(date_str, date_str, market, etf=True, etn=True, elw=True, detail=detail)
+        df.to_csv(os.path.join(date_dir, f"trading_value_{market}.csv"))
+
+    headers = {"User-Agent": "Mozilla/5.0"}
+    response = requests.get("https://kind.krx.co.kr/corpgeneral/corpList.do?method=download&searchType=13",
+                            headers=headers, timeout=30)
+    response.raise_for_status()
+    with open(os.path.join(root, "corplist.html"), "wb") as f:
+        f.write(response.content)
+
+    def search(query, total):
+        items = []
+        for start in range(1, min(total, 1000) + 1, 100):
+            r = requests.get(
+                "https://openapi.naver.com/v1/search/news.json",
+                params={"query": query, "display": 100, "start": start, "sort": "date"},
+                headers={"X-Naver-Client-Id": client_id, "X-Naver-Client-Secret": client_secret},
+                timeout=10,
+            )
+            r.raise_for_status()
+            page = r.json().get("items", [])
+            items.extend(page)
+            if len(page) < 100:
+                break
+        return items
+
+    news = {FEATURED_QUERY: search(FEATURED_QUERY, featured_count)}
+    all_snapshot = pd.concat(snapshots)
+    top_tickers = all_snapshot.sort_values("등락률", ascending=False).head(top_n).index
+    query_names = {names[t] for t in top_tickers if names.get(t)}
+    featured_text = " ".join(item["title"] + item["description"] for item in news[FEATURED_QUERY])
+    query_names |= {name for name in names.values() if name and name in featured_text}
+    for name in sorted(query_names):
+        news[name] = search(name, 300)
+    _write_json(os.path.join(date_dir, "news.json"), news)
+    return date_dir
+
+
+def ensure_fixtures(dates, root=DEFAULT_FIXTURE_ROOT, ticker_count=2700):
+    """기록된 fixture가 없는 날짜는 합성 fixture로 채웁니다."""
+    store = FixtureStore(root)
+    for date_str in dates:
+        if not store.has_date(date_str):
+            synthesize_fixtures(date_str, root=root, ticker_count=ticker_count)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크 fixture 기록/합성")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="실제 API에서 fixture 기록")
+    rec.add_argument("dates", nargs="+")
+    rec.add_argument("--root", default=DEFAULT_FIXTURE_ROOT)
+    rec.add_argument("--top-n", type=int, default=40)
+    syn = sub.add_parser("synth", help="합성 fixture 생성")
+    syn.add_argument("dates", nargs="+")
+    syn.add_argument("--root", default=DEFAULT_FIXTURE_ROOT)
+    syn.add_argument("--tickers", type=int, default=2700)
+    args = parser.parse_args()
+
+    for date_str in args.dates:
+        if args.command == "record":
+            path = record_fixtures(date_str, root=args.root, top_n=args.top_n)
+        else:
+            path = synthesize_fixtures(date_str, root=args.root, ticker_count=args.tickers)
+        print(f"{date_str}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""여러 사용자 세션을 동시에 시뮬레이션하는 Streamlit 앱 부하 테스트 / 메모리 프로파일.
+
+각 세션은 AppTest 인스턴스 하나이며 fixture 대역(bench.stubs) 위에서
+첫 화면 로드 -> 분석 실행 -> 추가 rerun 순서로 동작합니다.
+rerun 지연 백분위수, 최대 RSS, 세션당 메모리를 보고합니다.
+
+사용 예:
+    python -m bench.load_test --sessions 20 --concurrency 5 --reruns 3
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+
+from bench.bench_pipeline import APP_PATH, DEFAULT_DATES, app_secrets, find_widget
+from bench.fixtures import DEFAULT_FIXTURE_ROOT, ensure_fixtures
+from bench.stubs import StubServer, install_fake_pykrx
+
+
+def current_rss_bytes():
+    """현재 프로세스의 RSS(바이트). /proc를 사용할 수 없으면 0을 반환합니다."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+class RssSampler:
+    """백그라운드 스레드에서 RSS를 주기적으로 측정해 최댓값을 기록합니다."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+
+
+def deep_sizeof(obj, seen=None):
+    """세션 상태 값의 대략적인 메모리 크기(바이트)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True, index=True))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def install_shared_runtime(secrets):
+    """모든 세션이 공유할 모의 Runtime과 st.secrets를 고정합니다.
+
+    AppTest는 실행할 때마다 전역 Runtime 인스턴스와 st.secrets를 설정했다가 해제하므로
+    여러 세션을 동시에 실행하면 먼저 끝난 세션이 다른 세션의 Runtime을 지워 버립니다.
+    실제 서버처럼 한 프로세스에서 하나의 Runtime을 공유하도록 AppTest의 설정/해제를 분리합니다.
+    """
+    import streamlit as st
+    import streamlit.testing.v1.app_test as app_test_module
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.secrets import Secrets
+
+    shared_runtime = MagicMock(spec=Runtime)
+    shared_runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared_runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = shared_runtime
+    app_test_module.Runtime = type("DetachedRuntimeSlot", (), {"_instance": None})
+
+    shared_secrets = Secrets([])
+    shared_secrets._secrets = dict(secrets)
+    st.secrets = shared_secrets
+
+
+def timed_run(at, latencies, session_id, phase):
+    start = time.perf_counter()
+    at.run()
+    latencies.append({"session": session_id, "phase": phase, "latency": time.perf_counter() - start})
+    if at.exception:
+        raise RuntimeError(f"세션 {session_id} {phase} 중 예외 발생: {at.exception[0].value}")
+
+
+def drive_session(session_id, date_str, top_n, news_count, reruns, latencies, timeout):
+    """세션 하나를 시나리오대로 진행하고 AppTest 인스턴스를 반환합니다(상태 유지를 위해)."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    timed_run(at, latencies, session_id, "첫 로드")
+
+    find_widget(at.date_input, "조회 날짜").set_value(datetime.strptime(date_str, "%Y%m%d").date())
+    find_widget(at.number_input, "상위 종목수").set_value(top_n)
+    find_widget(at.number_input, "특징주 기사 검색수").set_value(news_count)
+    find_widget(at.button, "분석 실행").click()
+    timed_run(at, latencies, session_id, "분석 실행")
+
+    for _ in range(reruns):
+        timed_run(at, latencies, session_id, "rerun")
+    return at
+
+
+def percentile_table(latencies):
+    df = pd.DataFrame(latencies)
+    rows = []
+    for phase, group in df.groupby("phase", sort=False):
+        values = group["latency"].to_numpy()
+        rows.append({
+            "단계": phase,
+            "횟수": len(values),
+            "p50(초)": float(np.percentile(values, 50)),
+            "p90(초)": float(np.percentile(values, 90)),
+            "p99(초)": float(np.percentile(values, 99)),
+            "최대(초)": float(values.max()),
+        })
+    return pd.DataFrame(rows)
+
+
+def run_load_test(sessions=20, concurrency=5, reruns=3, dates=None, top_n=40, news_count=500,
+                  fixture_root=DEFAULT_FIXTURE_ROOT, naver_latency=0.0, pykrx_latency=0.0,
+                  rate_429=0.0, timeout=600):
+    dates = dates or DEFAULT_DATES
+    store = ensure_fixtures(dates, root=fixture_root)
+    install_fake_pykrx(store, latency=pykrx_latency)
+    latencies = []  # list.append는 GIL 아래에서 원자적이므로 세션 스레드가 공유합니다.
+
+    with tempfile.TemporaryDirectory(prefix="loadtest_") as workdir, \
+            StubServer(store, date_str=dates[0], latency=naver_latency, rate_429=rate_429) as server:
+        previous_cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            # 스텁 서버는 한 번에 한 날짜만 재생하므로 세션은 모두 같은 날짜를 분석합니다.
+            install_shared_runtime(app_secrets(server, os.path.join(workdir, "timing.jsonl")))
+            baseline_rss = current_rss_bytes()
+            with RssSampler() as sampler:
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    futures = [
+                        pool.submit(drive_session, i, dates[0], top_n, news_count, reruns, latencies, timeout)
+                        for i in range(sessions)
+                    ]
+                    apps = [future.result() for future in futures]
+            retained_rss = current_rss_bytes()
+            session_sizes = [deep_sizeof(at.session_state.filtered_state) for at in apps]
+        finally:
+            os.chdir(previous_cwd)
+
+    memory = {
+        "baseline_rss_mb": baseline_rss / 2 ** 20,
+        "peak_rss_mb": sampler.peak / 2 ** 20,
+        "retained_rss_mb": retained_rss / 2 ** 20,
+        "rss_per_session_mb": (retained_rss - baseline_rss) / sessions / 2 ** 20,
+        "session_state_mb_mean": float(np.mean(session_sizes)) / 2 ** 20,
+        "session_state_mb_max": float(np.max(session_sizes)) / 2 ** 20,
+    }
+    return percentile_table(latencies), memory, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit 다중 세션 부하 테스트")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--reruns", type=int, default=3, help="분석 후 세션별 추가 rerun 횟수")
+    parser.add_argument("--date", default=DEFAULT_DATES[0])
+    parser.add_argument("--top-n", type=int, default=40)
+    parser.add_argument("--news-count", type=int, default=500)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_ROOT)
+    parser.add_argument("--naver-latency", type=float, default=0.0)
+    parser.add_argument("--pykrx-latency", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--output", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    table, memory, latencies = run_load_test(
+        sessions=args.sessions, concurrency=args.concurrency, reruns=args.reruns,
+        dates=[args.date], top_n=args.top_n, news_count=args.news_count,
+        fixture_root=args.fixtures, naver_latency=args.naver_latency,
+        pykrx_latency=args.pykrx_latency, rate_429=args.rate_429,
+    )
+    print("\n[rerun 지연 백분위수]")
+    print(table.to_string(index=False, float_format=lambda x: f"{x:,.3f}"))
+    print("\n[메모리]")
+    for key, value in memory.items():
+        print(f"{key}: {value:,.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"params": vars(args), "latency": table.to_dict(orient="records"),
+                       "memory": memory, "samples": latencies}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""네트워크 없이 분석 파이프라인을 재현하기 위한 pykrx / 네이버 / KRX 대역(stand-in)입니다.
+
+- FakeStock: `pykrx.stock`의 사용 함수들을 fixture에서 재생합니다.
+- StubServer: 네이버 뉴스 검색 API와 KRX 상장법인목록을 로컬 HTTP로 재생하고,
+  OpenAI 호환 chat/completions(AI 테마/한줄요약)에 결정적인 응답을 돌려주며, 관심종목 알림 웹훅을 받아 기록합니다.
+두 대역 모두 호출당 지연(latency)과 429 응답 주입을 설정할 수 있습니다.
+"""
+import json
+import random
+import sys
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from bench.fixtures import MARKETS, STORY_TOPICS
+
+
+class FakeStock:
+    """`pykrx.stock` 대역. 설정된 날짜의 fixture를 반환합니다."""
+
+    def __init__(self, store, latency=0.0):
+        self.store = store
+        self.latency = latency
+        self.calls = {}
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_market_ohlcv(self, date, market="KOSPI", *args, **kwargs):
+        self._count("get_market_ohlcv")
+        date_str = pd.Timestamp(date).strftime("%Y%m%d")
+        markets = MARKETS if market == "ALL" else [market]
+        frames = [self.store.ohlcv(date_str, m) for m in markets]
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return pd.DataFrame(columns=["시가", "고가", "저가", "종가", "거래량", "거래대금", "등락률"])
+        return pd.concat(frames).copy()
+
+    def get_market_ticker_name(self, ticker):
+        # 실제 pykrx도 종목 목록을 메모리에 캐시하므로 지연 없이 응답합니다.
+        self.calls["get_market_ticker_name"] = self.calls.get("get_market_ticker_name", 0) + 1
+        for date_str in reversed(self.store.available_dates()):
+            name = self.store.ticker_names(date_str).get(ticker)
+            if name:
+                return name
+        return ""
+
+    def get_market_ticker_list(self, date=None, market="KOSPI"):
+        self._count("get_market_ticker_list")
+        date_str = pd.Timestamp(date).strftime("%Y%m%d") if date else self.store.available_dates()[-1]
+        return list(self.get_market_ohlcv(date_str, market=market).index)
+
+    def get_market_trading_value_by_date(self, fromdate, todate, market, *args, **kwargs):
+        self._count("get_market_trading_value_by_date")
+        return self.store.trading_value(pd.Timestamp(todate).strftime("%Y%m%d"), market).copy()
+
+    def get_index_ohlcv_by_date(self, fromdate, todate, ticker, *args, **kwargs):
+        """거래일 달력용 지수 시세. 평일과 fixture가 있는 날짜를 거래일로 돌려줍니다."""
+        self._count("get_index_ohlcv_by_date")
+        days = pd.bdate_range(pd.Timestamp(fromdate), pd.Timestamp(todate))
+        fixture_days = [pd.Timestamp(d) for d in self.store.available_dates()
+                        if pd.Timestamp(fromdate) <= pd.Timestamp(d) <= pd.Timestamp(todate)]
+        index = days.union(pd.DatetimeIndex(fixture_days)).rename("날짜")
+        return pd.DataFrame({"시가": 1.0, "고가": 1.0, "저가": 1.0, "종가": 1.0, "거래량": 0}, index=index)
+
+
+def install_fake_pykrx(store, latency=0.0):
+    """`from pykrx import stock`이 FakeStock을 가져오도록 sys.modules를 교체합니다."""
+    fake = FakeStock(store, latency=latency)
+    module = types.ModuleType("pykrx")
+    stock_module = types.ModuleType("pykrx.stock")
+    for name in dir(fake):
+        if name.startswith("get_"):
+            setattr(stock_module, name, getattr(fake, name))
+    module.stock = stock_module
+    sys.modules["pykrx"] = module
+    sys.modules["pykrx.stock"] = stock_module
+    return fake
+
+
+class StubServer:
+    """네이버 뉴스 검색 API, KRX 상장법인목록, AI chat/completions를 재생하는 로컬 HTTP 서버.
+
+    latency: 요청당 지연(초), rate_429: 429 응답을 돌려줄 확률(0~1)
+    """
+
+    def __init__(self, store, date_str=None, latency=0.0, rate_429=0.0, seed=0):
+        self.store = store
+        self.date_str = date_str
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.request_count = 0
+        self.throttled_count = 0
+        self.ai_request_count = 0
+        self.webhook_payloads = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def news_url(self):
+        return f"{self.base_url}/v1/search/news.json"
+
+    @property
+    def corplist_url(self):
+        return f"{self.base_url}/corpgeneral/corpList.do?method=download&searchType=13"
+
+    @property
+    def ai_url(self):
+        return f"{self.base_url}/v1/chat/completions"
+
+    @property
+    def webhook_url(self):
+        return f"{self.base_url}/webhook/alerts"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _should_throttle(self):
+        with self._lock:
+            self.request_count += 1
+            throttled = self.rate_429 > 0 and self._rng.random() < self.rate_429
+            if throttled:
+                self.throttled_count += 1
+            return throttled
+
+    def news_page(self, query, display, start):
+        items = self.store.news(self.date_str).get(query, [])
+        return {
+            "lastBuildDate": "",
+            "total": len(items),
+            "start": start,
+            "display": display,
+            "items": items[start - 1:start - 1 + display],
+        }
+
+    def ai_completion(self, request):
+        """프롬프트의 '- 종목명 (' 줄마다 종목명 해시로 고른 주제를 테마/한줄요약으로 돌려줍니다."""
+        with self._lock:
+            self.ai_request_count += 1
+        prompt = request["messages"][-1]["content"]
+        names = [line[2:].split(" (", 1)[0] for line in prompt.splitlines() if line.startswith("- ")]
+        items = []
+        for name in names:
+            topic = STORY_TOPICS[sum(map(ord, name)) % len(STORY_TOPICS)]
+            items.append({"종목명": name, "테마": topic.split()[0], "한줄요약": f"{name} {topic}"})
+        return {
+            "id": f"stub-{self.ai_request_count}",
+            "object": "chat.completion",
+            "model": request.get("model", ""),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(items, ensure_ascii=False)},
+                "finish_reason": "stop",
+            }],
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                parsed = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                if parsed.path.endswith("/news.json"):
+                    if server._should_throttle():
+                        body = json.dumps({"errorMessage": "Rate limit exceeded.", "errorCode": "012"}).encode()
+                        return self._send(429, body, "application/json")
+                    page = server.news_page(
+                        params.get("query", ""),
+                        int(params.get("display", 10)),
+                        int(params.get("start", 1)),
+                    )
+                    return self._send(200, json.dumps(page, ensure_ascii=False).encode("utf-8"),
+                                      "application/json; charset=utf-8")
+                if parsed.path.endswith("/corpList.do"):
+                    return self._send(200, server.store.corplist_html(), "text/html; charset=utf-8")
+                self._send(404, b"not found", "text/plain")
+
+            def do_POST(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if urlparse(self.path).path.endswith("/chat/completions"):
+                    completion = server.ai_completion(json.loads(body))
+                    return self._send(200, json.dumps(completion, ensure_ascii=False).encode("utf-8"),
+                                      "application/json; charset=utf-8")
+                if urlparse(self.path).path == "/webhook/alerts":
+                    with server._lock:
+                        server.webhook_payloads.append(json.loads(body))
+                    return self._send(204, b"", "text/plain")
+                self._send(404, b"not found", "text/plain")
+
+        return Handler